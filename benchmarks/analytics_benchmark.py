@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""
+Compare the NumPy columns of storage.columns() with Python loops.
+
+Usage: ./benchmarks/analytics_benchmark.py [number of places]
+
+The places are spread over 1000 cities. Each line prints the time of
+one statistic computed by looping over storage.all(Place) and with
+the columns, which are built once and then kept up to date.
+"""
+
+import os  # Import os to locate the repository
+import random  # Import random to generate the places
+import statistics  # Import statistics for the Python percentiles
+import sys  # Import sys to read the command line
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def timed(function):
+    """Return the result and duration of function() in ms."""
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def mean_by_city(places):
+    """Mean price per city with a Python loop."""
+    sums, counts = {}, {}
+    for place in places:
+        sums[place.city_id] = sums.get(place.city_id, 0) + \
+            place.price_by_night
+        counts[place.city_id] = counts.get(place.city_id, 0) + 1
+    return {city: sums[city] / counts[city] for city in sums}
+
+
+def p90_by_city(places):
+    """90th percentile of the prices per city with a Python loop."""
+    prices = {}
+    for place in places:
+        prices.setdefault(place.city_id, []).append(place.price_by_night)
+    return {city: statistics.quantiles(values, n=10,
+                                       method="inclusive")[-1]
+            for city, values in prices.items()}
+
+
+def count_in_range(places):
+    """Number of places between 50 and 100 with a Python loop."""
+    return sum(1 for place in places if 50 <= place.price_by_night <= 100)
+
+
+def guests(places):
+    """Distribution of max_guest with a Python loop."""
+    counts = {}
+    for place in places:
+        counts[place.max_guest] = counts.get(place.max_guest, 0) + 1
+    return counts
+
+
+def main():
+    """Time each statistic both ways."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    random.seed(0)
+    now = "2024-01-01T00:00:00.000001"
+    storage = FileStorage()
+    storage._FileStorage__objects = {}
+    storage.count(Place)  # Index the new dictionary while it is empty
+    for _ in range(count):
+        storage.new(Place(id=str(uuid.uuid4()), created_at=now,
+                          updated_at=now,
+                          city_id="city-{}".format(random.randrange(1000)),
+                          price_by_night=random.randint(20, 500),
+                          max_guest=random.randint(1, 10)))
+    columns, duration = timed(storage.columns)
+    print("{} places, columns built in {:.0f} ms".format(count, duration))
+    for name, loop, vectorized in (
+            ("mean price by city", mean_by_city,
+             lambda: columns.aggregate("price_by_night", "mean",
+                                       by="city_id")),
+            ("p90 price by city", p90_by_city,
+             lambda: columns.percentile("price_by_night", 90,
+                                        by="city_id")),
+            ("count 50 <= price <= 100", count_in_range,
+             lambda: columns.aggregate("price_by_night", "count",
+                                       price_by_night__ge=50,
+                                       price_by_night__le=100)),
+            ("max_guest distribution", guests,
+             lambda: columns.distribution("max_guest"))):
+        expected, python = timed(
+            lambda: loop(storage.all(Place).values()))
+        result, numpy = timed(vectorized)
+        if isinstance(expected, dict):
+            assert len(expected) == len(result)
+            assert all(abs(expected[key] - result[key]) < 1e-6
+                       for key in expected)
+        else:
+            assert expected == result
+        print("  {:26} python {:8.1f} ms  numpy {:7.1f} ms  x{:.0f}".format(
+            name, python, numpy, python / numpy))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""
+Compare the console all command with the list it used to build.
+
+Usage: ./benchmarks/console_all_benchmark.py [number of objects]
+
+The output goes to a sink that only counts the characters, so the
+numbers measure the command itself: the time until the first write,
+the total time, and the peak memory allocated while it runs.
+"""
+
+import os  # Import os to locate the repository
+import sys  # Import sys to read the command line and replace stdout
+import time  # Import time to measure the durations
+import tracemalloc  # Import tracemalloc to measure the memory
+import uuid  # Import uuid to generate ids
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from console import HBNBCommand  # noqa: E402
+from models import storage  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+class Sink:
+    """Output that counts what is written and when it starts."""
+
+    def __init__(self):
+        """Initialize an empty sink."""
+        self.start = time.perf_counter()  # When the command started
+        self.first = None  # Seconds until the first write
+        self.size = 0  # Characters written
+
+    def write(self, text):
+        """Counts the text instead of keeping it."""
+        if self.first is None:
+            self.first = time.perf_counter() - self.start
+        self.size += len(text)
+
+    def flush(self):
+        """Nothing is buffered."""
+
+
+def print_list(line):
+    """Print the instances the way do_all used to."""
+    print([str(obj) for obj in storage.all(line).values()])
+
+
+def run(command, line, memory):
+    """Return the sink and peak memory of one run of a command."""
+    if memory:
+        tracemalloc.start()
+    sink = Sink()
+    stdout, sys.stdout = sys.stdout, sink
+    try:
+        command(line)
+    finally:
+        sys.stdout = stdout
+    peak = tracemalloc.get_traced_memory()[1] if memory else 0
+    tracemalloc.stop()
+    return sink, time.perf_counter() - sink.start, peak
+
+
+def main():
+    """Time both commands on the same objects."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    now = "2024-01-01T00:00:00.000001"
+    storage._FileStorage__objects = {}
+    for _ in range(count):
+        storage.new(User(id=str(uuid.uuid4()), created_at=now,
+                         updated_at=now, email="betty@holberton.io"))
+    console = HBNBCommand()
+    print("{} users".format(count))
+    for name, command, line in (
+            ("list of str()", print_list, "User"),
+            ("all", console.do_all, "User"),
+            ("all --json", console.do_all, "User --json"),
+            ("all --limit 20", console.do_all, "User --limit 20")):
+        sink, total, _ = run(command, line, False)
+        _, _, peak = run(command, line, True)
+        print("  {:15} first {:9.2f} ms  total {:8.1f} ms  "
+              "peak {:9.1f} MB  ({} chars)".format(
+                  name, sink.first * 1e3, total * 1e3, peak / 2 ** 20,
+                  sink.size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""
+Compare looking model classes up with eval() and with the registry.
+
+Usage: ./benchmarks/dispatch_benchmark.py [number of records]
+
+The "eval" lines dispatch the records the way FileStorage.reload() did
+before BaseModel.registry, the "registry" lines use the registry.
+"""
+
+import os  # Import os to locate the repository
+import sys  # Import sys to read the command line
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+from datetime import datetime  # Import datetime for the timestamps
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.base_model import BaseModel  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def make_records(count):
+    """Return count raw records spread over three classes."""
+    now = datetime.now().isoformat()
+    names = ("Place", "Review", "User")
+    return [{"id": str(uuid.uuid4()), "created_at": now, "updated_at": now,
+             "__class__": names[number % 3]} for number in range(count)]
+
+
+def with_eval(records):
+    """Instantiate the records, finding the classes with eval()."""
+    for record in records:
+        eval(record["__class__"])(**record)
+
+
+def with_registry(records):
+    """Instantiate the records, finding the classes in the registry."""
+    registry = BaseModel.registry
+    for record in records:
+        registry[record["__class__"]](**record)
+
+
+def lookup_eval(records):
+    """Only look the classes up with eval()."""
+    for record in records:
+        eval(record["__class__"])
+
+
+def lookup_registry(records):
+    """Only look the classes up in the registry."""
+    registry = BaseModel.registry
+    for record in records:
+        registry[record["__class__"]]
+
+
+def report(label, count, function, records):
+    """Print the throughput of a dispatch function."""
+    start = time.perf_counter()
+    function(records)
+    elapsed = time.perf_counter() - start
+    print("{:<28} {:>12.0f} records/sec".format(label, count / elapsed))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    records = make_records(count)
+    report("lookup, eval", count, lookup_eval, records)
+    report("lookup, registry", count, lookup_registry, records)
+    report("reload, eval", count, with_eval, records)
+    report("reload, registry", count, with_registry, records)
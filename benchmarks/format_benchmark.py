@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""
+Compare the JSON and columnar snapshot formats of FileStorage.
+
+Usage: ./benchmarks/format_benchmark.py [number of objects]
+
+For each format it prints the size of the file and the time of a full
+save() and of a reload() into a new storage.
+"""
+
+import os  # Import os to measure and remove the test files
+import sys  # Import sys to read the command line
+import tempfile  # Import tempfile for the test files
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine import columnar  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def make_storage(path, serializer):
+    """Create an empty storage writing to path."""
+    storage = FileStorage(serializer=serializer)
+    storage._FileStorage__file_path = path
+    storage._FileStorage__objects = {}
+    return storage
+
+
+def main():
+    """Save and reload the same places in both formats."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # A few cities and users shared by the places, as in real data
+    city_ids = [str(uuid.uuid4()) for _ in range(100)]
+    user_ids = [str(uuid.uuid4()) for _ in range(1000)]
+    objects = {}
+    for number in range(count):
+        place = Place(id=str(uuid.uuid4()), __class__="Place",
+                      created_at="2024-01-01T00:00:00.000001",
+                      updated_at="2024-01-01T00:00:00.000001",
+                      name="Place {}".format(number),
+                      city_id=city_ids[number % 100],
+                      user_id=user_ids[number % 1000],
+                      price_by_night=number % 300, latitude=37.7,
+                      longitude=-122.4, amenity_ids=[])
+        objects["Place." + place.id] = place
+    print("{} places".format(count))
+    directory = tempfile.mkdtemp()
+    for name, serializer in (("json", None), ("columnar", columnar)):
+        path = os.path.join(directory, "file." + name)
+        storage = make_storage(path, serializer)
+        for obj in objects.values():
+            storage.new(obj)
+        start = time.perf_counter()
+        storage.save()
+        saved = time.perf_counter() - start
+        storage = make_storage(path, serializer)
+        start = time.perf_counter()
+        storage.reload()
+        loaded = time.perf_counter() - start
+        print("{:<10}{:>8.1f} MB  save {:6.2f}s  reload {:6.2f}s".format(
+            name, os.path.getsize(path) / 1e6, saved, loaded))
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Compare the memory used by regular and compact Place instances.
+
+Usage: ./benchmarks/memory_benchmark.py [number of places]
+
+Each run loads the same saved records, the way FileStorage.reload()
+does, and reports the memory held by the instances with tracemalloc.
+"""
+
+import gc  # Import gc to free the previous run
+import os  # Import os to locate the repository
+import sys  # Import sys to read the command line
+import tracemalloc  # Import tracemalloc to measure the memory
+import uuid  # Import uuid to generate ids
+from datetime import datetime  # Import datetime for the timestamps
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.compact import compact_class  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def make_records(count):
+    """Return count saved Place records with every attribute set."""
+    now = datetime.now().isoformat()
+    for number in range(count):
+        yield {"id": str(uuid.uuid4()), "created_at": now,
+               "updated_at": now, "__class__": "Place",
+               "city_id": "city", "user_id": "user", "name": "Loft",
+               "description": "", "number_rooms": 2,
+               "number_bathrooms": 1, "max_guest": 4,
+               "price_by_night": 100, "latitude": 37.77,
+               "longitude": -122.42, "amenity_ids": []}
+
+
+def measure(cls, count):
+    """Return the bytes per instance held after loading count records."""
+    gc.collect()
+    tracemalloc.start()
+    objects = [cls(**record) for record in make_records(count)]
+    for obj in objects:
+        obj.created_at, obj.updated_at  # Parse the timestamps
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    regular = measure(Place, count)
+    compact = measure(compact_class(Place), count)
+    print("{} places".format(count))
+    print("{:<10} {:>8.0f} bytes/object {:>8.0f} MB".format(
+        "Place", regular, regular * count / 2 ** 20))
+    print("{:<10} {:>8.0f} bytes/object {:>8.0f} MB".format(
+        "compact", compact, compact * count / 2 ** 20))
+    print("saved      {:>8.0%}".format(1 - compact / regular))
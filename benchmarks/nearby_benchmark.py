@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+"""
+Compare storage.nearby() and storage.bbox() with a scan of every place.
+
+Usage: ./benchmarks/nearby_benchmark.py [number of places]
+
+The places are spread at random over the land between 60S and 70N.
+Each line prints the average time of one search around a few cities,
+with the spatial index and by checking every place.
+"""
+
+import os  # Import os to locate the repository
+import random  # Import random to spread the places
+import sys  # Import sys to read the command line
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.engine.geo_index import distance_km, in_box  # noqa: E402
+from models.place import Place  # noqa: E402
+
+CITIES = [(37.77, -122.42), (48.86, 2.35), (-33.87, 151.21),
+          (35.68, 139.69), (-1.29, 36.82)]
+
+
+def timed(function, repeat=1):
+    """Return the result and average duration of function() in ms."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1e3
+
+
+def scan_nearby(storage, lat, lon, radius_km, limit):
+    """Find the nearest places by checking every one of them."""
+    found = []
+    for obj in storage.all(Place).values():
+        distance = distance_km(lat, lon, obj.latitude, obj.longitude)
+        if distance <= radius_km:
+            found.append((distance, obj))
+    found.sort(key=lambda pair: pair[0])
+    return found[:limit]
+
+
+def scan_box(storage, south, west, north, east):
+    """Find the places in a box by checking every one of them."""
+    return [obj for obj in storage.all(Place).values()
+            if in_box(obj.latitude, obj.longitude, south, west, north, east)]
+
+
+def main():
+    """Time both searches on the same places."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    random.seed(0)
+    now = "2024-01-01T00:00:00.000001"
+    storage = FileStorage()
+    storage._FileStorage__objects = {}
+    storage.count(Place)  # Index the new dictionary while it is empty
+    start = time.perf_counter()
+    for _ in range(count):
+        storage.new(Place(id=str(uuid.uuid4()), created_at=now,
+                          updated_at=now,
+                          latitude=random.uniform(-60, 70),
+                          longitude=random.uniform(-180, 180)))
+    print("{} places, stored and indexed in {:.1f} s".format(
+        count, time.perf_counter() - start))
+    for radius in (10, 100, 500):
+        indexed = scanned = 0
+        for lat, lon in CITIES:
+            found, duration = timed(
+                lambda: storage.nearby(lat, lon, radius, 10), 10)
+            indexed += duration
+            expected, duration = timed(
+                lambda: scan_nearby(storage, lat, lon, radius, 10))
+            scanned += duration
+            assert [obj for obj, _ in found] == \
+                [obj for _, obj in expected]
+        print("  nearby {:4} km  index {:8.3f} ms  scan {:8.1f} ms".format(
+            radius, indexed / len(CITIES), scanned / len(CITIES)))
+    for size in (0.5, 5):
+        indexed = scanned = 0
+        for lat, lon in CITIES:
+            box = (lat - size, lon - size, lat + size, lon + size)
+            found, duration = timed(lambda: storage.bbox(*box), 10)
+            indexed += duration
+            expected, duration = timed(lambda: scan_box(storage, *box))
+            scanned += duration
+            assert sorted(found.values(), key=id) == \
+                sorted(expected, key=id)
+        print("  bbox  {:3}x{:<3}deg index {:8.3f} ms  scan {:8.1f} ms".format(
+            2 * size, 2 * size, indexed / len(CITIES),
+            scanned / len(CITIES)))
+
+
+if __name__ == "__main__":
+    main()
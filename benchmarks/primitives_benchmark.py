@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""
+Compare storage.get() and storage.count() with the lookups the console
+used to do, on a large store.
+
+Usage: ./benchmarks/primitives_benchmark.py [number of objects]
+
+Half of the objects are places and half users. Each line prints the
+average time of one call, in the default and in the thread-safe mode
+(where all() copies the dictionary).
+"""
+
+import os  # Import os to find the repository
+import sys  # Import sys to read the command line
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def timed(function, repeat):
+    """Return the average duration of function() in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    """Time the lookups on the same objects in both modes."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    now = "2024-01-01T00:00:00.000001"
+    objects = []
+    for number in range(count):
+        cls = Place if number % 2 == 0 else User
+        objects.append(cls(id=str(uuid.uuid4()), created_at=now,
+                           updated_at=now))
+    print("{} objects".format(count))
+    for thread_safe in (False, True):
+        storage = FileStorage(thread_safe=thread_safe)
+        storage._FileStorage__objects = {}
+        for obj in objects:
+            storage.new(obj)
+        obj_id = objects[count // 2].id
+        key = "Place." + obj_id
+        print("thread_safe={}".format(thread_safe))
+
+        def show_all():
+            """Look the object up the way do_show used to."""
+            if key in storage.all():
+                return storage.all()[key]
+        print("  show  all() twice    {:12.2f} us".format(
+            timed(show_all, 3 if thread_safe else 100000)))
+        print("  show  get()          {:12.2f} us".format(
+            timed(lambda: storage.get(Place, obj_id), 100000)))
+
+        def count_scan():
+            """Count the places the way do_count used to."""
+            return sum(1 for obj in storage.all().values()
+                       if isinstance(obj, Place))
+        print("  count isinstance scan{:12.2f} us".format(
+            timed(count_scan, 3)))
+        print("  count len(all(cls))  {:12.2f} us".format(
+            timed(lambda: len(storage.all(Place)), 3)))
+        print("  count count()        {:12.2f} us".format(
+            timed(lambda: storage.count(Place), 100000)))
+
+
+if __name__ == "__main__":
+    main()
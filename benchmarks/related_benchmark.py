@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Compare state.cities and storage.related() with a scan of every city.
+
+Usage: ./benchmarks/related_benchmark.py [number of states]
+
+Each state has 50 cities. Each line prints the average time to list the
+cities of one state, or of a page of 20 states, with FileStorage and
+with DBStorage reading a database in a temporary directory.
+"""
+
+import os  # Import os to locate the repository
+import sys  # Import sys to read the command line
+import tempfile  # Import tempfile for the database
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+from unittest.mock import patch  # Import patch to switch the storage
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.db_storage import DBStorage  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.city import City  # noqa: E402
+from models.state import State  # noqa: E402
+
+CITIES = 50  # Cities of each state
+PAGE = 20  # States listed on a page
+
+
+def timed(function, repeat=1):
+    """Return the result and average duration of function() in ms."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1e3
+
+
+def scan(storage, state):
+    """List the cities of a state by checking every city."""
+    return sorted((city for city in storage.all(City).values()
+                   if city.state_id == state.id), key=lambda city: city.id)
+
+
+def main():
+    """Time the lookups on the same states and cities."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    now = "2024-01-01T00:00:00.000001"
+    states = [State(id=str(uuid.uuid4()), created_at=now, updated_at=now)
+              for _ in range(count)]
+    cities = [City(id=str(uuid.uuid4()), created_at=now, updated_at=now,
+                   state_id=state.id)
+              for state in states for _ in range(CITIES)]
+    page = states[:PAGE]
+    ids = [state.id for state in page]
+    print("{} states, {} cities".format(count, len(cities)))
+    storage = FileStorage()
+    storage._FileStorage__objects = {}
+    storage.count(City)  # Index the new dictionary while it is empty
+    for obj in states + cities:
+        storage.new(obj)
+    with patch("models.storage", storage):
+        found, indexed = timed(lambda: page[0].cities, 1000)
+        expected, scanned = timed(lambda: scan(storage, page[0]), 3)
+        assert found == expected
+        print("  file  one state   property {:8.3f} ms  scan {:8.1f} ms"
+              .format(indexed, scanned))
+        _, one_by_one = timed(
+            lambda: [state.cities for state in page], 100)
+        _, batched = timed(
+            lambda: storage.related(City, "state_id", ids), 100)
+        print("  file  page of {}  property {:8.3f} ms  related {:6.3f} ms"
+              .format(PAGE, one_by_one, batched))
+    directory = tempfile.TemporaryDirectory()
+    storage = DBStorage(os.path.join(directory.name, "bench.db"))
+    for obj in states + cities:
+        storage.new(obj)
+    storage.save()
+    storage.close()
+    storage = DBStorage(os.path.join(directory.name, "bench.db"))
+    with patch("models.storage", storage):
+        _, one_by_one = timed(
+            lambda: [state.cities for state in page], 10)
+        _, batched = timed(
+            lambda: storage.related(City, "state_id", ids), 10)
+        print("  db    page of {}  property {:8.3f} ms  related {:6.3f} ms"
+              .format(PAGE, one_by_one, batched))
+    storage.close()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""
+Measure how many objects per second FileStorage.reload() loads.
+
+Usage: ./benchmarks/reload_benchmark.py [number of objects]
+
+The "hydrate" lines only time the instantiation of the records. The
+"strptime" one re-creates them the way BaseModel did before timestamps
+were parsed with datetime.fromisoformat on first access.
+"""
+
+import json  # Import json to write the test file
+import os  # Import os to remove the test file
+import sys  # Import sys to read the command line
+import tempfile  # Import tempfile for the test file
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+from datetime import datetime  # Import datetime for the legacy parser
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+
+
+def write_file(path, count):
+    """Write a JSON file holding count Place objects."""
+    now = datetime.now().isoformat()
+    data = {}
+    for number in range(count):
+        obj_id = str(uuid.uuid4())
+        data["Place." + obj_id] = {
+            "id": obj_id, "created_at": now, "updated_at": now,
+            "__class__": "Place", "name": "Place {}".format(number),
+            "city_id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()),
+            "price_by_night": number % 300, "latitude": 37.7,
+            "longitude": -122.4, "amenity_ids": []}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+
+
+class LegacyPlace:
+    """Place rebuilt the way BaseModel.__init__ did before this change."""
+
+    def __init__(self, **kwargs):
+        """Set the attributes, parsing timestamps with strptime."""
+        for key, value in kwargs.items():
+            if key in ("created_at", "updated_at"):
+                setattr(self, key,
+                        datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f"))
+            elif key != "__class__":
+                setattr(self, key, value)
+
+
+def hydrate(records, cls, touch):
+    """Instantiate every record, optionally reading the timestamps."""
+    for value in records:
+        obj = cls(**value)
+        if touch:
+            obj.created_at, obj.updated_at
+
+
+def storage_load(path):
+    """Load the file with FileStorage.reload()."""
+    storage = FileStorage()
+    storage._FileStorage__file_path = path
+    storage._FileStorage__objects = {}
+    storage.reload()
+    return storage.all()
+
+
+def report(label, count, function):
+    """Print the throughput of a loading function."""
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print("{:<32} {:>10.0f} objects/sec".format(label, count / elapsed))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    handle, path = tempfile.mkstemp(suffix=".json")
+    os.close(handle)
+    try:
+        write_file(path, count)
+        with open(path, encoding="utf-8") as file:
+            records = list(json.load(file).values())
+        report("hydrate, strptime (before)", count,
+               lambda: hydrate(records, LegacyPlace, False))
+        report("hydrate, timestamps read", count,
+               lambda: hydrate(records, Place, True))
+        report("hydrate, timestamps untouched", count,
+               lambda: hydrate(records, Place, False))
+        report("FileStorage.reload()", count, lambda: storage_load(path))
+    finally:
+        os.remove(path)
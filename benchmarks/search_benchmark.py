@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""
+Compare storage.search() with a substring scan of every review, and a
+first search reading the text index saved with the file with one
+splitting every text.
+
+Usage: ./benchmarks/search_benchmark.py [number of reviews]
+
+Each review holds 30 words drawn from a vocabulary of 5000 rare words
+and 15 common ones. The file is written to a temporary directory.
+"""
+
+import os  # Import os to locate the repository and the files
+import random  # Import random to write the reviews
+import sys  # Import sys to read the command line
+import tempfile  # Import tempfile for the storage file
+import time  # Import time to measure the durations
+import uuid  # Import uuid to generate ids
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.review import Review  # noqa: E402
+
+COMMON = ["clean", "quiet", "noisy", "great", "location", "host", "friendly",
+          "small", "room", "view", "beach", "dirty", "wifi", "kitchen",
+          "parking"]
+WORDS = COMMON + ["word{}".format(number) for number in range(5000)]
+SEARCHES = ["quiet beach wifi", "friendly host", "word42", "dirty kitchen"]
+
+
+def timed(function, repeat=1):
+    """Return the result and average duration of function() in ms."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat * 1e3
+
+
+def storage_of(path, lazy=False):
+    """Return an empty storage using the file at path."""
+    storage = FileStorage(lazy=lazy)
+    storage._FileStorage__file_path = path
+    storage._FileStorage__objects = {}
+    storage.count(Review)  # Index the new dictionary while it is empty
+    return storage
+
+
+def scan(storage, text):
+    """Find the reviews holding any of the words by checking each one."""
+    words = text.split()
+    return [obj for obj in storage.all(Review).values()
+            if any(word in obj.text for word in words)]
+
+
+def main():
+    """Time the searches and the reloads on the same reviews."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+    now = "2024-01-01T00:00:00.000001"
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, "file.json")
+    storage = storage_of(path)
+    start = time.perf_counter()
+    for _ in range(count):
+        storage.new(Review(id=str(uuid.uuid4()), created_at=now,
+                           updated_at=now, text=" ".join(
+                               random.choice(WORDS) for _ in range(30))))
+    print("{} reviews, stored in {:.1f} s".format(
+        count, time.perf_counter() - start))
+    _, duration = timed(storage.save)
+    print("  save                       {:8.0f} ms".format(duration))
+    storage.search("")  # Build the index
+    storage.new(Review(id=str(uuid.uuid4()), created_at=now, updated_at=now,
+                       text="one more review"))
+    _, duration = timed(storage.save)
+    print("  save with the index        {:8.0f} ms".format(duration))
+    for lazy in (False, True):
+        reloaded = storage_of(path, lazy)
+        _, duration = timed(reloaded.reload)
+        _, indexed = timed(lambda: reloaded.search("quiet"))
+        os.rename(path + ".search", path + ".old")  # Hide the index
+        reloaded = storage_of(path, lazy)
+        reloaded.reload()
+        _, rebuilt = timed(lambda: reloaded.search("quiet"))
+        os.rename(path + ".old", path + ".search")
+        print("  lazy={:<5} reload {:6.0f} ms  first search saved index"
+              " {:6.0f} ms  rebuilt {:6.0f} ms".format(
+                  str(lazy), duration, indexed, rebuilt))
+    for text in SEARCHES:
+        found, indexed = timed(lambda: storage.search(text, limit=10), 10)
+        expected, scanned = timed(lambda: scan(storage, text))
+        assert {obj for obj, _ in found} <= set(expected)
+        print("  search {:18} index {:8.3f} ms  scan {:8.1f} ms".format(
+            repr(text), indexed, scanned))
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
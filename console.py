@@ -1,6 +1,9 @@
 #!/usr/bin/python3
 """Console, the command interpreter for managing AirBnB objects."""
+import ast
 import cmd
+import itertools
+import json
 from models.base_model import BaseModel
 from models import storage
 from models.user import User
@@ -10,6 +13,8 @@ from models.place import Place
 from models.city import City
 from models.review import Review
 import re
+import shlex
+import sys
 
 
 class HBNBCommand(cmd.Cmd):
@@ -19,18 +24,9 @@ class HBNBCommand(cmd.Cmd):
         """Initialize variables and start the shell."""
         super().__init__(*args, **kwargs)
         self.prompt = "(hbnb) "
-        self.class_names = [
-            "BaseModel",
-            "User",
-            "State",
-            "City",
-            "Amenity",
-            "Place",
-            "Review",
-        ]
+        # storage is already loaded when the models package is imported
+        # every model class registers itself in storage.class_dict()
         self.classes = storage.class_dict()
-        self.objects = storage.all()
-        storage.reload()
 
     def default(self, line):
         """Handle unrecognized commands."""
@@ -42,13 +38,13 @@ class HBNBCommand(cmd.Cmd):
         command_args = args[1].split(')')[0]
         command_name = args[0].strip()
 
-        if not command_args:
+        if not command_args and not command_name.endswith('.where'):
             print("** invalid command **")
             return
 
         class_name, action = command_name.split('.')
 
-        if class_name not in self.class_names:
+        if class_name not in self.classes:
             print("** class doesn't exist **")
             return
 
@@ -64,18 +60,79 @@ class HBNBCommand(cmd.Cmd):
             self.do_destroy(f"{class_name} {instance_id}")
 
         # update BaseModel 1234-1234-1234 {"name": "John"}
+        # update BaseModel 1234-1234-1234 "name" "John"
         elif action == 'update':
             command_args = command_args.split(',', 1)
             if len(command_args) != 2:
                 print("** invalid command **")
                 return
             instance_id = command_args[0].strip().strip('"')
-            update_dict = eval(command_args[1].strip())
-            self.do_update(f"{class_name} {instance_id}", update_dict)
+            update_dict = self.parse_dict(command_args[1])
+            if update_dict is not None:  # dictionary of updates
+                self.do_update(f"{class_name} {instance_id} {update_dict!r}")
+                return
+            try:  # attribute name and value as Python literals
+                values = ast.literal_eval("({},)".format(command_args[1]))
+            except (ValueError, SyntaxError):  # unquoted values
+                values = [value.strip().strip('"')
+                          for value in command_args[1].split(',')]
+            self.do_update("{} {} {}".format(
+                class_name, instance_id,
+                " ".join(shlex.quote(str(value)) for value in values)))
+
+        # all(limit=10, offset=20, json=True)
+        elif action == 'all':
+            options = self.parse_kwargs(command_args)
+            if options is None or \
+                    not set(options) <= {"limit", "offset", "json"}:
+                print("** invalid command **")
+                return
+            line = class_name  # the same command with options
+            for name, value in options.items():
+                if name != "json":  # options taking a number
+                    line += " --{} {}".format(name, value)
+                elif value:  # write one JSON object per line
+                    line += " --json"
+            self.do_all(line)
+
+        # nearby(37.77, -122.42, 5, 10) or bbox(37.7, -122.5, 37.8, -122.3)
+        elif action in ('nearby', 'bbox'):
+            numbers = command_args.replace(',', ' ')
+            getattr(self, 'do_' + action)(f"{class_name} {numbers}")
+
+        # search("quiet beach") or search("quiet beach", limit=5)
+        elif action == 'search':
+            words, _, options = command_args.partition(',')
+            options = self.parse_kwargs(options)
+            if options is None or not set(options) <= {"limit"}:
+                print("** invalid command **")
+                return
+            line = "{} {}".format(class_name, words.strip().strip('"'))
+            if "limit" in options:  # the number of results to print
+                line += " --limit {}".format(options["limit"])
+            self.do_search(line)
+
+        # where(price_by_night__lt=100, order_by="name", limit=10)
+        elif action == 'where':
+            query = self.parse_kwargs(command_args)
+            if query is None:  # not keyword arguments
+                print("** invalid command **")
+                return
+            self.print_query(class_name, query)
 
         else:
             print("** invalid command **")
 
+    def print_query(self, class_name, query):
+        """Print the results of storage.query(), one per line."""
+        try:  # the query is checked before anything is read
+            results = storage.query(class_name, **query)
+        except (ValueError, TypeError) as error:  # invalid query
+            print("** {} **".format(error))
+            return
+        for result in results:  # print each result as it is found
+            print(result)
+
     def emptyline(self):
         """Do nothing on empty input line."""
         pass
@@ -88,6 +145,27 @@ class HBNBCommand(cmd.Cmd):
         """Exit the program."""
         return True
 
+    def do_begin(self, line):
+        """Start a transaction: changes are saved together on commit."""
+        try:
+            storage.begin()
+        except RuntimeError as error:  # if the storage is read-only
+            print("** {} **".format(str(error).lower()))
+
+    def do_commit(self, line):
+        """Save the changes made since begin in a single write."""
+        try:
+            storage.commit()
+        except RuntimeError as error:  # no transaction or read-only
+            print("** {} **".format(str(error).lower()))
+
+    def do_rollback(self, line):
+        """Cancel the changes made since begin."""
+        try:
+            storage.rollback()
+        except RuntimeError as error:  # no transaction or read-only
+            print("** {} **".format(str(error).lower()))
+
     def do_create(self, line):
         """Create a new instance of a class."""
         args = line.split()  # split the line into a list of arguments
@@ -99,9 +177,12 @@ class HBNBCommand(cmd.Cmd):
         if class_name not in self.classes:
             print("** class doesn't exist **")
             return
-        # create a new instance of the class
-        new_instance = self.classes[class_name]()
-        new_instance.save()  # save the new instance
+        try:  # create a new instance of the class and save it
+            new_instance = self.classes[class_name]()
+            new_instance.save()
+        except RuntimeError as error:  # if the storage is read-only
+            print("** {} **".format(str(error).lower()))
+            return
         print(new_instance.id)  # print the id of the new instance
 
     def do_show(self, line):
@@ -118,9 +199,8 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         else:  # if there are two arguments
-            key = "{}.{}".format(args[0], args[1])  # create a key
-            if key in storage.all():  # if the key is in the storage
-                obj = storage.all()[key]  # get the object from the storage
+            obj = storage.get(args[0], args[1])  # look the object up
+            if obj is not None:  # if the object is in the storage
                 print(obj)  # print the object
             else:  # if the key is not in the storage
                 print("** no instance found **")
@@ -139,12 +219,13 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         else:  # if there are two arguments
-            key = "{}.{}".format(args[0], args[1])  # create a key
-            if key in self.objects.keys():  # if the key is in the objects
-                del self.objects[key]  # delete the object
-                # update the objects
-                storage._FileStorage__objects = self.objects
-                storage.save()  # save the storage
+            obj = storage.get(args[0], args[1])  # look the object up
+            if obj is not None:  # if the object is in the storage
+                try:  # delete the object and save the storage
+                    storage.delete(obj)
+                    storage.save()
+                except RuntimeError as error:  # if the storage is read-only
+                    print("** {} **".format(str(error).lower()))
             else:  # if the key is not in the objects
                 print("** no instance found **")
 
@@ -154,17 +235,99 @@ class HBNBCommand(cmd.Cmd):
         if len(args) == 1:  # if there is only one argument
             class_name = args[0]  # the first argument is the class name
             # if the class name is in the list of classes
-            if class_name in self.class_names:
-                # count the number of instances
-                count = sum(
-                    1 for obj in storage.all().values()
-                    if isinstance(obj, eval(class_name)))
-                print(count)
+            if class_name in self.classes:
+                # the storage keeps the number of instances of each class
+                print(storage.count(class_name))
             else:  # if the class name is not in the list of classes
                 print("** class doesn't exist **")
         else:  # if there is not one argument
             print("** invalid command **")
 
+    def do_nearby(self, line):
+        """Print the places within a distance of a point, nearest first.
+        Usage: nearby [class name] <latitude> <longitude> <radius km> [limit]
+        """
+        args = self.parse_coordinates(line, 3, 4)
+        if args is None:  # the error was printed
+            return
+        class_name, numbers = args
+        limit = int(numbers[3]) if len(numbers) == 4 else None
+        try:  # use the spatial index of the storage
+            found = storage.nearby(*numbers[:3], limit=limit, cls=class_name)
+        except ValueError as error:  # the class has no coordinates
+            print("** {} **".format(error))
+            return
+        for obj, distance in found:  # one line per place, nearest first
+            print("{:.3f} km {}".format(distance, obj))
+
+    def do_bbox(self, line):
+        """Print the places inside a bounding box.
+        Usage: bbox [class name] <south> <west> <north> <east>
+        """
+        args = self.parse_coordinates(line, 4, 4)
+        if args is None:  # the error was printed
+            return
+        class_name, numbers = args
+        try:  # use the spatial index of the storage
+            found = storage.bbox(*numbers, cls=class_name)
+        except ValueError as error:  # the class has no coordinates
+            print("** {} **".format(error))
+            return
+        for obj in found.values():  # one line per place
+            print(obj)
+
+    def do_search(self, line):
+        """Print the objects best matching words, best first, with their
+        score. Review texts and place names and descriptions are searched.
+        Usage: search [class name] <words> [--limit N]
+        """
+        args = line.split()  # split the line into a list of arguments
+        class_name = None  # every class with texts unless one is given
+        if args and args[0] in self.classes:  # a class name is given
+            class_name = args.pop(0)
+        limit = 10  # number of results printed by default
+        if "--limit" in args:  # read and remove the option
+            position = args.index("--limit")
+            try:
+                limit = int(args[position + 1])
+            except (IndexError, ValueError):  # missing or not a number
+                limit = -1
+            if limit < 0:  # missing or negative
+                print("** invalid limit **")
+                return
+            del args[position:position + 2]
+        if not args:  # if there are no words
+            print("** words missing **")
+            return
+        # use the text index of the storage
+        found = storage.search(" ".join(args), cls=class_name, limit=limit)
+        for obj, score in found:  # one line per object, best first
+            print("{:.3f} {}".format(score, obj))
+
+    def parse_coordinates(self, line, least, most):
+        """Return the class name and the numbers of a nearby or bbox
+        command, or None after printing what is wrong."""
+        args = line.split()  # split the line into a list of arguments
+        class_name = "Place"  # the class with coordinates by default
+        if args and args[0] in self.classes:  # a class name is given
+            class_name = args.pop(0)
+        elif args and args[0].isidentifier():  # not a number
+            print("** class doesn't exist **")
+            return None
+        if len(args) < least:  # if a coordinate is missing
+            print("** coordinates missing **")
+            return None
+        try:  # the coordinates, the radius and the limit
+            numbers = [float(arg) for arg in args[:most]]
+        except ValueError:  # not numbers
+            print("** invalid coordinates **")
+            return None
+        if len(args) > most or len(numbers) > least and \
+                (numbers[-1] < 0 or not numbers[-1].is_integer()):
+            print("** invalid coordinates **")  # extra or invalid limit
+            return None
+        return class_name, numbers
+
     def parseline(self, line):
         """Parse the line to handle <class name>.all()
         and <class name>.count()."""
@@ -184,32 +347,62 @@ class HBNBCommand(cmd.Cmd):
         return cmd.Cmd.parseline(self, original_line)
 
     def do_all(self, line):
-        """Print all string representations of all instances."""
+        """Print all string representations of all instances.
+        Usage: all [class name] [--json] [--limit N] [--offset N]
+        The instances are written as they are read, so the first ones
+        appear at once and memory does not grow with their number.
+        --json writes one JSON object per line instead of a list."""
         args = line.split()  # split the line into a list of arguments
-        all_instances = []  # initialize a list of all instances
+        options = {"--json": False, "--limit": None, "--offset": 0}
+        class_name = None  # every class unless one is given
+        while args:  # read the class name and the options
+            arg = args.pop(0)
+            if arg == "--json":  # write one JSON object per line
+                options[arg] = True
+            elif arg in ("--limit", "--offset"):  # page of the results
+                try:
+                    options[arg] = int(args.pop(0))
+                except (IndexError, ValueError):  # missing or not a number
+                    print("** invalid {} **".format(arg[2:]))
+                    return
+                if options[arg] < 0:  # negative page
+                    print("** invalid {} **".format(arg[2:]))
+                    return
+            elif class_name is None and arg in self.classes:
+                class_name = arg  # get the class name
+            else:  # if the class name is not in the classes
+                print("** class doesn't exist **")
+                return
+        limit, offset = options["--limit"], options["--offset"]
+        if class_name is None:  # iterate through the objects
+            stop = None if limit is None else offset + limit
+            objects = itertools.islice(storage.all().values(), offset, stop)
+        else:  # iterate through the objects of the class only, read
+            # one at a time instead of copied into a dictionary
+            objects = storage.query(class_name, limit=limit, offset=offset)
+        self.write_objects(objects, options["--json"])
 
-        if not args:  # if there are no arguments
-            # iterate through the objects
-            for obj_key, obj in storage.all().items():
-                # append the object to the list
-                all_instances.append(str(obj))
-            # if the class name is not in the classes
-        elif args[0] not in self.classes:
-            print("** class doesn't exist **")
-            return
-        else:
-            class_name = args[0]  # get the class name
-            # iterate through the objects
-            for obj_key, obj in storage.all().items():
-                # if the class name matches
-                if obj_key.split(".")[0] == class_name:
-                    all_instances.append(str(obj))  # append the object
-        print(all_instances)
+    @staticmethod
+    def write_objects(objects, json_lines=False):
+        """Write objects to stdout one at a time, as the list of their
+        string representations or as one JSON object per line."""
+        out = sys.stdout  # looked up once, tests replace it
+        if not json_lines:
+            out.write("[")  # same output as printing a list of strings
+        for number, obj in enumerate(objects):
+            if json_lines:  # one JSON document per line
+                out.write(json.dumps(obj.to_dict()) + "\n")
+            else:  # the repr of each string, separated like a list
+                out.write((", " if number else "") + repr(str(obj)))
+            if not number:  # show the first result without waiting
+                out.flush()
+        if not json_lines:
+            out.write("]\n")
 
     def do_update(self, line):
         """Update an instance based on the class name and id."""
-        args = line.split()  # split the line into a list of arguments
-        obj_dict = storage.all()  # get the objects from the storage
+        # split into class name, id and the rest of the line
+        args = line.split(maxsplit=2)
 
         if len(args) == 0:  # if there are no arguments
             print("** class name missing **")
@@ -221,43 +414,67 @@ class HBNBCommand(cmd.Cmd):
         if len(args) == 1:  # if there is only one argument
             print("** instance id missing **")
             return False
-        # if the key is not in the objects
-        if "{}.{}".format(args[0], args[1]) not in obj_dict.keys():
+        obj = storage.get(args[0], args[1])  # look the object up
+        if obj is None:  # if the object is not in the storage
             print("** no instance found **")
             return False
         if len(args) == 2:  # if there are only two arguments
             print("** attribute name missing **")
             return False
-        if len(args) == 3:  # if there are only three arguments
-            try:  # try to evaluate the argument
-                # check if the argument is not a dictionary
-                type(eval(args[2])) != dict
-            except NameError:  # if the argument is a dictionary
+
+        updates = self.parse_dict(args[2])  # a dictionary of updates
+        if updates is None:  # if the argument is not a dictionary
+            try:  # split the attribute name and value, honoring quotes
+                attribute = shlex.split(args[2])
+            except ValueError:  # unbalanced quotes
+                attribute = args[2].split()
+            if len(attribute) < 2:  # if there is no value
                 print("** value missing **")
                 return False
+            updates = {attribute[0]: attribute[1]}
+
+        # the declared types of the attributes of the class
+        types = storage.attribute_dict().get(args[0], {})
+        for key, value in updates.items():  # iterate through the updates
+            if types.get(key) in {str, int, float}:  # if the key is typed
+                try:  # convert the value to the type of the attribute
+                    value = types[key](value)
+                except ValueError:  # keep values that cannot be converted
+                    pass
+            try:  # update the object
+                setattr(obj, key, value)
+            except AttributeError:  # a relationship, such as State.cities
+                print("** {} is read-only **".format(key))
+        try:  # save the storage
+            storage.save()
+        except RuntimeError as error:  # if the storage is read-only
+            print("** {} **".format(str(error).lower()))
+
+    @staticmethod
+    def parse_dict(text):
+        """Return the dictionary written in text, or None if it is not."""
+        try:  # parse Python literals only, nothing is executed
+            value = ast.literal_eval(text.strip())
+        except (ValueError, SyntaxError):  # not a literal
+            return None
+        return value if isinstance(value, dict) else None
 
-        if len(args) == 4:  # if there are only four arguments
-            obj = obj_dict["{}.{}".format(args[0], args[1])]  # get the object
-            # if the key is in the class
-            if args[2] in obj.__class__.__dict__.keys():
-                # get the type
-                val_type = type(obj.__class__.__dict__[args[2]])
-                obj.__dict__[args[2]] = val_type(args[3])  # update the object
-            else:  # if the key is not in the class
-                obj.__dict__[args[2]] = args[3]  # update the object
-        elif type(eval(args[2])) == dict:  # if the argument is a dictionary
-            obj = obj_dict["{}.{}".format(args[0], args[1])]  # get the object
-            # iterate through the dictionary
-            for key, value in eval(args[2]).items():
-                if key in obj.__class__.__dict__.keys() and type(
-                    obj.__class__.__dict__[key]
-                ) in {str, int, float}:  # if the key is in the class
-                    # get the type
-                    val_type = type(obj.__class__.__dict__[key])
-                    obj.__dict__[key] = val_type(value)  # update the object
-                else:  # if the key is not in the class
-                    obj.__dict__[key] = value  # update the object
-        storage.save()  # save the storage
+    @staticmethod
+    def parse_kwargs(text):
+        """Return the keyword arguments written in text, or None."""
+        try:  # parse the text as the arguments of a call
+            call = ast.parse("f({})".format(text), mode="eval").body
+        except SyntaxError:  # not arguments
+            return None
+        # positional arguments and **mappings are not accepted
+        if not isinstance(call, ast.Call) or call.args or \
+                any(keyword.arg is None for keyword in call.keywords):
+            return None
+        try:  # parse Python literals only, nothing is executed
+            return {keyword.arg: ast.literal_eval(keyword.value)
+                    for keyword in call.keywords}
+        except ValueError:  # not a literal
+            return None
 
 
 if __name__ == "__main__":
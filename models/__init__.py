@@ -1,11 +1,46 @@
 #!/usr/bin/python3
 """Create a unique FileStorage instance for the application."""
 
+from os import getenv
 from models.engine.file_storage import FileStorage
 
 
-# Create a unique FileStorage instance for the application
-storage = FileStorage()
+if getenv("HBNB_COMPACT_MODELS") == "1":
+    # Load and create objects as __slots__ based compact instances
+    from models.compact import use_compact_models
+    use_compact_models()
+
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    # Store the objects in a SQLite database instead of a JSON file
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(getenv("HBNB_DB_PATH"))
+elif getenv("HBNB_TYPE_STORAGE") == "mmap":
+    # Serve the objects of file.json read-only, decoding them on access
+    from models.engine.mmap_storage import MmapStorage
+    storage = MmapStorage()
+else:
+    # Create a unique FileStorage instance for the application
+    # HBNB_STORAGE_JOURNAL=1 appends changes to a log instead of
+    # rewriting the whole JSON file on every save, HBNB_STORAGE_LAZY=1
+    # only instantiates the saved objects when they are accessed and
+    # HBNB_STORAGE_STREAMING=1 reads and writes the file entry by entry,
+    # HBNB_STORAGE_FLUSH_INTERVAL=<seconds> writes saves in the background
+    # HBNB_STORAGE_FORMAT=columnar saves a compact binary snapshot and
+    # HBNB_STORAGE_SHARDED=1 keeps each class in a file of its own, split
+    # by id into HBNB_STORAGE_PARTITIONS=<n> files if set, and
+    # HBNB_STORAGE_THREAD_SAFE=1 allows using it from several threads
+    serializer = None
+    if getenv("HBNB_STORAGE_FORMAT") == "columnar":
+        from models.engine import columnar as serializer
+    storage = FileStorage(
+        journal=getenv("HBNB_STORAGE_JOURNAL") == "1",
+        lazy=getenv("HBNB_STORAGE_LAZY") == "1",
+        streaming=getenv("HBNB_STORAGE_STREAMING") == "1",
+        flush_interval=float(getenv("HBNB_STORAGE_FLUSH_INTERVAL", "0")),
+        serializer=serializer,
+        sharded=getenv("HBNB_STORAGE_SHARDED") == "1",
+        partitions=int(getenv("HBNB_STORAGE_PARTITIONS", "1")),
+        thread_safe=getenv("HBNB_STORAGE_THREAD_SAFE") == "1")
 
 # Reload any saved data from the JSON file into the storage instance
 storage.reload()
@@ -5,6 +5,63 @@ import uuid  # Import uuid to generate unique IDs for instances
 from datetime import datetime  # Import datetime for timestamp attributes
 import models  # Import models to access storage functions
 
+# Formats accepted for timestamps that datetime.fromisoformat rejects
+LEGACY_FORMATS = ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S")
+
+
+def parse_datetime(value):
+    """
+    Convert an ISO 8601 timestamp string to a datetime object.
+    Args:
+        value (str): The timestamp, as written by datetime.isoformat().
+    Returns:
+        datetime: The parsed timestamp.
+    Raises:
+        ValueError: If the string is not a supported timestamp.
+    """
+    try:
+        # fromisoformat is implemented in C and much faster than strptime
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for legacy_format in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(value, legacy_format)
+        except ValueError:
+            continue
+    raise ValueError("Invalid timestamp: {!r}".format(value))
+
+
+class Timestamp:
+    """
+    Datetime attribute that may hold its ISO string until first read.
+    Objects loaded from storage keep the string they were saved with,
+    so timestamps that are never read are never parsed, and to_dict()
+    reuses the string instead of formatting the datetime again.
+    """
+
+    def __set_name__(self, owner, name):
+        """Remember the name of the attribute."""
+        self.name = name  # Key of the value in the instance __dict__
+
+    def __get__(self, obj, owner=None):
+        """Return the timestamp, parsing its string on first access."""
+        if obj is None:  # Accessed on the class
+            return self
+        try:
+            value = obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+        if type(value) is str:
+            # Parse once and keep the datetime for the next reads
+            value = parse_datetime(value)
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        """Store a datetime or an ISO string."""
+        obj.__dict__[self.name] = value
+
 
 class BaseModel:
     """
@@ -19,6 +76,16 @@ class BaseModel:
         The datetime when the instance was last updated.
     """
 
+    # Every model class by name, filled in as the classes are defined
+    registry = {}
+    created_at = Timestamp()  # Parsed on first access
+    updated_at = Timestamp()  # Parsed on first access
+
+    def __init_subclass__(cls, **kwargs):
+        """Register a new model class under its name."""
+        super().__init_subclass__(**kwargs)
+        BaseModel.registry[cls.__name__] = cls
+
     def __init__(self, *args, **kwargs):
         """
         Initialize attributes for the BaseModel instance.
@@ -29,13 +96,12 @@ class BaseModel:
         if kwargs:
             # If kwargs is provided, set attributes from it
             for key, value in kwargs.items():
-                if key in ("created_at", "updated_at"):
-                    # Convert string datetime to datetime object
-                    setattr(self, key,
-                            datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f"))
-                elif key != "__class__":
+                # Attributes are written to __dict__ directly so that
+                # loading an instance does not mark it as changed;
+                # created_at and updated_at are parsed on first access
+                if key != "__class__":
                     # Set other attributes
-                    setattr(self, key, value)
+                    self.__dict__[key] = value
         else:
             # If kwargs is not provided, set default attributes
             self.id = str(uuid.uuid4())  # Generate unique ID
@@ -44,8 +110,17 @@ class BaseModel:
             self.updated_at = current_time  # Set updated_at attribute
             models.storage.new(self)  # Register the instance in storage
 
+    def __setattr__(self, name, value):
+        """Set an attribute and mark the instance as changed in storage."""
+        super().__setattr__(name, value)  # Set the attribute
+        # Tell storage to re-serialize and re-index the instance
+        models.storage.mark_dirty(self, name)
+
     def __str__(self):
         """Return string representation of the model object."""
+        # Parse the timestamps so they are shown as datetime objects
+        getattr(self, "created_at", None)
+        getattr(self, "updated_at", None)
         return "[{}] ({}) {}".format(self.__class__.__name__,
                                      self.id, self.__dict__)
 
@@ -66,8 +141,13 @@ class BaseModel:
         instance_dict = self.__dict__.copy()
         # Add class name to the dictionary
         instance_dict["__class__"] = self.__class__.__name__
-        # Convert updated_at to ISO format
-        instance_dict["updated_at"] = self.updated_at.isoformat()
-        # Convert created_at to ISO format
-        instance_dict["created_at"] = self.created_at.isoformat()
+        for key in ("updated_at", "created_at"):
+            # Convert the timestamp to ISO format, timestamps that were
+            # never read still hold the string they were loaded from
+            if isinstance(instance_dict.get(key), datetime):
+                instance_dict[key] = instance_dict[key].isoformat()
         return instance_dict
+
+
+# Register the base class itself, subclasses register when defined
+BaseModel.registry["BaseModel"] = BaseModel
@@ -0,0 +1,157 @@
+#!/usr/bin/python3
+"""
+Defines compact, __slots__ based versions of the model classes.
+
+A compact class stores the attributes listed for its model in
+FileStorage.attribute_dict() in slots instead of a per-instance
+dictionary, which takes about a third of the memory. Attributes that
+are not listed (such as the ones the console update command can add)
+go to an overflow dictionary that is only created when needed.
+
+Compact classes are opt-in: use_compact_models() replaces the models
+in BaseModel.registry, so the storage engines and the console create
+compact instances, while the classes imported from models.<name> are
+left unchanged.
+"""
+
+import uuid  # Import uuid to generate unique IDs for instances
+from datetime import datetime  # Import datetime for timestamp attributes
+import models  # Import models to access storage functions
+from models.base_model import BaseModel, parse_datetime
+
+
+class CompactModel:
+    """
+    Base class of the compact models, with the behavior of BaseModel.
+
+    Attributes:
+        id (str): A unique identifier for each instance.
+        created_at (datetime): When the instance was created.
+        updated_at (datetime): When the instance was last updated.
+    """
+
+    __slots__ = ("id", "created_at", "updated_at", "_extra", "__weakref__")
+    _fields = frozenset(("id", "created_at", "updated_at"))  # Slot names
+    _defaults = {}  # Class defaults of the model, by attribute name
+    model = BaseModel  # The model class this class is a compact form of
+
+    # The representation and persistence methods are shared with BaseModel,
+    # they only rely on __dict__, attribute access and __setattr__
+    __str__ = BaseModel.__str__
+    save = BaseModel.save
+    to_dict = BaseModel.to_dict
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize attributes for the instance, like BaseModel.
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+        """
+        object.__setattr__(self, "_extra", None)  # No overflow yet
+        if kwargs:
+            # If kwargs is provided, set attributes from it without
+            # marking the instance as changed
+            for key, value in kwargs.items():
+                if key in ("created_at", "updated_at") and \
+                        isinstance(value, str):
+                    value = parse_datetime(value)
+                if key != "__class__":
+                    self.__store(key, value)
+        else:
+            # If kwargs is not provided, set default attributes
+            self.id = str(uuid.uuid4())  # Generate unique ID
+            current_time = datetime.now()  # Get the current datetime
+            self.created_at = current_time  # Set created_at attribute
+            self.updated_at = current_time  # Set updated_at attribute
+            models.storage.new(self)  # Register the instance in storage
+
+    def __store(self, name, value):
+        """Store an attribute in its slot or in the overflow dictionary."""
+        if name in self._fields:
+            object.__setattr__(self, name, value)
+        else:
+            if self._extra is None:
+                object.__setattr__(self, "_extra", {})
+            self._extra[name] = value
+
+    def __setattr__(self, name, value):
+        """Set an attribute and mark the instance as changed in storage."""
+        self.__store(name, value)
+        models.storage.mark_dirty(self, name)
+
+    def __getattr__(self, name):
+        """Return unset attributes from the overflow or the class defaults."""
+        if name == "_extra":  # Not initialized yet
+            raise AttributeError(name)
+        if self._extra is not None and name in self._extra:
+            return self._extra[name]
+        if name in self._defaults:
+            return self._defaults[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self.__class__.__name__, name))
+
+    def __delattr__(self, name):
+        """Delete an attribute from its slot or the overflow dictionary."""
+        if name in self._fields:
+            object.__delattr__(self, name)
+        elif self._extra is not None and name in self._extra:
+            del self._extra[name]
+        else:
+            raise AttributeError(name)
+
+    @property
+    def __dict__(self):
+        """Return a new dictionary of the attributes set on the instance."""
+        attributes = {}
+        for name in self.__slots_order:
+            try:
+                attributes[name] = object.__getattribute__(self, name)
+            except AttributeError:  # Unset slot, the default applies
+                continue
+        if self._extra:
+            attributes.update(self._extra)
+        return attributes
+
+    __slots_order = ("id", "created_at", "updated_at")  # __dict__ order
+
+
+def compact_class(cls):
+    """
+    Create the compact class of a model class.
+    Args:
+        cls (type): A BaseModel subclass listed in attribute_dict().
+    Returns:
+        type: A CompactModel subclass with the same name as cls.
+    """
+    from models.engine.file_storage import FileStorage
+    attributes = FileStorage().attribute_dict()
+    fields = tuple(name for name in attributes.get(cls.__name__, {})
+                   if name not in CompactModel._fields)
+    # Keep the class defaults, such as Place.name = ""
+    defaults = {name: getattr(cls, name) for name in fields
+                if hasattr(cls, name)}
+    namespace = {
+        "__slots__": fields,
+        "__doc__": cls.__doc__,
+        "__module__": cls.__module__,
+        "_fields": CompactModel._fields | frozenset(fields),
+        "_defaults": defaults,
+        "model": cls,
+        "_CompactModel__slots_order":
+            CompactModel._CompactModel__slots_order + fields,
+    }
+    # Keep the relationship properties, such as State.cities
+    namespace.update({name: value for name, value in vars(cls).items()
+                      if isinstance(value, property)})
+    return type(cls.__name__, (CompactModel,), namespace)
+
+
+def use_compact_models():
+    """
+    Replace the model classes in BaseModel.registry by compact classes,
+    so that storage and the console create compact instances.
+    """
+    for name, cls in list(BaseModel.registry.items()):
+        if isinstance(cls, type) and issubclass(cls, BaseModel):
+            BaseModel.registry[name] = compact_class(cls)
@@ -0,0 +1,405 @@
+#!/usr/bin/python3
+"""Defines the Columns class, NumPy columns of the objects of a class."""
+
+from contextlib import nullcontext  # Import for reads that need no lock
+from models.engine.query import OPERATORS  # Import the comparisons
+try:
+    import numpy  # Import numpy for the vectorized computations
+except ImportError:  # Analytics are not available without NumPy
+    numpy = None
+
+# Aggregations of aggregate() -> function of the non-empty values
+AGGREGATIONS = ("count", "sum", "mean", "min", "max")
+# Operators of the conditions on numeric and on grouping columns
+NUMERIC_OPERATORS = ("eq", "ne", "lt", "le", "gt", "ge", "in")
+GROUP_OPERATORS = ("eq", "ne", "in")
+NUMBER_TYPES = (int, float)  # Types of numeric values, bool excluded
+
+
+def number(value):
+    """Returns a numeric value as a float, NaN if it is not a number."""
+    return float(value) if type(value) in NUMBER_TYPES else float("nan")
+
+
+class Columns:
+    """
+    Column arrays of the attributes of the objects of one class, for
+    statistics computed by NumPy instead of Python loops.
+
+    Numeric attributes are kept as float64 arrays, NaN where the value
+    is missing or not a number. Grouping attributes (such as city_id)
+    are kept as integer codes, each distinct value getting its own.
+    Every object has one row; a deleted object is replaced by the last
+    row, so the arrays stay dense and every change is O(1).
+
+    Conditions are written like those of a query: an attribute name
+    followed by __eq (the default), __ne, __lt, __le, __gt, __ge or
+    __in; grouping attributes only accept equality conditions.
+    """
+
+    def __init__(self, numeric, groups=(), lock=None, capacity=1024):
+        """
+        Initialize empty columns.
+        Args:
+            numeric (iterable): The names of the numeric attributes.
+            groups (iterable): The names of the grouping attributes.
+            lock (RWLock): If given, its reader lock is held while the
+            columns are read, for storages shared between threads.
+            capacity (int): Number of rows allocated at first.
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for the analytics")
+        self.numeric = tuple(numeric)  # Names of the numeric columns
+        self.groups = tuple(groups)  # Names of the grouping columns
+        self.__lock = lock  # Held for reading, None if not shared
+        self.__capacity = max(capacity, 1)  # Rows allocated
+        self.__keys = []  # Object key of each row
+        self.__rows = {}  # Object key -> row
+        self.__data = {}  # Attribute -> array of its values or codes
+        for field in self.numeric:
+            self.__data[field] = numpy.full(self.__capacity, numpy.nan)
+        self.__codes = {}  # Grouping attribute -> {value: code}
+        self.__values = {}  # Grouping attribute -> value of each code
+        for field in self.groups:
+            self.__data[field] = numpy.full(self.__capacity, -1,
+                                            dtype=numpy.int64)
+            self.__codes[field] = {}
+            self.__values[field] = []
+
+    def __len__(self):
+        """Returns the number of rows."""
+        return len(self.__keys)
+
+    def __reading(self):
+        """Returns the reader lock if the columns are shared, else none."""
+        return self.__lock.read() if self.__lock is not None else nullcontext()
+
+    def __encode(self, field, value):
+        """Returns the cell of a value in a column."""
+        if field in self.__codes:
+            codes = self.__codes[field]
+            try:
+                code = codes.get(value)
+            except TypeError:  # Unhashable values have no group
+                return -1
+            if code is None:
+                if value is None:  # Missing values have no group
+                    return -1
+                code = codes[value] = len(self.__values[field])
+                self.__values[field].append(value)
+            return code
+        return number(value)  # NaN if missing or not a number
+
+    def add(self, key, record, value):
+        """
+        Adds or updates the row of an object.
+        Args:
+            key (str): The key of the object.
+            record: The object, or its raw record in a lazy storage.
+            value (callable): Called as value(record, attribute) to read
+            an attribute.
+        """
+        row = self.__rows.get(key)
+        if row is None:
+            row = len(self.__keys)
+            if row == self.__capacity:
+                self.__grow()
+            self.__keys.append(key)
+            self.__rows[key] = row
+        for field, column in self.__data.items():
+            column[row] = self.__encode(field, value(record, field))
+
+    def extend(self, records, value):
+        """
+        Adds the rows of many objects at once, faster than add().
+        Args:
+            records (iterable): The (key, record) pairs of objects that
+            have no row yet.
+            value (callable): Called as value(record, attribute) to read
+            an attribute.
+        """
+        records = list(records)
+        start = len(self.__keys)
+        while start + len(records) > self.__capacity:
+            self.__grow()
+        for field, column in self.__data.items():
+            values = [value(record, field) for _, record in records]
+            if field not in self.__codes:  # Numbers straight to floats
+                values = numpy.fromiter(map(number, values), numpy.float64,
+                                        len(values))
+            else:
+                values = [self.__encode(field, item) for item in values]
+            # One assignment per column instead of one per cell
+            column[start:start + len(records)] = values
+        for row, (key, _) in enumerate(records, start):
+            self.__keys.append(key)
+            self.__rows[key] = row
+
+    def set(self, key, field, value):
+        """Changes one attribute of the row of an object, if it has one."""
+        row = self.__rows.get(key)
+        if row is not None and field in self.__data:
+            self.__data[field][row] = self.__encode(field, value)
+
+    def __grow(self):
+        """Doubles the number of allocated rows."""
+        self.__capacity *= 2
+        for field, column in self.__data.items():
+            grown = numpy.empty(self.__capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            self.__data[field] = grown
+
+    def remove(self, key):
+        """Removes the row of an object, moving the last row in its place."""
+        row = self.__rows.pop(key, None)
+        if row is None:  # Key has no row
+            return
+        last = len(self.__keys) - 1
+        if row != last:
+            moved = self.__keys[last]
+            self.__keys[row] = moved
+            self.__rows[moved] = row
+            for column in self.__data.values():
+                column[row] = column[last]
+        self.__keys.pop()
+
+    def clear(self):
+        """Removes every row."""
+        self.__keys.clear()
+        self.__rows.clear()
+
+    def column(self, field):
+        """
+        Returns a copy of a column.
+        Args:
+            field (str): The name of the attribute.
+        Returns:
+            numpy.ndarray: The values of the numeric attribute, or the
+            codes of the grouping attribute, in row order.
+        """
+        self.__check(field)
+        with self.__reading():
+            return self.__data[field][:len(self.__keys)].copy()
+
+    def __check(self, field):
+        """Raises a ValueError if an attribute has no column."""
+        if field not in self.__data:
+            raise ValueError("no column for {}".format(field))
+
+    def __mask(self, conditions):
+        """Returns the rows meeting every condition, as booleans."""
+        size = len(self.__keys)
+        mask = numpy.ones(size, dtype=bool)
+        for condition, expected in conditions.items():
+            field, _, name = condition.partition("__")
+            self.__check(field)
+            name = name or "eq"
+            column = self.__data[field][:size]
+            # Objects missing the attribute never match, as in a query
+            if field in self.__codes:  # Compare the codes of the values
+                mask &= column >= 0
+                if name not in GROUP_OPERATORS:
+                    raise ValueError("unknown operator: {}".format(name))
+                codes = self.__codes[field]
+                if name == "in":
+                    wanted = [codes[value] for value in expected
+                              if value in codes]
+                    mask &= numpy.isin(column, wanted)
+                    continue
+                # Values never seen have no rows (-2 matches no code)
+                expected = codes.get(expected, -2)
+            elif name not in NUMERIC_OPERATORS:
+                raise ValueError("unknown operator: {}".format(name))
+            else:
+                mask &= ~numpy.isnan(column)
+            if name == "in":
+                mask &= numpy.isin(column, list(expected))
+            else:  # The comparisons of operator work on whole arrays
+                mask &= OPERATORS[name](column, expected)
+        return mask
+
+    def keys(self, **conditions):
+        """
+        Returns the keys of the objects meeting conditions, such as
+        price_by_night__ge=50, price_by_night__lt=100.
+        Returns:
+            list: The matching keys.
+        Raises:
+            ValueError: If an attribute or operator is invalid.
+        """
+        with self.__reading():
+            rows = numpy.flatnonzero(self.__mask(conditions))
+            return [self.__keys[row] for row in rows.tolist()]
+
+    def __selection(self, field, by, conditions):
+        """Returns the values and group codes of the selected rows."""
+        self.__check(field)
+        if field not in self.numeric:
+            raise ValueError("{} is not numeric".format(field))
+        mask = self.__mask(conditions)
+        values = self.__data[field][:len(mask)]
+        mask &= ~numpy.isnan(values)  # Skip the missing values
+        if by is None:
+            return values[mask], None
+        self.__check(by)
+        if by not in self.__codes:
+            raise ValueError("{} is not a grouping column".format(by))
+        codes = self.__data[by][:len(mask)]
+        mask &= codes >= 0  # Skip the objects without a group
+        return values[mask], codes[mask]
+
+    def aggregate(self, field, how="mean", by=None, **conditions):
+        """
+        Computes a statistic of a numeric attribute.
+        Args:
+            field (str): The numeric attribute.
+            how (str): One of count, sum, mean, min and max.
+            by (str): If given, a grouping attribute to compute the
+            statistic for each of its values.
+            **conditions: Only use the objects meeting the conditions.
+        Returns:
+            float or dict: The statistic, None if no value is selected;
+            or group value -> statistic for the non-empty groups.
+        Raises:
+            ValueError: If an attribute, operator or statistic is invalid.
+        """
+        if how not in AGGREGATIONS:
+            raise ValueError("unknown aggregation: {}".format(how))
+        with self.__reading():
+            values, codes = self.__selection(field, by, conditions)
+            if codes is None:
+                if how == "count":
+                    return len(values)
+                if not len(values):
+                    return None
+                return float(getattr(numpy, how)(values))
+            groups = len(self.__values[by])
+            counts = numpy.bincount(codes, minlength=groups)
+            if how == "count":
+                result = counts.astype(float)
+            elif how in ("sum", "mean"):
+                result = numpy.bincount(codes, weights=values,
+                                        minlength=groups)
+                if how == "mean":
+                    with numpy.errstate(invalid="ignore"):
+                        result = result / counts
+            else:
+                function = numpy.minimum if how == "min" else numpy.maximum
+                result = numpy.full(groups, numpy.inf if how == "min"
+                                    else -numpy.inf)
+                function.at(result, codes, values)
+            return self.__by_group(by, counts, result, how == "count")
+
+    def percentile(self, field, q, by=None, **conditions):
+        """
+        Computes a percentile of a numeric attribute, interpolated
+        linearly between the closest values like numpy.percentile.
+        Args:
+            field (str): The numeric attribute.
+            q (float): The percentile, between 0 and 100 (50 for the
+            median).
+            by (str): If given, a grouping attribute to compute the
+            percentile for each of its values.
+            **conditions: Only use the objects meeting the conditions.
+        Returns:
+            float or dict: The percentile, None if no value is selected;
+            or group value -> percentile for the non-empty groups.
+        Raises:
+            ValueError: If an attribute, operator or q is invalid.
+        """
+        if not 0 <= q <= 100:
+            raise ValueError("invalid percentile: {}".format(q))
+        with self.__reading():
+            values, codes = self.__selection(field, by, conditions)
+            if codes is None:
+                if not len(values):
+                    return None
+                return float(numpy.percentile(values, q))
+            # Sort by group then value, each group is then a slice
+            order = numpy.lexsort((values, codes))
+            values = values[order]
+            counts = numpy.bincount(codes, minlength=len(self.__values[by]))
+            starts = numpy.cumsum(counts) - counts
+            # Position of the percentile in each slice, and its neighbours
+            position = starts + q / 100 * numpy.maximum(counts - 1, 0)
+            low = numpy.floor(position).astype(numpy.int64)
+            high = numpy.ceil(position).astype(numpy.int64)
+            used = counts > 0
+            result = numpy.full(len(counts), numpy.nan)
+            low, high, position = low[used], high[used], position[used]
+            result[used] = values[low] + \
+                (values[high] - values[low]) * (position - low)
+            return self.__by_group(by, counts, result, False)
+
+    def distribution(self, field, **conditions):
+        """
+        Counts the objects holding each value of an attribute.
+        Args:
+            field (str): A numeric or grouping attribute.
+            **conditions: Only count the objects meeting the conditions.
+        Returns:
+            dict: Value -> number of objects, in increasing order of the
+            numeric values. Missing values are not counted.
+        Raises:
+            ValueError: If an attribute or operator is invalid.
+        """
+        self.__check(field)
+        with self.__reading():
+            mask = self.__mask(conditions)
+            column = self.__data[field][:len(mask)][mask]
+            if field in self.__codes:
+                counts = numpy.bincount(column[column >= 0],
+                                        minlength=len(self.__values[field]))
+                return {self.__values[field][code]: int(count)
+                        for code, count in enumerate(counts.tolist())
+                        if count}
+            values, counts = numpy.unique(column[~numpy.isnan(column)],
+                                          return_counts=True)
+            return dict(zip(values.tolist(), counts.tolist()))
+
+    def __by_group(self, by, counts, result, integers):
+        """Returns the results of the non-empty groups by group value."""
+        names = self.__values[by]
+        return {names[code]: int(value) if integers else float(value)
+                for code, (count, value) in
+                enumerate(zip(counts.tolist(), result.tolist())) if count}
+
+
+def build(storage, cls="Place", groups=None):
+    """
+    Builds the columns of a class from the objects of any storage, for
+    the engines that do not keep them up to date.
+    Args:
+        storage: The storage engine holding the objects.
+        cls (type or str): The class of the objects, Place by default.
+        groups (iterable): The grouping attributes, by default those
+        declared as str whose name ends in "_id".
+    Returns:
+        Columns: The columns of the objects stored now.
+    """
+    class_name = cls if isinstance(cls, str) else cls.__name__
+    numeric, default_groups = fields_of(storage.attribute_dict(), class_name)
+    columns = Columns(numeric, default_groups if groups is None else groups)
+    columns.extend(storage.all(class_name).items(),
+                   lambda obj, field: getattr(obj, field, None))
+    return columns
+
+
+def fields_of(attribute_dict, class_name):
+    """
+    Returns the numeric and grouping attributes of a class.
+    Args:
+        attribute_dict (dict): The result of storage.attribute_dict().
+        class_name (str): The name of the class.
+    Returns:
+        tuple: The names of the int and float attributes, and of the
+        str attributes whose name ends in "_id".
+    """
+    types = attribute_dict.get(class_name, {})
+    numeric = tuple(name for name, kind in types.items()
+                    if kind in (int, float))
+    groups = tuple(name for name, kind in types.items()
+                   if kind is str and name.endswith("_id"))
+    return numeric, groups
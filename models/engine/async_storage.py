@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+"""Defines the AsyncFileStorage class for using storage from asyncio."""
+
+import asyncio  # Import asyncio to await the storage from an event loop
+import itertools  # Import itertools to chain the objects of the classes
+from models.engine.file_storage import FileStorage  # The wrapped engine
+
+
+class AsyncObjects:
+    """
+    Asynchronous iterator over the objects of a storage. The keys of a
+    class are listed once, when the iteration reaches it, and each
+    object is loaded when it is returned; the event loop gets control
+    back every batch objects so other tasks keep running.
+    """
+
+    def __init__(self, storage, cls=None, batch=1000):
+        """
+        Initialize the iterator.
+        Args:
+            storage (FileStorage): The storage holding the objects.
+            cls (type or str): Only iterate over instances of this class.
+            batch (int): Number of objects between two yields to the loop.
+        """
+        self.__storage = storage  # Storage holding the objects
+        self.__cls = cls  # Class of the objects, None for every class
+        self.__batch = batch  # Objects returned between two yields
+        self.__objects = None  # Objects left to return, from storage
+        self.__count = 0  # Objects returned since the last yield
+
+    def __aiter__(self):
+        """Returns the iterator itself."""
+        return self
+
+    async def __anext__(self):
+        """Returns the next object still in the storage."""
+        if self.__objects is None:
+            classes = [self.__cls]
+            if self.__cls is None:
+                classes = list(self.__storage.class_dict())
+            # query() lists the keys of a class from its class bucket,
+            # skips the objects deleted since and loads them one by one
+            self.__objects = itertools.chain.from_iterable(
+                self.__storage.query(cls) for cls in classes)
+        for obj in self.__objects:
+            self.__count += 1
+            if self.__count >= self.__batch:
+                self.__count = 0
+                await asyncio.sleep(0)  # Let the other tasks run
+            return obj
+        raise StopAsyncIteration
+
+
+class AsyncFileStorage:
+    """
+    Asynchronous facade over a FileStorage, for asyncio services.
+
+    save() and reload() run in an executor so that serialization and
+    disk I/O do not block the event loop. Concurrent save() calls are
+    coalesced: while a write is running, every save() requested in the
+    meantime waits for a single next write that includes its changes.
+
+    Only FileStorage is supported: its changes are locked against the
+    writes running in the executor threads, while a DBStorage
+    connection can only be used by the thread that opened it.
+    """
+
+    def __init__(self, storage, executor=None):
+        """
+        Initialize the facade.
+        Args:
+            storage (FileStorage): The storage engine to wrap, usually
+            models.storage.
+            executor (concurrent.futures.Executor): Where the blocking
+            calls run, the default executor of the loop if None.
+        Raises:
+            TypeError: If storage is not a FileStorage.
+        """
+        if not isinstance(storage, FileStorage):
+            raise TypeError("AsyncFileStorage needs a FileStorage, not "
+                            "{}".format(type(storage).__name__))
+        self.__storage = storage  # Wrapped storage engine
+        self.__executor = executor  # Runs the blocking calls
+        self.__pending = None  # Future of the next write, if requested
+        self.__writer = None  # Task running the writes
+
+    @property
+    def storage(self):
+        """The wrapped storage engine."""
+        return self.__storage
+
+    async def __run(self, function, *args):
+        """Runs a blocking function in the executor and awaits it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, function, *args)
+
+    async def save(self):
+        """Writes the changes, together with concurrent save() calls."""
+        if self.__pending is None:
+            self.__pending = asyncio.get_running_loop().create_future()
+        future = self.__pending
+        if self.__writer is None:
+            self.__writer = asyncio.ensure_future(self.__write())
+        # Shielded, so a cancelled caller does not cancel the others
+        await asyncio.shield(future)
+
+    async def __write(self):
+        """Runs one write per batch of save() requests."""
+        try:
+            while self.__pending is not None:
+                # Saves requested from now on wait for the next write
+                future, self.__pending = self.__pending, None
+                try:
+                    await self.__run(self.__storage.save)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
+        finally:
+            self.__writer = None
+
+    async def reload(self):
+        """Reads the file again without blocking the event loop."""
+        await self.__run(self.__storage.reload)
+
+    async def get(self, cls, obj_id):
+        """
+        Returns a stored object.
+        Args:
+            cls (type or str): The class of the object.
+            obj_id (str): The id of the object.
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        return self.__storage.get(cls, obj_id)
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored objects.
+        Args:
+            cls (type or str): Only count the instances of this class.
+        Returns:
+            int: The number of objects.
+        """
+        return self.__storage.count(cls)
+
+    def all(self, cls=None):
+        """
+        Returns an asynchronous iterator over the stored objects, to use
+        with "async for".
+        Args:
+            cls (type or str): Only iterate over instances of this class.
+        Returns:
+            AsyncObjects: The iterator.
+        """
+        return AsyncObjects(self.__storage, cls)
+
+    def new(self, obj):
+        """Adds an object to the storage."""
+        self.__storage.new(obj)
+
+    def delete(self, obj=None):
+        """Removes an object from the storage if it is present."""
+        self.__storage.delete(obj)
@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""
+Compact columnar snapshot format for FileStorage.
+
+Instead of one indented JSON document where every record repeats its
+field names, the objects are grouped by class and each class is stored
+as a table with one column per field. Every string (ids, foreign keys,
+timestamps, names) is written once in a shared string table and the
+columns refer to it by index, so repeated values such as city_id or
+user_id cost four bytes. Integers, floats and booleans are stored as
+native little-endian values, other values (lists, None, mixed columns)
+as interned JSON text.
+
+Layout, all integers being little-endian uint32 unless noted:
+    magic               b"HBNBCOL1"
+    string table        byte length, then a UTF-8 JSON array of strings
+    class count
+    for each class:     name (string index), row count, field count
+        for each field: name (string index), kind (1 byte),
+                        mask flag (1 byte), one byte per row if the flag
+                        is set (1 = the row has the field), then the
+                        values of the rows that have the field
+
+The file is read through mmap, so loading does not copy it in memory.
+It can be converted from and to the JSON format with:
+    python3 -m models.engine.columnar to-json file.hbnb file.json
+    python3 -m models.engine.columnar from-json file.json file.hbnb
+"""
+
+import json  # Import json for the string table and the generic values
+import mmap  # Import mmap to read snapshots without copying them
+import struct  # Import struct to pack the native values
+import sys  # Import sys to read the command line of the converter
+
+MAGIC = b"HBNBCOL1"  # First bytes of every columnar snapshot
+EXTENSION = ".hbnb"  # Extension of the snapshot files
+MISSING = object()  # Marks the rows that do not have a field
+# Column kinds: struct code of each value and the type it holds
+STRING, INTEGER, FLOAT, BOOLEAN, GENERIC = b"s", b"q", b"d", b"?", b"J"
+CODES = {STRING: "I", INTEGER: "q", FLOAT: "d", BOOLEAN: "?", GENERIC: "I"}
+_uint32 = struct.Struct("<I")  # Lengths, counts and string indexes
+INT64_RANGE = range(-2 ** 63, 2 ** 63)  # Integers stored natively
+
+
+class _Strings:
+    """Table of the distinct strings of a snapshot."""
+
+    def __init__(self):
+        """Initialize an empty table."""
+        self.indexes = {}  # String -> index in the table
+
+    def index(self, text):
+        """Returns the index of a string, adding it if needed."""
+        index = self.indexes.get(text)
+        if index is None:
+            index = self.indexes[text] = len(self.indexes)
+        return index
+
+
+def _kind(values):
+    """
+    Chooses how a column is stored.
+    Args:
+        values (list): The values of the rows that have the field.
+    Returns:
+        bytes: The kind of the column.
+    """
+    types = {type(value) for value in values}
+    if types == {str}:
+        return STRING
+    if types == {bool}:
+        return BOOLEAN
+    if types == {float}:
+        return FLOAT
+    if types == {int} and all(value in INT64_RANGE for value in values):
+        return INTEGER
+    return GENERIC  # Mixed, None, lists, dictionaries or big integers
+
+
+def dump(entries, file):
+    """
+    Writes (key, dictionary) pairs as a columnar snapshot.
+    Args:
+        entries (iterable): The keys and to_dict() dictionaries to write.
+        file (file): The file to write to, opened in binary mode.
+    """
+    tables = {}  # Class name -> (field names, rows)
+    for key, data in entries:
+        class_name = data.get("__class__", key.split(".", 1)[0])
+        fields, rows = tables.setdefault(class_name, ({}, []))
+        row = {name: value for name, value in data.items()
+               if name != "__class__"}
+        if key != "{}.{}".format(class_name, data.get("id")):
+            row["__key__"] = key  # The key cannot be rebuilt from the id
+        for name in row:
+            fields.setdefault(name, None)  # First seen order
+        rows.append(row)
+    strings = _Strings()
+    body = [_uint32.pack(len(tables))]
+    for class_name, (fields, rows) in tables.items():
+        body.append(struct.pack("<III", strings.index(class_name),
+                                len(rows), len(fields)))
+        for name in fields:
+            column = [row.get(name, MISSING) for row in rows]
+            values = [value for value in column if value is not MISSING]
+            kind = _kind(values)
+            if kind is STRING:
+                values = [strings.index(value) for value in values]
+            elif kind is GENERIC:
+                values = [strings.index(json.dumps(value))
+                          for value in values]
+            body.append(_uint32.pack(strings.index(name)) + kind)
+            if len(values) == len(rows):  # Every row has the field
+                body.append(b"\0")
+            else:
+                body.append(b"\1" + bytes(value is not MISSING
+                                          for value in column))
+            body.append(struct.pack(
+                "<{}{}".format(len(values), CODES[kind]), *values))
+    table = json.dumps(list(strings.indexes),
+                       ensure_ascii=False).encode("utf-8")
+    file.write(MAGIC + _uint32.pack(len(table)) + table)
+    file.write(b"".join(body))
+
+
+def load(file):
+    """
+    Yields the (key, dictionary) pairs of a columnar snapshot.
+    Args:
+        file (file): The snapshot, opened in binary mode.
+    Raises:
+        ValueError: If the file is not a columnar snapshot.
+    """
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a columnar snapshot")
+        offset = len(MAGIC)
+        (size,) = _uint32.unpack_from(view, offset)
+        offset += 4
+        strings = json.loads(view[offset:offset + size].decode("utf-8"))
+        offset += size
+        (class_count,) = _uint32.unpack_from(view, offset)
+        offset += 4
+        for _ in range(class_count):
+            name, row_count, field_count = struct.unpack_from(
+                "<III", view, offset)
+            offset += 12
+            class_name = strings[name]
+            rows = [{} for _ in range(row_count)]
+            for _ in range(field_count):
+                (name,) = _uint32.unpack_from(view, offset)
+                field = strings[name]
+                kind = view[offset + 4:offset + 5]
+                masked = view[offset + 5]
+                offset += 6
+                present = rows
+                if masked:  # Only some rows have the field
+                    mask = view[offset:offset + row_count]
+                    offset += row_count
+                    present = [row for row, flag in zip(rows, mask) if flag]
+                layout = struct.Struct("<{}{}".format(len(present),
+                                                      CODES[kind]))
+                values = layout.unpack_from(view, offset)
+                offset += layout.size
+                if kind == STRING:
+                    values = [strings[value] for value in values]
+                elif kind == GENERIC:
+                    values = [json.loads(strings[value]) for value in values]
+                for row, value in zip(present, values):
+                    row[field] = value
+            for row in rows:
+                key = row.pop("__key__", None)
+                row["__class__"] = class_name
+                yield key or "{}.{}".format(class_name, row.get("id")), row
+
+
+def from_json(json_path, path):
+    """
+    Converts a JSON file of FileStorage to a columnar snapshot.
+    Args:
+        json_path (str): The JSON file to read.
+        path (str): The snapshot to write.
+    """
+    with open(json_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    with open(path, "wb") as file:
+        dump(data.items(), file)
+
+
+def to_json(path, json_path):
+    """
+    Converts a columnar snapshot to a JSON file of FileStorage.
+    Args:
+        path (str): The snapshot to read.
+        json_path (str): The JSON file to write.
+    """
+    with open(path, "rb") as file:
+        data = dict(load(file))
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+
+
+if __name__ == "__main__":
+    converters = {"from-json": from_json, "to-json": to_json}
+    if len(sys.argv) != 4 or sys.argv[1] not in converters:
+        sys.exit("Usage: python3 -m models.engine.columnar "
+                 "from-json|to-json <source> <destination>")
+    converters[sys.argv[1]](sys.argv[2], sys.argv[3])
@@ -0,0 +1,494 @@
+#!/usr/bin/python3
+"""Defines the DBStorage class for storing objects in a SQLite database."""
+
+import json  # Import the json module to store lists and extra attributes
+import sqlite3  # Import the sqlite3 module for the database
+import weakref  # Import weakref to cache loaded objects without pinning them
+from contextlib import contextmanager  # Import to build transaction()
+from models.base_model import BaseModel  # Import the class registry
+from models.engine.file_storage import FileStorage  # Import the schema
+from models.engine import analytics  # NumPy columns
+from models.engine.geo_index import in_box, nearest, position  # Places
+from models.engine.query import Query, attribute_types  # Searches
+from models.engine import text_index  # Full-text search
+
+# SQLite column type for each attribute type of attribute_dict()
+COLUMN_TYPES = {str: "TEXT", int: "INTEGER", float: "REAL", list: "TEXT"}
+SQL_PARAMETERS = 500  # Values bound to one query, below the SQLite limit
+
+
+class DBStorage:
+    """
+    Stores instances in a SQLite database with one table per class.
+
+    Every attribute listed in FileStorage.attribute_dict() gets its own
+    column, attributes ending in "_id" are indexed, and any other
+    attribute set on an instance is kept as JSON in the "extra" column.
+    Loaded objects are only cached while they are in use, so the
+    dataset does not have to fit in memory.
+    """
+    __db_path = "file.db"  # Path to the SQLite database
+
+    def __init__(self, db_path=None):
+        """
+        Initialize the storage engine and create the missing tables.
+        Args:
+            db_path (str): Path to the database, "file.db" by default.
+        """
+        if db_path is not None:
+            self.__db_path = db_path
+        # The class and attribute tables are shared with FileStorage
+        self.__file_storage = FileStorage()
+        self.__connection = sqlite3.connect(self.__db_path)
+        self.__columns = {}  # Class name -> {column name: type}
+        # Objects loaded from or added to the database, key -> object
+        self.__objects = weakref.WeakValueDictionary()
+        self.__dirty = {}  # Objects to write on the next save
+        self.__deleted = set()  # Keys to delete on the next save
+        self.__depth = 0  # Number of nested open transactions
+        self.__create_tables()
+
+    def __create_tables(self):
+        """Creates one table per class and its foreign key indexes."""
+        attributes = self.attribute_dict()
+        with self.__connection:
+            for class_name in self.class_dict():
+                columns = dict(attributes["BaseModel"])
+                columns.update(attributes.get(class_name, {}))
+                self.__columns[class_name] = columns
+                definitions = ['"id" TEXT PRIMARY KEY']
+                for name, kind in columns.items():
+                    if name != "id":
+                        definitions.append('"{}" {}'.format(
+                            name, COLUMN_TYPES.get(kind, "TEXT")))
+                definitions.append('"extra" TEXT')
+                self.__connection.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" ({})'.format(
+                        class_name, ", ".join(definitions)))
+                for name in columns:
+                    if name.endswith("_id"):  # Index the foreign keys
+                        self.__connection.execute(
+                            'CREATE INDEX IF NOT EXISTS "{0}_{1}" '
+                            'ON "{0}" ("{1}")'.format(class_name, name))
+
+    def new(self, obj):
+        """Adds an object to the storage."""
+        key = obj.__class__.__name__ + "." + obj.id
+        self.__objects[key] = obj
+        # Remember the object has to be written on the next save
+        self.__dirty[key] = obj
+        self.__deleted.discard(key)
+
+    def mark_dirty(self, obj, name=None):
+        """
+        Marks a stored object as changed so the next save writes it.
+        Args:
+            obj (BaseModel): The object that changed.
+            name (str): The attribute that changed, None if unknown.
+        """
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", None))
+        # Instances that are not (or no longer) stored are ignored
+        if self.__objects.get(key) is obj:
+            self.__dirty[key] = obj
+
+    def all(self, cls=None):
+        """
+        Returns the objects in the storage.
+        Args:
+            cls (type or str): Only return instances of this class.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        if cls is None:
+            result = {}
+            for class_name in self.class_dict():
+                result.update(self.filter(class_name))
+            return result
+        return self.filter(cls)
+
+    def get(self, cls, obj_id):
+        """
+        Returns a stored object from its class and id.
+        Args:
+            cls (type or str): The class of the object.
+            obj_id (str): The id of the object.
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        key = class_name + "." + obj_id
+        obj = self.__objects.get(key)
+        if obj is not None or key in self.__deleted:
+            return obj
+        if class_name not in self.__columns:  # Not a stored class
+            return None
+        cursor = self.__connection.execute(
+            'SELECT * FROM "{}" WHERE "id" = ?'.format(class_name),
+            (obj_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        names = [description[0] for description in cursor.description]
+        return self.__hydrate(class_name, dict(zip(names, row)))
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored objects, counted by the database.
+        Args:
+            cls (type or str): Only count the instances of this class.
+        Returns:
+            int: The number of objects.
+        """
+        if cls is None:
+            return sum(self.count(class_name)
+                       for class_name in self.class_dict())
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        if class_name not in self.__columns:  # Not a stored class
+            return 0
+        (count,) = self.__connection.execute(
+            'SELECT COUNT(*) FROM "{}"'.format(class_name)).fetchone()
+        # Add the objects not saved yet and remove the deleted ones
+        stored = {key for key in list(self.__dirty) + list(self.__deleted)
+                  if key.split(".", 1)[0] == class_name}
+        if stored:
+            placeholders = ", ".join("?" for _ in stored)
+            (count_stored,) = self.__connection.execute(
+                'SELECT COUNT(*) FROM "{}" WHERE "id" IN ({})'.format(
+                    class_name, placeholders),
+                [key.split(".", 1)[1] for key in stored]).fetchone()
+            count += sum(1 for key in stored if key in self.__dirty)
+            count -= count_stored
+        return count
+
+    def query(self, cls, order_by=(), limit=None, offset=0, fields=None,
+              **conditions):
+        """
+        Searches the instances of a class, see models.engine.query.Query
+        for the conditions. Equality conditions on columns are run as an
+        indexed SQL query, the others are tested on the objects it
+        returns.
+        Args:
+            cls (type or str): The class of the objects to search.
+            order_by (str or list): Attributes to sort by, each prefixed
+            with "-" for a descending order.
+            limit (int): Maximum number of results, None for all.
+            offset (int): Number of results to skip.
+            fields (list): If given, yield dictionaries of these
+            attributes instead of the objects.
+            **conditions: Conditions such as price_by_night__lt=100.
+        Returns:
+            generator: The results.
+        Raises:
+            ValueError: If an attribute, operator or page is invalid.
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        types = attribute_types(self.attribute_dict(), class_name)
+        query = Query(types, conditions, order_by, limit, offset, fields)
+        equal = {field: values[0]
+                 for field, values in query.equalities.items()
+                 if len(values) == 1 and
+                 isinstance(values[0], (str, int, float))}
+        # Equality conditions on columns run as an indexed SQL query
+        records = self.filter(cls, **equal).items()
+        return query.select(
+            records, lambda obj, field: getattr(obj, field, None),
+            lambda key, obj: obj)
+
+    def nearby(self, lat, lon, radius_km, limit=None, cls="Place"):
+        """
+        Returns the objects within a distance of a point, nearest first,
+        checking every stored object of the class.
+        Args:
+            lat (float): Latitude of the center, in degrees.
+            lon (float): Longitude of the center, in degrees.
+            radius_km (float): Maximum distance in kilometers.
+            limit (int): Maximum number of objects, None for all.
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            list: The (object, distance in km) pairs.
+        """
+        objects = self.all(cls)
+        found = nearest(self.__positions(objects), lat, lon, radius_km,
+                        limit)
+        return [(objects[key], distance) for distance, key in found]
+
+    def bbox(self, south, west, north, east, cls="Place"):
+        """
+        Returns the objects inside a bounding box.
+        Args:
+            south (float): Minimum latitude.
+            west (float): Minimum longitude, larger than east if the box
+            crosses the antimeridian.
+            north (float): Maximum latitude.
+            east (float): Maximum longitude.
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        objects = self.all(cls)
+        return {key: objects[key]
+                for key, lat, lon in self.__positions(objects)
+                if in_box(lat, lon, south, west, north, east)}
+
+    def search(self, text, cls=None, limit=10):
+        """
+        Returns the objects whose text attributes best match the words
+        of a text, loading every stored object of the classes with texts
+        to index their words.
+        Args:
+            text (str): The words to search.
+            cls (type or str): Only search the instances of this class.
+            limit (int): Maximum number of results, None for all.
+        Returns:
+            list: The (object, score) pairs, best first.
+        """
+        objects = {}  # Objects of the classes with texts
+        for class_name in text_index.TEXT_FIELDS if cls is None else [cls]:
+            objects.update(self.all(class_name))
+        index = text_index.build(objects)
+        return [(objects[key], score)
+                for key, score in index.search(text, limit=limit)]
+
+    @staticmethod
+    def __positions(objects):
+        """Yields the (key, lat, lon) of the objects with coordinates."""
+        for key, obj in objects.items():
+            point = position(getattr(obj, "latitude", None),
+                             getattr(obj, "longitude", None))
+            if point is not None:
+                yield (key,) + point
+
+    def columns(self, cls="Place"):
+        """
+        Returns the NumPy columns of the numeric and foreign key
+        attributes of a class; every object of the class is loaded
+        to build them, and later changes are not reflected.
+        Args:
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            Columns: The columns, see models.engine.analytics.
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        return analytics.build(self, cls)
+
+    def filter(self, cls, **eq):
+        """
+        Returns the instances of a class whose attributes equal the
+        given values. Conditions on columns are run as an indexed query.
+        Args:
+            cls (type or str): The class of the objects to return.
+            **eq: Attribute names and the values they must equal.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        columns = self.__columns.get(class_name, {})
+        conditions = []  # SQL conditions on the columns
+        parameters = []  # Values bound to the conditions
+        for field, value in eq.items():
+            if field in columns and columns[field] is not list:
+                conditions.append('"{}" = ?'.format(field))
+                parameters.append(value)
+        query = 'SELECT * FROM "{}"'.format(class_name)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        result = {}
+        cursor = self.__connection.execute(query, parameters)
+        names = [description[0] for description in cursor.description]
+        for row in cursor:
+            obj = self.__hydrate(class_name, dict(zip(names, row)))
+            if obj is not None:
+                result[class_name + "." + obj.id] = obj
+        # Objects changed since the last save may match too
+        for key, obj in self.__dirty.items():
+            if key.split(".", 1)[0] == class_name:
+                result[key] = obj
+        # Check every condition on the in-memory objects
+        return {key: obj for key, obj in result.items()
+                if all(getattr(obj, field, None) == value
+                       for field, value in eq.items())}
+
+    def related(self, cls, field, ids):
+        """
+        Returns the instances of a class referring to each of several
+        objects, such as the cities of a page of states, read with one
+        indexed SQL query for all the ids instead of one per id.
+        Args:
+            cls (type or str): The class of the referring objects.
+            field (str): Their attribute holding the id, e.g. "state_id".
+            ids (iterable): The ids of the referred objects.
+        Returns:
+            dict: Each id -> the list of the objects referring to it,
+            sorted by key, empty if there are none.
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        found = {obj_id: [] for obj_id in ids}  # Id -> referring objects
+        columns = self.__columns.get(class_name)
+        if columns is None:  # Not a stored class
+            return found
+        if columns.get(field) not in (str, int, float):
+            objects = self.filter(class_name)  # Not a column, load all
+        else:
+            objects = {}
+            wanted = list(found)
+            # SQLite limits the number of parameters of a query
+            for start in range(0, len(wanted), SQL_PARAMETERS):
+                chunk = wanted[start:start + SQL_PARAMETERS]
+                cursor = self.__connection.execute(
+                    'SELECT * FROM "{}" WHERE "{}" IN ({})'.format(
+                        class_name, field, ", ".join("?" for _ in chunk)),
+                    chunk)
+                names = [description[0] for description in cursor.description]
+                for row in cursor:
+                    obj = self.__hydrate(class_name, dict(zip(names, row)))
+                    if obj is not None:
+                        objects[class_name + "." + obj.id] = obj
+            # Objects changed since the last save may refer to them too
+            for key, obj in self.__dirty.items():
+                if key.split(".", 1)[0] == class_name:
+                    objects[key] = obj
+        # Check the attribute on the objects, it may have changed here
+        for key in sorted(objects):
+            value = getattr(objects[key], field, None)
+            try:
+                if value in found:
+                    found[value].append(objects[key])
+            except TypeError:  # Unhashable values, such as lists
+                continue
+        return found
+
+    def delete(self, obj=None):
+        """Removes an object from the storage if it is present."""
+        if obj is None:  # Nothing to delete
+            return
+        key = obj.__class__.__name__ + "." + obj.id
+        self.__objects.pop(key, None)
+        self.__dirty.pop(key, None)
+        self.__deleted.add(key)
+
+    def save(self):
+        """Writes the changed and deleted objects in one transaction."""
+        if self.__depth:  # Written once when the transaction is committed
+            return
+        with self.__connection:
+            for key, obj in self.__dirty.items():
+                class_name = key.split(".", 1)[0]
+                row = self.__row(class_name, obj.to_dict())
+                self.__connection.execute(
+                    'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'.format(
+                        class_name,
+                        ", ".join('"{}"'.format(name) for name in row),
+                        ", ".join("?" for _ in row)),
+                    list(row.values()))
+            for key in self.__deleted:
+                class_name, obj_id = key.split(".", 1)
+                self.__connection.execute(
+                    'DELETE FROM "{}" WHERE "id" = ?'.format(class_name),
+                    (obj_id,))
+        self.__dirty.clear()
+        self.__deleted.clear()
+
+    def begin(self):
+        """
+        Starts a transaction: save() does nothing until commit(), and
+        rollback() drops the changes made since begin(). Changes made
+        before begin() are saved first so that rollback() can restore
+        the objects from the database.
+        """
+        if not self.__depth:
+            self.save()
+        self.__depth += 1
+
+    def commit(self):
+        """Ends the current transaction, writing its changes once."""
+        if not self.__depth:
+            raise RuntimeError("No transaction in progress")
+        self.__depth -= 1
+        if self.__depth == 0:  # Outermost transaction
+            self.save()
+
+    def rollback(self):
+        """
+        Cancels the current transaction, including the nested ones.
+        The objects changed since begin() are read again from the
+        database, so references kept to them do not see the rollback.
+        """
+        if not self.__depth:
+            raise RuntimeError("No transaction in progress")
+        for key in list(self.__dirty) + list(self.__deleted):
+            self.__objects.pop(key, None)
+        self.__dirty.clear()
+        self.__deleted.clear()
+        self.__depth = 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups changes into a single save: the transaction is committed
+        when the block ends, or rolled back if it raises an exception.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def reload(self):
+        """Drops the cached clean objects so they are read again."""
+        self.__objects = weakref.WeakValueDictionary(self.__dirty)
+
+    def close(self):
+        """Closes the database connection."""
+        self.__connection.close()
+
+    def __row(self, class_name, data):
+        """Converts a to_dict() dictionary to the columns of a row."""
+        columns = self.__columns[class_name]
+        row = {}
+        extra = {}  # Attributes without a column of their own
+        for name, value in data.items():
+            if name == "__class__":
+                continue
+            if name not in columns:
+                extra[name] = value
+            elif columns[name] is list:
+                row[name] = json.dumps(value)
+            else:
+                row[name] = value
+        row["extra"] = json.dumps(extra) if extra else None
+        return row
+
+    def __hydrate(self, class_name, row):
+        """Returns the object stored in a row, reusing loaded objects."""
+        key = class_name + "." + row["id"]
+        if key in self.__deleted:  # Deleted since the last save
+            return None
+        obj = self.__objects.get(key)
+        if obj is not None:  # Already loaded, keep in-memory changes
+            return obj
+        columns = self.__columns[class_name]
+        data = {"__class__": class_name}
+        for name, value in row.items():
+            if value is None:  # Never set, the class default applies
+                continue
+            if name == "extra":
+                data.update(json.loads(value))
+            elif columns.get(name) is list:
+                data[name] = json.loads(value)
+            else:
+                data[name] = value
+        obj = BaseModel.registry[class_name](**data)
+        self.__objects[key] = obj
+        return obj
+
+    def class_dict(self):
+        """Returns a dictionary of class names
+        and their corresponding classes."""
+        return self.__file_storage.class_dict()
+
+    def attribute_dict(self):
+        """Returns the valid attributes and their types for each class."""
+        return self.__file_storage.attribute_dict()
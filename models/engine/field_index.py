@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+"""Defines the FieldIndex class used by the storage engines."""
+
+
+class FieldIndex:
+    """
+    Maps the values of one attribute to the keys of the objects
+    holding that value, so equality lookups do not scan every object.
+
+    Attributes:
+        field (str): The name of the indexed attribute.
+    """
+
+    def __init__(self, field):
+        """
+        Initialize an empty index.
+        Args:
+            field (str): The name of the indexed attribute.
+        """
+        self.field = field  # Name of the indexed attribute
+        self.__keys = {}  # Value -> set of object keys
+        self.__values = {}  # Object key -> indexed value
+
+    def add(self, key, value):
+        """Adds or moves an object key under the given value."""
+        if key in self.__values:
+            if self.__values[key] == value:  # Value did not change
+                return
+            self.remove(key)  # Drop the entry for the old value
+        try:
+            self.__keys.setdefault(value, set()).add(key)
+        except TypeError:
+            # Unhashable values (such as lists) are not indexed
+            return
+        self.__values[key] = value
+
+    def remove(self, key):
+        """Removes an object key from the index."""
+        if key not in self.__values:  # Key is not indexed
+            return
+        value = self.__values.pop(key)
+        keys = self.__keys[value]
+        keys.discard(key)
+        if not keys:  # Drop empty buckets
+            del self.__keys[value]
+
+    def lookup(self, value):
+        """
+        Returns the keys of the objects holding the given value.
+        Returns:
+            set: The matching keys, or None if the value is unhashable.
+        """
+        try:
+            return self.__keys.get(value, set())
+        except TypeError:
+            return None
+
+    def clear(self):
+        """Removes every entry from the index."""
+        self.__keys.clear()
+        self.__values.clear()
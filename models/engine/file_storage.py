@@ -3,6 +3,14 @@
 
 import json  # Import the json module for JSON operations
 import os  # Import the os module for interacting with the operating system
+import zlib  # Import zlib for a hash that is the same in every process
+import atexit  # Import atexit to write pending saves before exiting
+import threading  # Import threading for the background writer
+import multiprocessing  # Import multiprocessing to pick the worker start
+import time as clock  # Import time to wait for the saves to coalesce
+from concurrent.futures import ProcessPoolExecutor  # Parallel shard reads
+from contextlib import contextmanager  # Import to build transaction()
+from contextlib import nullcontext  # Import for reads that need no lock
 import datetime as time  # Import datetime module with an alias
 from models.base_model import BaseModel  # Import the BaseModel class
 from models.user import User  # Import the User class
@@ -11,6 +19,62 @@ from models.city import City  # Import the City class
 from models.place import Place  # Import the Place class
 from models.review import Review  # Import the Review class
 from models.amenity import Amenity  # Import the Amenity class
+from models.engine.field_index import FieldIndex  # Attribute indexes
+from models.engine.geo_index import GridIndex  # Positions of the places
+from models.engine import analytics  # NumPy columns, if NumPy is installed
+from models.engine.text_index import TEXT_FIELDS, TextIndex  # Search
+from models.engine.lazy_objects import LazyObjects  # Lazily loaded objects
+from models.engine.query import Query, attribute_types  # Searches
+from models.engine.rw_lock import RWLock  # Reader/writer lock
+from models.engine import json_stream  # Entry by entry JSON reader/writer
+try:
+    import fcntl  # Import fcntl to lock the file between processes
+except ImportError:  # Not available on Windows, saves are not locked
+    fcntl = None
+
+
+def partition_of(obj_id, partitions):
+    """
+    Returns the hash partition of an object id.
+    Args:
+        obj_id (str): The id of the object.
+        partitions (int): Number of partitions of its class.
+    Returns:
+        int: A partition number from 0 to partitions - 1.
+    """
+    return zlib.crc32(obj_id.encode("utf-8")) % partitions
+
+
+def shard_path(file_path, class_name, partition, partitions):
+    """
+    Returns the file of a shard of a sharded storage.
+    Args:
+        file_path (str): The file of the storage, e.g. file.json.
+        class_name (str): The class stored in the shard.
+        partition (int): The hash partition stored in the shard.
+        partitions (int): Number of partitions of each class.
+    Returns:
+        str: e.g. file.User.json, or file.User.3.json if partitioned.
+    """
+    base, extension = os.path.splitext(file_path)
+    if partitions > 1:
+        class_name = "{}.{}".format(class_name, partition)
+    return "{}.{}{}".format(base, class_name, extension)
+
+
+def read_shard(path):
+    """
+    Reads the records of a shard file, in a worker process.
+    Args:
+        path (str): The shard file to read.
+    Returns:
+        dict: The raw records of the shard, empty if it does not exist.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
 
 
 class FileStorage:
@@ -20,61 +84,1234 @@ class FileStorage:
     """
     __file_path = "file.json"  # Path to the JSON file
     __objects = {}  # Dictionary to store all objects
+    # Attributes indexed by default for each class (foreign keys)
+    __indexed_fields = {
+        "City": ("state_id",),
+        "Place": ("city_id", "user_id"),
+        "Review": ("place_id", "user_id"),
+    }
+    # Latitude and longitude attributes indexed on a grid by default
+    __spatial_fields = {"Place": ("latitude", "longitude")}
+    __text_fields = TEXT_FIELDS  # Text attributes of the search index
+
+    def __init__(self, journal=False, compact_threshold=1000, lazy=False,
+                 streaming=False, flush_interval=0, serializer=None,
+                 sharded=False, workers=None, partitions=1,
+                 thread_safe=False):
+        """
+        Initialize the storage engine.
+        Args:
+            journal (bool): If True, save() appends per-object change
+            records to a log file instead of rewriting the whole file.
+            compact_threshold (int): Number of log records after which
+            the log is folded back into the JSON snapshot.
+            lazy (bool): If True, reload() keeps the raw records and only
+            instantiates an object when it is first accessed.
+            streaming (bool): If True, the JSON file is read and written
+            one object at a time instead of as a whole document.
+            flush_interval (float): If positive, save() returns at once
+            and a background thread writes the file this many seconds
+            later, once for all the saves made in the meantime.
+            serializer (module): Format of the snapshot instead of JSON,
+            such as models.engine.columnar: any object with dump(entries,
+            file), load(file) and EXTENSION, used with binary files.
+            sharded (bool): If True, the objects of each class are kept
+            in a JSON file of their own, such as file.User.json, and a
+            save only rewrites the files of the classes that changed.
+            workers (int): Number of processes reading the shards in
+            parallel on reload; None or 0 reads them in this process.
+            partitions (int): If more than 1, the objects of each class
+            are split by a hash of their id into that many files, such
+            as file.User.3.json, and a save only rewrites the partitions
+            that changed. Implies sharded. Use models.engine.rebalance to
+            change the number of partitions of existing files.
+            thread_safe (bool): If True, the storage can be used from
+            several threads: changes take a writer lock, reads a reader
+            lock, and all() returns a copy that other threads do not
+            change while it is iterated. Transactions are refused, as
+            they would hold the changes of every thread.
+        """
+        self.__journal = journal  # Whether journaled mode is enabled
+        self.__lazy = lazy  # Whether records are instantiated on access
+        self.__streaming = streaming  # Whether the file is parsed by entry
+        self.__serializer = serializer  # Snapshot format, None for JSON
+        # Whether each class has its own files, and how many
+        self.__sharded = sharded or partitions > 1
+        self.__partitions = partitions
+        self.__workers = workers  # Processes reading the shards
+        if serializer is not None:
+            # Name the snapshot after its format, e.g. file.hbnb
+            self.__file_path = os.path.splitext(
+                self.__file_path)[0] + serializer.EXTENSION
+        self.__thread_safe = thread_safe  # Whether threads share it
+        if lazy:
+            # Keep the stored objects in a dictionary that loads on access
+            self.__objects = LazyObjects(
+                self.__hydrate, self.__objects,
+                lock=threading.Lock() if thread_safe else None)
+        self.__compact_threshold = compact_threshold  # Records per compact
+        self.__dirty = set()  # Keys created or changed since last save
+        self.__deleted = set()  # Keys deleted since last save
+        # Serialized form of clean objects, key -> (object, dictionary)
+        self.__cache = {}
+        self.__log_size = 0  # Number of records currently in the log
+        self.__log_offset = 0  # Bytes of the log already applied
+        # Shard -> (inode, mtime, size) of its file when last read or
+        # written, None if it did not exist; the only shard is None when
+        # the storage is not sharded
+        self.__generation = {}
+        self.__by_class = {}  # Class name -> {key: None}, in insert order
+        self.__by_shard = {}  # Shard -> {key: None}, if sharded
+        self.__indexes = {}  # (class name, attribute) -> FieldIndex
+        for class_name, fields in self.__indexed_fields.items():
+            for field in fields:
+                self.__indexes[(class_name, field)] = FieldIndex(field)
+        self.__spatial = {}  # Class name -> GridIndex of its positions
+        self.__columns = {}  # Class name -> Columns, built on first use
+        self.__text = None  # Words of the text attributes, on first use
+        for class_name, fields in self.__spatial_fields.items():
+            self.__spatial[class_name] = GridIndex(fields)
+        self.__indexed = self.__objects  # Dictionary the indexes describe
+        self.__depth = 0  # Number of nested open transactions
+        # Guards the in-memory state; only the changes take it unless
+        # the storage is thread-safe
+        self.__lock = RWLock() if thread_safe else threading.RLock()
+        self.__write_lock = threading.Lock()  # One write at a time
+        self.__flush_interval = flush_interval  # Background save delay
+        self.__flush_pending = threading.Event()  # Set when save() waits
+        self.__writer = None  # Background writer thread
+        if flush_interval > 0:
+            # Write the last saves before the interpreter exits
+            atexit.register(self.flush)
+        # Key -> (serialized state before its first change in the
+        # transaction or None if it did not exist, whether it was unsaved,
+        # the instance then stored or None), restored by rollback()
+        self.__undo = None
 
     def new(self, obj):
         """Adds an object to the storage."""
         # Construct the key for the object
         key = obj.__class__.__name__ + "." + obj.id
-        # Add the object to the storage dictionary
-        self.__objects[key] = obj
+        with self.__lock:
+            self.__remember(key)  # Keep its previous state for a rollback
+            # Add the object to the storage dictionary
+            self.__objects[key] = obj
+            self.__track(key, obj)  # Add it to its class bucket and indexes
+            # Remember the object has to be written on the next save
+            self.__dirty.add(key)
+            self.__deleted.discard(key)
+
+    def mark_dirty(self, obj, name=None):
+        """
+        Marks a stored object as changed so the next save serializes it.
+        Args:
+            obj (BaseModel): The object that changed.
+            name (str): The attribute that changed, None if unknown.
+        """
+        class_name = obj.__class__.__name__
+        key = "{}.{}".format(class_name, getattr(obj, "id", None))
+        # Instances that are not (or no longer) stored are ignored,
+        # dict.get() avoids loading a raw record in lazy mode
+        if dict.get(self.__objects, key) is not obj:
+            return
+        with self.__lock:
+            self.__remember(key)  # Keep its previous state for a rollback
+            self.__dirty.add(key)
+            if name is None:  # Refresh every index of the class
+                self.__track(key, obj)
+                return
+            if (class_name, name) in self.__indexes:
+                # Move the object under its new value
+                self.__indexes[(class_name, name)].add(
+                    key, getattr(obj, name, None))
+            if class_name in self.__spatial and \
+                    name in self.__spatial[class_name].fields:
+                self.__locate(key, obj)  # Move it to its new position
+            if self.__text is not None and \
+                    name in self.__text_fields.get(class_name, ()):
+                self.__index_text(key, obj)  # Index the new words
+            if class_name in self.__columns:  # Update its column cell
+                self.__columns[class_name].set(
+                    key, name, getattr(obj, name, None))
+
+    def all(self, cls=None):
+        """
+        Returns the objects in the storage.
+        Args:
+            cls (type or str): Only return instances of this class.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        if cls is None:
+            if not self.__thread_safe:
+                return self.__objects
+            with self.__lock.read():  # Copy it in a consistent state
+                if isinstance(self.__objects, LazyObjects):
+                    return self.__objects.snapshot()
+                return dict(self.__objects)
+        self.__sync_indexes()  # Make sure the class buckets are current
+        with self.__reading():
+            bucket = self.__by_class.get(self.__class_name(cls), {})
+            return {key: self.__objects[key] for key in list(bucket)}
+
+    def get(self, cls, obj_id):
+        """
+        Returns a stored object from its class and id.
+        Args:
+            cls (type or str): The class of the object.
+            obj_id (str): The id of the object.
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        key = self.__class_name(cls) + "." + obj_id
+        if not self.__thread_safe:
+            return self.__objects.get(key)
+        with self.__lock.read():
+            return self.__objects.get(key)
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored objects, without looking at them:
+        the class buckets are kept up to date by new() and delete().
+        Args:
+            cls (type or str): Only count the instances of this class.
+        Returns:
+            int: The number of objects.
+        """
+        if cls is None:
+            return len(self.__objects)
+        self.__sync_indexes()  # Make sure the class buckets are current
+        return len(self.__by_class.get(self.__class_name(cls), ()))
+
+    def __reading(self):
+        """Returns the reader lock in thread-safe mode, else no lock."""
+        if self.__thread_safe:
+            return self.__lock.read()
+        return nullcontext()
+
+    def filter(self, cls, **eq):
+        """
+        Returns the instances of a class whose attributes equal the
+        given values, using the attribute indexes when available.
+        Args:
+            cls (type or str): The class of the objects to return.
+            **eq: Attribute names and the values they must equal.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        self.__sync_indexes()  # Make sure the indexes are current
+        with self.__reading():
+            return self.__filter(self.__class_name(cls), eq)
+
+    def __filter(self, class_name, eq):
+        """Returns the objects of filter(), under the reader lock."""
+        candidates = None  # Smallest set of keys found in an index
+        for field, value in eq.items():
+            index = self.__indexes.get((class_name, field))
+            keys = index.lookup(value) if index is not None else None
+            if keys is not None and \
+                    (candidates is None or len(keys) < len(candidates)):
+                candidates = keys
+        if candidates is None:  # No usable index, scan the class bucket
+            candidates = self.__by_class.get(class_name, {}).keys()
+        result = {}
+        for key in candidates:
+            # Check every condition, including the indexed ones, on the
+            # raw record if it is not loaded yet
+            obj = dict.get(self.__objects, key)
+            if all(self.__value(obj, field) == value
+                   for field, value in eq.items()):
+                result[key] = self.__objects[key]
+        return result
+
+    def related(self, cls, field, ids):
+        """
+        Returns the instances of a class referring to each of several
+        objects, such as the cities of a page of states, looked up in
+        the index of the referring attribute; without an index the
+        class is scanned once for every id instead of once per id.
+        Args:
+            cls (type or str): The class of the referring objects.
+            field (str): Their attribute holding the id, e.g. "state_id".
+            ids (iterable): The ids of the referred objects.
+        Returns:
+            dict: Each id -> the list of the objects referring to it,
+            sorted by key, empty if there are none.
+        """
+        class_name = self.__class_name(cls)
+        found = {obj_id: [] for obj_id in ids}  # Id -> referring objects
+        self.__sync_indexes()  # Make sure the indexes are current
+        with self.__reading():
+            index = self.__indexes.get((class_name, field))
+            if index is not None:
+                keys = {obj_id: index.lookup(obj_id) for obj_id in found}
+            else:  # No index on the attribute, scan the class bucket
+                keys = {obj_id: [] for obj_id in found}
+                for key in self.__by_class.get(class_name, {}):
+                    # Read the raw record if it is not loaded yet
+                    value = self.__value(dict.get(self.__objects, key), field)
+                    try:
+                        if value in keys:
+                            keys[value].append(key)
+                    except TypeError:  # Unhashable values, such as lists
+                        continue
+            for obj_id in found:
+                found[obj_id] = [self.__objects[key]
+                                 for key in sorted(keys[obj_id])]
+        return found
+
+    def query(self, cls, order_by=(), limit=None, offset=0, fields=None,
+              **conditions):
+        """
+        Searches the instances of a class, see models.engine.query.Query
+        for the conditions. Equality conditions on indexed attributes
+        are looked up in the indexes; the other objects of the class
+        are scanned. In lazy mode the conditions and sort keys are read
+        from the raw records, so only the returned objects are loaded.
+        Args:
+            cls (type or str): The class of the objects to search.
+            order_by (str or list): Attributes to sort by, each prefixed
+            with "-" for a descending order. Without it the order is
+            that of the class, or unspecified when an index is used.
+            limit (int): Maximum number of results, None for all.
+            offset (int): Number of results to skip.
+            fields (list): If given, yield dictionaries of these
+            attributes instead of the objects.
+            **conditions: Conditions such as price_by_night__lt=100.
+        Returns:
+            generator: The results, found as they are read.
+        Raises:
+            ValueError: If an attribute, operator or page is invalid.
+        """
+        class_name = self.__class_name(cls)
+        types = attribute_types(self.attribute_dict(), class_name)
+        query = Query(types, conditions, order_by, limit, offset, fields)
+        self.__sync_indexes()  # Make sure the indexes are current
+        with self.__reading():
+            candidates = None  # Smallest set of keys found in an index
+            for field, values in query.equalities.items():
+                index = self.__indexes.get((class_name, field))
+                if index is None:
+                    continue
+                keys = set()
+                for value in values:
+                    found = index.lookup(value)
+                    if found is None:  # Unhashable value, not indexed
+                        break
+                    keys |= found
+                else:
+                    if candidates is None or len(keys) < len(candidates):
+                        candidates = keys
+            if candidates is None:  # No usable index, scan the class bucket
+                candidates = self.__by_class.get(class_name, {})
+            # Only the keys are copied, the objects are read on demand
+            candidates = list(candidates)
+        return query.select(self.__records(candidates), self.__value,
+                            lambda key, record: self.__objects.get(key))
+
+    def __records(self, keys):
+        """Yields the keys still stored with their object or raw record."""
+        for key in keys:
+            # dict.get() avoids loading a raw record in lazy mode
+            record = dict.get(self.__objects, key)
+            if record is not None:
+                yield key, record
+
+    def search(self, text, cls=None, limit=10):
+        """
+        Returns the objects whose text attributes (Review.text, Place.name
+        and Place.description) best match the words of a text, using the
+        text index instead of reading every text. The index is built on
+        the first call, from the one saved with the file when there is
+        one, kept up to date by the changes and saved by save().
+        Args:
+            text (str): The words to search.
+            cls (type or str): Only search the instances of this class.
+            limit (int): Maximum number of results, None for all.
+        Returns:
+            list: The (object, score) pairs, best first.
+        """
+        prefix = None if cls is None else self.__class_name(cls) + "."
+        self.__sync_indexes()  # Make sure the class buckets are current
+        if self.__text is None:
+            with self.__lock:
+                if self.__text is None:  # Not built by another thread
+                    self.__build_text()
+        with self.__reading():
+            return [(self.__objects[key], score) for key, score in
+                    self.__text.search(text, prefix, limit)]
+
+    def nearby(self, lat, lon, radius_km, limit=None, cls="Place"):
+        """
+        Returns the objects within a distance of a point, nearest first,
+        using the spatial index instead of checking every object.
+        Args:
+            lat (float): Latitude of the center, in degrees.
+            lon (float): Longitude of the center, in degrees.
+            radius_km (float): Maximum distance in kilometers.
+            limit (int): Maximum number of objects, None for all.
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            list: The (object, distance in km) pairs.
+        Raises:
+            ValueError: If the class has no coordinates.
+        """
+        index = self.__spatial_index(cls)
+        with self.__reading():
+            found = index.nearby(lat, lon, radius_km, limit)
+            return [(self.__objects[key], distance)
+                    for distance, key in found]
 
-    def all(self):
-        """Returns all objects in the storage."""
-        return self.__objects
+    def bbox(self, south, west, north, east, cls="Place"):
+        """
+        Returns the objects inside a bounding box.
+        Args:
+            south (float): Minimum latitude.
+            west (float): Minimum longitude, larger than east if the box
+            crosses the antimeridian.
+            north (float): Maximum latitude.
+            east (float): Maximum longitude.
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        Raises:
+            ValueError: If the class has no coordinates.
+        """
+        index = self.__spatial_index(cls)
+        with self.__reading():
+            return {key: self.__objects[key]
+                    for key in index.box(south, west, north, east)}
+
+    def __spatial_index(self, cls):
+        """Returns the up-to-date spatial index of a class."""
+        index = self.__spatial.get(self.__class_name(cls))
+        if index is None:
+            raise ValueError("{} has no coordinates".format(
+                self.__class_name(cls)))
+        self.__sync_indexes()  # Make sure the indexes are current
+        return index
+
+    def columns(self, cls="Place"):
+        """
+        Returns the NumPy columns of the numeric and foreign key
+        attributes of a class, for statistics such as the mean price
+        per city. They are built on the first call, from the raw
+        records in lazy mode, and kept up to date by the changes.
+        Args:
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            Columns: The columns, see models.engine.analytics.
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        class_name = self.__class_name(cls)
+        self.__sync_indexes()  # Make sure the class buckets are current
+        with self.__lock:
+            if class_name not in self.__columns:
+                numeric, groups = analytics.fields_of(
+                    self.attribute_dict(), class_name)
+                columns = analytics.Columns(
+                    numeric, groups,
+                    lock=self.__lock if self.__thread_safe else None)
+                columns.extend(
+                    ((key, dict.get(self.__objects, key))
+                     for key in self.__by_class.get(class_name, {})),
+                    self.__value)
+                self.__columns[class_name] = columns
+            return self.__columns[class_name]
+
+    def add_index(self, cls, field):
+        """
+        Declares an index on an attribute of a class.
+        Args:
+            cls (type or str): The class whose attribute is indexed.
+            field (str): The name of the attribute to index.
+        """
+        class_name = self.__class_name(cls)
+        with self.__lock:
+            if (class_name, field) in self.__indexes:  # Already indexed
+                return
+            index = FieldIndex(field)
+            for key in self.__by_class.get(class_name, {}):
+                index.add(key, self.__value(
+                    dict.get(self.__objects, key), field))
+            self.__indexes[(class_name, field)] = index
+
+    @staticmethod
+    def __class_name(cls):
+        """Returns the name of a class given the class or its name."""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __value(self, obj, field):
+        """Returns an attribute of an object or of a raw record."""
+        if type(obj) is dict:  # Raw record not loaded yet (lazy mode)
+            if field in obj:
+                return obj[field]
+            # Fall back on the class default like an instance would;
+            # compact classes keep it on the model class they replace
+            cls = BaseModel.registry.get(obj.get("__class__"))
+            return getattr(getattr(cls, "model", cls), field, None)
+        return getattr(obj, field, None)
+
+    def __track(self, key, obj):
+        """Adds an object to its class bucket and attribute indexes."""
+        class_name = key.split(".", 1)[0]
+        self.__by_class.setdefault(class_name, {})[key] = None
+        if self.__sharded:  # Saves list the keys of a shard from here
+            self.__by_shard.setdefault(self.__shard_of(key), {})[key] = None
+        for (indexed_class, field), index in self.__indexes.items():
+            if indexed_class == class_name:
+                index.add(key, self.__value(obj, field))
+        if class_name in self.__spatial:
+            self.__locate(key, obj)
+        if class_name in self.__columns:
+            self.__columns[class_name].add(key, obj, self.__value)
+        if self.__text is not None and class_name in self.__text_fields:
+            self.__index_text(key, obj)
+
+    def __index_text(self, key, obj):
+        """Indexes the words of the text attributes of an object."""
+        fields = self.__text_fields[key.split(".", 1)[0]]
+        self.__text.add(key, [self.__value(obj, field) for field in fields])
+
+    def __locate(self, key, obj):
+        """Moves an object to its position in the spatial index."""
+        index = self.__spatial[key.split(".", 1)[0]]
+        latitude, longitude = index.fields
+        index.add(key, self.__value(obj, latitude),
+                  self.__value(obj, longitude))
+
+    def __untrack(self, key):
+        """Removes an object from its class bucket and attribute indexes."""
+        class_name = key.split(".", 1)[0]
+        self.__by_class.get(class_name, {}).pop(key, None)
+        if self.__sharded:
+            self.__by_shard.get(self.__shard_of(key), {}).pop(key, None)
+        for (indexed_class, field), index in self.__indexes.items():
+            if indexed_class == class_name:
+                index.remove(key)
+        if class_name in self.__spatial:
+            self.__spatial[class_name].remove(key)
+        if class_name in self.__columns:
+            self.__columns[class_name].remove(key)
+        if self.__text is not None:
+            self.__text.remove(key)
+
+    def __sync_indexes(self):
+        """
+        Rebuilds the class buckets and indexes if __objects was replaced
+        or modified directly instead of through new() and delete().
+        """
+        try:
+            if self.__indexes_current():
+                return  # The indexes are up to date
+        except RuntimeError:  # A class bucket was added meanwhile
+            pass
+        with self.__lock:
+            # Check again: a change may have been seen half done, its
+            # object stored but not yet in its class bucket
+            if not self.__indexes_current():
+                self.__rebuild_indexes()
+
+    def __indexes_current(self):
+        """Returns whether the indexes describe __objects."""
+        size = sum(len(bucket) for bucket in self.__by_class.values())
+        return self.__indexed is self.__objects and \
+            size == len(self.__objects)
+
+    def __rebuild_indexes(self):
+        """Rebuilds the class buckets and indexes from __objects."""
+        self.__by_class = {}
+        self.__by_shard = {}
+        for index in list(self.__indexes.values()) + \
+                list(self.__spatial.values()) + list(self.__columns.values()):
+            index.clear()
+        # dict.items() reads raw records without loading them
+        for key, obj in dict.items(self.__objects):
+            self.__track(key, obj)
+        # The text index is not cleared, the words of unchanged texts
+        # are kept; only the objects no longer stored are removed
+        if self.__text is not None:
+            self.__prune_text()
+        self.__indexed = self.__objects
+
+    def __build_text(self):
+        """
+        Builds the text index, under the lock: the index saved with the
+        file is read, so that only the texts that changed since are
+        split into words again.
+        """
+        self.__text = TextIndex()
+        try:
+            with open(self.__text_path(), "r", encoding="utf-8") as file:
+                self.__text.load(file)
+        except (FileNotFoundError, ValueError, TypeError, KeyError):
+            # Missing or unreadable index, built from the objects
+            self.__text.clear()
+        for class_name in self.__text_fields:
+            # dict.get() reads raw records without loading them
+            for key in self.__by_class.get(class_name, {}):
+                self.__index_text(key, dict.get(self.__objects, key))
+        self.__prune_text()  # Objects deleted since the index was saved
+
+    def __prune_text(self):
+        """Removes the objects no longer stored from the text index."""
+        for key in self.__text.keys():
+            if key not in self.__objects:
+                self.__text.remove(key)
+
+    def delete(self, obj=None):
+        """Removes an object from the storage if it is present."""
+        if obj is None:  # Nothing to delete
+            return
+        # Construct the key for the object
+        key = obj.__class__.__name__ + "." + obj.id
+        with self.__lock:
+            self.__remember(key)  # Keep its previous state for a rollback
+            if self.__objects.pop(key, None) is not None:
+                # Remember the deletion has to be written on the next save
+                self.__dirty.discard(key)
+                self.__deleted.add(key)
+                self.__cache.pop(key, None)
+                self.__untrack(key)
 
     def save(self):
         """Serializes __objects to the JSON file."""
-        # Create a dictionary to hold the serialized objects
-        serialized_objects = {}
-        for key, obj in self.__objects.items():
-            # Convert each object to a dictionary
-            # and add to serialized_objects
-            serialized_objects[key] = obj.to_dict()
-        # Open the file in write mode and serialize the objects
-        with open(self.__file_path, "w", encoding="utf-8") as file:
-            json.dump(serialized_objects, file, indent=2)
+        if self.__depth:  # Written once when the transaction is committed
+            return
+        if self.__flush_interval > 0:  # Let the background thread write
+            self.__flush_pending.set()
+            if self.__writer is None or not self.__writer.is_alive():
+                self.__writer = threading.Thread(
+                    target=self.__write_in_background, daemon=True)
+                self.__writer.start()
+            return
+        self.__flush()
+
+    def flush(self):
+        """Writes the saves still waiting for the background thread."""
+        if self.__flush_pending.is_set():
+            self.__flush_pending.clear()
+            self.__flush()
+        else:
+            # Wait for a write the background thread may have started
+            with self.__write_lock:
+                pass
+
+    def __write_in_background(self):
+        """Writes the file shortly after each burst of save() calls."""
+        while True:
+            self.__flush_pending.wait()
+            # Let the saves made in the next moments join this write
+            clock.sleep(self.__flush_interval)
+            if self.__flush_pending.is_set():  # Not flushed meanwhile
+                self.__flush_pending.clear()
+                self.__flush()
+
+    def __flush(self):
+        """Writes the changes to the file, one write at a time."""
+        with self.__write_lock, self.__file_lock(exclusive=True):
+            # Merge what other processes saved first, so it is kept
+            with self.__lock:
+                self.__refresh()
+            if self.__journal:  # Only append the changes to the log
+                self.__append_log()
+                # Fold the log back into the snapshot once it is too long
+                if self.__log_size >= self.__compact_threshold:
+                    self.__compact()
+            else:
+                self.__write_snapshot()
+                self.__generation = self.__stat()
+            # Save the text index too once a search built it, so that
+            # the next process only splits the texts changed since
+            self.__write_text()
+
+    @contextmanager
+    def __file_lock(self, exclusive):
+        """
+        Locks the file against the other processes using it: saves take
+        an exclusive lock, reads a shared one.
+        Args:
+            exclusive (bool): Whether to take the lock exclusively.
+        """
+        if fcntl is None:  # No locking on this system
+            yield
+            return
+        # Lock a file next to the snapshot, which is replaced by saves;
+        # readers do not create it: until a save does, there is nothing
+        # a save could be writing while they read
+        flags = os.O_RDWR | os.O_CREAT if exclusive else os.O_RDWR
+        try:
+            descriptor = os.open(self.__file_path + ".lock", flags, 0o644)
+        except FileNotFoundError:  # Never saved, nothing to wait for
+            yield
+            return
+        try:
+            fcntl.flock(descriptor,
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(descriptor)  # Also releases the lock
+
+    @staticmethod
+    def __stat_path(path):
+        """Returns the (inode, mtime, size) of a file, None if missing."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def __stat(self):
+        """Returns the (inode, mtime, size) of the file of every shard."""
+        return {shard: self.__stat_path(self.__shard_path(shard))
+                for shard in self.__shards()}
+
+    def __shards(self):
+        """
+        Returns the shards of the storage: None if it is not sharded,
+        otherwise a (class name, partition) pair per file.
+        """
+        if not self.__sharded:
+            return [None]
+        return [(class_name, partition) for class_name in self.class_dict()
+                for partition in range(self.__partitions)]
+
+    def __shard_of(self, key):
+        """Returns the shard storing a key."""
+        if not self.__sharded:
+            return None
+        class_name, obj_id = key.split(".", 1)
+        if self.__partitions == 1:
+            return (class_name, 0)
+        return (class_name, partition_of(obj_id, self.__partitions))
+
+    def __shard_path(self, shard):
+        """Returns the file of a shard, e.g. file.User.json."""
+        if shard is None:
+            return self.__file_path
+        return shard_path(self.__file_path, shard[0], shard[1],
+                          self.__partitions)
+
+    def refresh(self):
+        """
+        Merges the changes saved by other processes since this storage
+        last read or wrote the file. Nothing is read if the file did not
+        change, only the new log records are read in journaled mode,
+        and only the records that changed are instantiated again.
+        Objects changed here and not saved yet are kept as they are.
+        """
+        with self.__file_lock(exclusive=False), self.__lock:
+            self.__refresh()
+
+    def __refresh(self):
+        """Merges the changes of other processes, under the file lock."""
+        changed = [shard for shard, stat in self.__stat().items()
+                   if stat != self.__generation.get(shard)]
+        if changed:
+            self.__read(changed)  # Only read the rewritten files
+        elif self.__journal:
+            self.__read_log()  # Only new records may have been appended
+
+    def begin(self):
+        """
+        Starts a transaction: save() does nothing until commit(), and
+        rollback() restores the objects changed since begin().
+        Transactions can be nested, only the outermost one is written.
+        Raises:
+            RuntimeError: In thread-safe mode, where the transaction
+            would include the changes of the other threads.
+        """
+        if self.__thread_safe:
+            raise RuntimeError(
+                "Transactions are not supported in thread-safe mode")
+        with self.__lock:  # Other threads, such as the flush thread
+            self.__depth += 1
+            if self.__depth > 1:  # Nested in an open transaction
+                return
+            # Objects changed before the transaction have no cached form
+            # that matches their current state, serialize them now
+            self.__undo = {}
+            for key in self.__dirty:
+                obj = dict.get(self.__objects, key)
+                if obj is not None:
+                    self.__undo[key] = (obj.to_dict(), True, obj)
+            for key in self.__deleted:
+                self.__undo[key] = (None, True, None)
+
+    def commit(self):
+        """Ends the current transaction, writing its changes once."""
+        with self.__lock:
+            if not self.__depth:
+                raise RuntimeError("No transaction in progress")
+            self.__depth -= 1
+            if self.__depth:  # Nested, written with the outermost one
+                return
+            self.__undo = None
+        self.save()
+
+    def rollback(self):
+        """
+        Cancels the current transaction, including the nested ones.
+        The objects changed or deleted since begin() get their previous
+        attributes back in place, so references kept to them stay the
+        stored instances.
+        """
+        with self.__lock:
+            if not self.__depth:
+                raise RuntimeError("No transaction in progress")
+            for key, (data, dirty, obj) in self.__undo.items():
+                if data is None:  # The key did not exist before
+                    if dict.get(self.__objects, key) is not None:
+                        dict.pop(self.__objects, key)
+                        self.__untrack(key)
+                        self.__cache.pop(key, None)
+                    self.__dirty.discard(key)
+                    if dirty:  # Deleted before the transaction
+                        self.__deleted.add(key)
+                    continue
+                self.__restore(key, data, obj)  # Previous state
+                self.__deleted.discard(key)
+                if dirty:  # Changed before the transaction and not saved
+                    self.__dirty.add(key)
+            self.__depth = 0
+            self.__undo = None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups changes into a single save: the transaction is committed
+        when the block ends, or rolled back if it raises an exception.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def __remember(self, key):
+        """Keeps the saved state of a key before its first change."""
+        if self.__undo is None or key in self.__undo:
+            return  # No transaction, or the key was already changed
+        obj = dict.get(self.__objects, key)
+        if obj is None:  # The key is new
+            self.__undo[key] = (None, False, None)
+        elif type(obj) is dict:  # Raw record of lazy mode
+            self.__undo[key] = (obj, False, None)
+        else:
+            cached = self.__cache.get(key)
+            if cached is not None and cached[0] is obj:
+                self.__undo[key] = (cached[1], False, obj)
+            else:  # Not serialized yet, use its current state
+                self.__undo[key] = (obj.to_dict(), False, obj)
+
+    def __restore(self, key, data, obj):
+        """
+        Stores the state a key had before the transaction, resetting the
+        attributes of the instance it held then instead of building a
+        new one, so that references to it stay valid.
+        Args:
+            key (str): The key of the object.
+            data (dict): Its serialized state before the transaction.
+            obj (BaseModel): The instance it held, None if it was a raw
+            record or its class has changed since.
+        """
+        if obj is None or \
+                type(obj) is not BaseModel.registry.get(data["__class__"]):
+            self.__load(key, data)  # Nothing to keep, load the record
+            return
+        if isinstance(obj, BaseModel):
+            vars(obj).clear()
+        else:  # Compact models build __dict__ on each access
+            for name in vars(obj):
+                delattr(obj, name)
+        # Loading does not mark the instance as changed
+        type(obj).__init__(obj, **data)
+        self.__cache[key] = (obj, data)  # Its serialized form
+        self.__objects[key] = obj
+        self.__track(key, obj)  # Add it to its class bucket and indexes
+        self.__dirty.discard(key)
+
+    def compact(self):
+        """Writes a full snapshot and truncates the change log."""
+        with self.__write_lock, self.__file_lock(exclusive=True):
+            with self.__lock:
+                self.__refresh()
+            self.__compact()
+
+    def __compact(self):
+        """Writes a full snapshot and truncates the log, under the lock."""
+        self.__write_snapshot(full=True)
+        if self.__journal:
+            # The snapshot now holds every change, so empty the log;
+            # replaying it again after a crash would be harmless
+            with open(self.__log_path(), "w", encoding="utf-8"):
+                pass
+            self.__log_size = 0
+            self.__log_offset = 0
+        self.__generation = self.__stat()
+        self.__write_text()
+
+    @staticmethod
+    def __atomic_write(path, write, binary=False):
+        """
+        Replaces a file without ever leaving it half written: the content
+        goes to a temporary file that is synced and renamed over path.
+        Args:
+            path (str): The file to replace.
+            write (callable): Called with the open temporary file.
+            binary (bool): Whether to open the file in binary mode.
+        """
+        temp_path = path + ".tmp"
+        if binary:
+            file = open(temp_path, "wb")
+        else:
+            file = open(temp_path, "w", encoding="utf-8")
+        with file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())  # The content is on disk
+        os.replace(temp_path, path)  # Atomic on POSIX and Windows
+        try:
+            # Make the rename itself durable
+            directory = os.open(os.path.dirname(os.path.abspath(path)),
+                                os.O_RDONLY)
+        except OSError:  # Directories cannot be opened on this system
+            return
+        try:
+            os.fsync(directory)
+        except OSError:
+            pass
+        finally:
+            os.close(directory)
+
+    def __log_path(self):
+        """Returns the path of the change log next to the JSON file."""
+        return self.__file_path + ".log"
+
+    def __append_log(self):
+        """Appends one compact record per changed or deleted object."""
+        with self.__lock:
+            if not self.__dirty and not self.__deleted:  # Nothing changed
+                return
+            records = []  # Log records
+            for key in self.__dirty:
+                obj = self.__objects.get(key)
+                if obj is not None:
+                    records.append({"op": "set", "key": key,
+                                    "data": self.__serialize(key, obj)})
+            for key in self.__deleted:
+                records.append({"op": "del", "key": key})
+            dirty, deleted = set(self.__dirty), set(self.__deleted)
+            self.__dirty.clear()
+            self.__deleted.clear()
+        lines = [json.dumps(record, separators=(",", ":"))
+                 for record in records]
+        text = "\n".join(lines) + "\n"
+        try:
+            # Append the records to the log, one JSON document per line
+            with open(self.__log_path(), "a", encoding="utf-8") as file:
+                file.write(text)
+                file.flush()
+                os.fsync(file.fileno())  # The records are on disk
+        except BaseException:
+            with self.__lock:  # Keep the changes for the next save
+                self.__dirty |= dirty - self.__deleted
+                self.__deleted |= deleted - self.__dirty
+            raise
+        self.__log_size += len(lines)
+        # The log was read up to its end before appending
+        self.__log_offset += len(text.encode("utf-8"))
+
+    def __read_log(self, seen=None):
+        """
+        Applies the records appended to the change log since it was
+        last read.
+        Args:
+            seen (set): Keys found in the snapshot, updated with the
+            keys the log sets and deletes.
+        """
+        try:
+            with open(self.__log_path(), "rb") as file:
+                file.seek(self.__log_offset)
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last record from an interrupted append
+                        break
+                    key = record["key"]
+                    if record["op"] == "set":
+                        self.__merge(key, record["data"])
+                        if seen is not None:
+                            seen.add(key)
+                    else:
+                        self.__merge_delete(key)
+                        if seen is not None:
+                            seen.discard(key)
+                    self.__log_size += 1
+                    self.__log_offset += len(line)
+        except FileNotFoundError:
+            # No log yet, the snapshot is up to date
+            pass
+
+    def __serialize(self, key, obj):
+        """
+        Returns the dictionary form of a stored object.
+        The result of to_dict() is cached and reused until the object
+        is marked dirty again, so a save only converts changed objects.
+        """
+        if type(obj) is dict:  # Raw record, already serialized
+            return obj
+        cached = self.__cache.get(key)
+        if cached is not None and cached[0] is obj \
+                and key not in self.__dirty:
+            return cached[1]  # Unchanged since it was last serialized
+        data = obj.to_dict()  # Convert the changed object
+        self.__cache[key] = (obj, data)
+        return data
+
+    def __write_snapshot(self, full=False):
+        """
+        Writes every object in __objects to the JSON file.
+        Args:
+            full (bool): Whether to rewrite every shard, instead of only
+            the shards with changes, when the storage is sharded.
+        """
+        if self.__sharded:
+            self.__write_shards(full)
+            return
+        if self.__streaming and self.__serializer is None:
+            with self.__lock:
+                # Serialize and write the objects one at a time
+                self.__atomic_write(
+                    self.__file_path,
+                    lambda file: json_stream.dump_entries(
+                        ((key, self.__serialize(key, obj))
+                         for key, obj in dict.items(self.__objects)), file))
+                self.__dirty.clear()
+                self.__deleted.clear()
+            return
+        with self.__lock:
+            # Create a dictionary to hold the serialized objects
+            serialized_objects = {}
+            # dict.items() reads raw records without loading them
+            for key, obj in dict.items(self.__objects):
+                # Convert each object to a dictionary
+                # and add to serialized_objects
+                serialized_objects[key] = self.__serialize(key, obj)
+            self.__dirty.clear()
+            self.__deleted.clear()
+        # Encode and write the file without blocking other threads; the
+        # snapshot is complete even if the write fails, so a failed
+        # write is simply redone by the next save
+        if self.__serializer is not None:
+            self.__atomic_write(
+                self.__file_path,
+                lambda file: self.__serializer.dump(
+                    serialized_objects.items(), file), binary=True)
+            return
+        self.__atomic_write(
+            self.__file_path,
+            lambda file: json.dump(serialized_objects, file, indent=2))
+
+    def __write_shards(self, full):
+        """Writes the files of the changed shards, or of all shards."""
+        with self.__lock:
+            self.__sync_indexes()  # The shard buckets list the keys
+            dirty, deleted = set(self.__dirty), set(self.__deleted)
+            if full:
+                shards = self.__shards()
+            else:
+                shards = {self.__shard_of(key) for key in dirty | deleted}
+            contents = {}  # Shard -> its serialized objects
+            for shard in shards:
+                contents[shard] = {
+                    key: self.__serialize(key, dict.get(self.__objects, key))
+                    for key in self.__by_shard.get(shard, {})}
+            self.__dirty.clear()
+            self.__deleted.clear()
+        try:
+            for shard, serialized_objects in contents.items():
+                self.__atomic_write(
+                    self.__shard_path(shard),
+                    lambda file: json.dump(serialized_objects, file,
+                                           indent=2))
+        except BaseException:
+            with self.__lock:  # Keep the changes for the next save
+                self.__dirty |= dirty - self.__deleted
+                self.__deleted |= deleted - self.__dirty
+            raise
 
     def reload(self):
-        """Deserializes the JSON file to __objects."""
+        """
+        Deserializes the JSON file to __objects. Objects whose record
+        did not change are kept, objects changed here and not saved yet
+        are not overwritten.
+        """
+        with self.__file_lock(exclusive=False), self.__lock:
+            self.__read()
+
+    def __text_path(self):
+        """Returns the path of the text index next to the JSON file."""
+        return self.__file_path + ".search"
+
+    def __write_text(self):
+        """Saves the text index next to the file if it changed."""
+        with self.__lock:
+            if self.__text is None or not self.__text.changed:
+                return
+            self.__atomic_write(self.__text_path(), self.__text.save)
+
+    def __read(self, shards=None):
+        """
+        Merges the snapshot and the whole change log into __objects.
+        Args:
+            shards (list): The shards to read, all of them if None.
+        """
+        if shards is None:
+            shards = self.__shards()
+        seen = set()  # Keys stored in the file
+        if self.__sharded:
+            self.__read_shards(shards, seen)
+        elif self.__serializer is not None:
+            self.__read_snapshot(seen)
+        else:
+            self.__read_json(seen)
+        if self.__journal:
+            # Apply the changes saved since the last snapshot
+            self.__log_size = 0
+            self.__log_offset = 0
+            self.__read_log(seen)
+        # Drop the saved objects other processes deleted; dict keys are
+        # listed without loading raw records in lazy mode
+        shards = set(shards)
+        for key in [key for key in self.__objects if key not in seen]:
+            if self.__shard_of(key) in shards:
+                self.__merge_delete(key)
+
+    def __read_shards(self, shards, seen):
+        """Reads the files of shards, in parallel processes if several."""
+        paths = []  # Files of the shards that exist
+        for shard in shards:
+            path = self.__shard_path(shard)
+            self.__generation[shard] = self.__stat_path(path)
+            if self.__generation[shard] is not None:
+                paths.append(path)
+        workers = min(self.__workers or 0, len(paths))
+        # A spawned worker imports models, which reloads the storage:
+        # it must not start workers of its own while bootstrapping
+        if workers > 1 and multiprocessing.parent_process() is None:
+            # Forked workers start without importing models again
+            context = None
+            if "fork" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("fork")
+            # The workers parse the files, the objects are built here
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                shard_records = list(pool.map(read_shard, paths))
+        else:
+            shard_records = [read_shard(path) for path in paths]
+        for records in shard_records:
+            for key, value in records.items():
+                self.__merge(key, value)
+                seen.add(key)
+
+    def __read_snapshot(self, seen):
+        """Reads the snapshot written by the serializer into __objects."""
+        self.__generation[None] = None
+        try:
+            with open(self.__file_path, "rb") as file:
+                self.__generation[None] = self.__stat_path(self.__file_path)
+                if os.fstat(file.fileno()).st_size != 0:
+                    for key, value in self.__serializer.load(file):
+                        self.__merge(key, value)
+                        seen.add(key)
+        except FileNotFoundError:
+            # If the file does not exist, do nothing
+            pass
+
+    def __read_json(self, seen):
+        """Reads the JSON file into __objects."""
+        self.__generation[None] = None
         try:
             # Open the file in read mode
             with open(self.__file_path, "r+", encoding="utf-8") as file:
+                self.__generation[None] = self.__stat_path(self.__file_path)
                 # Check if the file is empty
-                if os.stat(self.__file_path).st_size == 0:
-                    return
-                # Read the JSON data from the file
-                file.seek(0)
-                data = json.load(file)
-                # Convert the JSON data back to objects
-                for key, value in data.items():
-                    self.__objects[key] = eval(value["__class__"])(**value)
+                if os.stat(self.__file_path).st_size != 0:
+                    # Read the JSON data from the file
+                    file.seek(0)
+                    if self.__streaming:
+                        # Parse and convert one entry at a time
+                        data = json_stream.iter_entries(file)
+                    else:
+                        data = json.load(file).items()
+                    # Convert the JSON data back to objects
+                    for key, value in data:
+                        self.__merge(key, value)
+                        seen.add(key)
         except FileNotFoundError:
             # If the file does not exist, do nothing
             pass
 
+    def __merge(self, key, data):
+        """
+        Stores a record read from the file, unless the object was changed
+        here since the last save or the record did not change.
+        """
+        if key in self.__dirty or key in self.__deleted:
+            return  # The local change wins and is written on next save
+        current = dict.get(self.__objects, key)
+        if type(current) is dict:  # Raw record in lazy mode
+            if current == data:
+                return
+        elif current is not None:
+            cached = self.__cache.get(key)
+            if cached is not None and cached[0] is current and \
+                    cached[1] == data:
+                return  # Same record, keep the instance
+        self.__load(key, data)
+
+    def __merge_delete(self, key):
+        """Drops an object deleted from the file, unless changed here."""
+        if key in self.__dirty:
+            return  # The local change wins and is written on next save
+        current = dict.get(self.__objects, key)
+        if current is None:
+            return
+        cached = self.__cache.get(key)
+        if type(current) is dict or \
+                (cached is not None and cached[0] is current):
+            # A copy of a saved record, not an object only known here
+            dict.pop(self.__objects, key)
+            self.__untrack(key)
+            self.__cache.pop(key, None)
+
+    def __load(self, key, data):
+        """Stores a record read from the file under its key."""
+        if self.__lazy:
+            obj = data  # Keep the raw record until it is first accessed
+        else:
+            obj = self.__hydrate(key, data)
+        self.__objects[key] = obj
+        self.__track(key, obj)  # Add it to its class bucket and indexes
+        self.__dirty.discard(key)
+
+    def __hydrate(self, key, data):
+        """Returns the instance described by a raw record."""
+        # Look the class up in the registry filled by BaseModel
+        obj = BaseModel.registry[data["__class__"]](**data)
+        # The file already holds the serialized form
+        self.__cache[key] = (obj, data)
+        return obj
+
     def class_dict(self):
         """Returns a dictionary of class names
         and their corresponding classes."""
-        class_dict = {
-            "BaseModel": BaseModel,
-            "User": User,
-            "State": State,
-            "City": City,
-            "Amenity": Amenity,
-            "Place": Place,
-            "Review": Review,
-        }
-        return class_dict
+        # Every BaseModel subclass registers itself when it is defined
+        return dict(BaseModel.registry)
 
     def attribute_dict(self):
         """Returns the valid attributes and their types for each class."""
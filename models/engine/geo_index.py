@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+"""Defines the GridIndex class used by the storage engines for places."""
+
+import heapq  # Import heapq to keep only the nearest objects
+import math  # Import math for the distances on the sphere
+
+EARTH_RADIUS_KM = 6371.0088  # Mean radius of the Earth
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180  # Along a meridian
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points.
+    Args:
+        lat1 (float): Latitude of the first point, in degrees.
+        lon1 (float): Longitude of the first point, in degrees.
+        lat2 (float): Latitude of the second point, in degrees.
+        lon2 (float): Longitude of the second point, in degrees.
+    Returns:
+        float: The distance in kilometers (haversine formula).
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlambda = math.radians(lon2 - lon1) / 2
+    a = math.sin(half_dphi) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(half_dlambda) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def in_box(lat, lon, south, west, north, east):
+    """
+    Returns whether a point is inside a bounding box. A box whose west
+    side is east of its east side crosses the antimeridian.
+    """
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def position(lat, lon):
+    """Returns (lat, lon) as floats, or None if they are not numbers."""
+    if isinstance(lat, bool) or isinstance(lon, bool):
+        return None
+    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+        return None
+    if not -90 <= lat <= 90 or not math.isfinite(lon):
+        return None
+    return float(lat), float(lon)
+
+
+def nearest(points, lat, lon, radius_km, limit=None):
+    """
+    Returns the points within a distance of a center, nearest first.
+    Args:
+        points (iterable): The (key, lat, lon) of the points to check.
+        lat (float): Latitude of the center.
+        lon (float): Longitude of the center.
+        radius_km (float): Maximum distance in kilometers.
+        limit (int): Maximum number of points, None for all.
+    Returns:
+        list: The (distance in km, key) pairs, nearest first.
+    """
+    found = []
+    for key, point_lat, point_lon in points:
+        distance = distance_km(lat, lon, point_lat, point_lon)
+        if distance <= radius_km:
+            found.append((distance, key))
+    if limit is not None:
+        return heapq.nsmallest(limit, found)
+    return sorted(found)
+
+
+class GridIndex:
+    """
+    Spatial index of the objects of one class: the map is cut into
+    cells of a fixed number of degrees, and each cell holds the keys of
+    the objects located in it, so a search only checks the cells that
+    overlap the searched area instead of every object.
+
+    Attributes:
+        fields (tuple): The names of the latitude and longitude
+        attributes.
+    """
+
+    def __init__(self, fields=("latitude", "longitude"), cell_degrees=0.5):
+        """
+        Initialize an empty index.
+        Args:
+            fields (tuple): The names of the latitude and longitude
+            attributes.
+            cell_degrees (float): The size of a cell, in degrees.
+        """
+        self.fields = fields  # Names of the coordinate attributes
+        self.__size = cell_degrees  # Size of a cell in degrees
+        self.__rows = math.ceil(180 / cell_degrees)  # Cells from S to N
+        self.__columns = math.ceil(360 / cell_degrees)  # From W to E
+        self.__cells = {}  # (row, column) -> {key: (lat, lon)}
+        self.__positions = {}  # Object key -> (row, column)
+
+    def __len__(self):
+        """Returns the number of indexed objects."""
+        return len(self.__positions)
+
+    def __cell(self, lat, lon):
+        """Returns the (row, column) of the cell holding a point."""
+        row = min(int((lat + 90) // self.__size), self.__rows - 1)
+        column = int((lon + 180) // self.__size) % self.__columns
+        return row, column
+
+    def add(self, key, lat, lon):
+        """
+        Adds or moves an object key to its position. Objects whose
+        coordinates are not numbers are not indexed.
+        """
+        point = position(lat, lon)
+        self.remove(key)  # Drop the entry of the old position
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        self.__cells.setdefault(cell, {})[key] = point
+        self.__positions[key] = cell
+
+    def remove(self, key):
+        """Removes an object key from the index."""
+        cell = self.__positions.pop(key, None)
+        if cell is None:  # Key is not indexed
+            return
+        keys = self.__cells[cell]
+        del keys[key]
+        if not keys:  # Drop empty cells
+            del self.__cells[cell]
+
+    def clear(self):
+        """Removes every entry from the index."""
+        self.__cells.clear()
+        self.__positions.clear()
+
+    def __points(self, south, west, north, east):
+        """Yields the (key, lat, lon) of the cells overlapping a box."""
+        first_row, _ = self.__cell(max(south, -90), 0)
+        last_row, _ = self.__cell(min(north, 90), 0)
+        if east - west >= 360:  # Every longitude
+            columns = range(self.__columns)
+        else:
+            first = int((west + 180) // self.__size)
+            last = int((east + 180) // self.__size)
+            if last < first:  # Crosses the antimeridian
+                last += self.__columns
+            columns = range(first, min(last, first + self.__columns - 1) + 1)
+        rows = range(first_row, last_row + 1)
+        if len(rows) * len(columns) > len(self.__cells):
+            # Fewer cells are used than covered: check the used ones
+            wanted_rows = set(rows)
+            wanted_columns = {column % self.__columns for column in columns}
+            cells = [cell for cell in self.__cells
+                     if cell[0] in wanted_rows and cell[1] in wanted_columns]
+        else:
+            cells = [(row, column % self.__columns)
+                     for row in rows for column in columns]
+        for cell in cells:
+            for key, (lat, lon) in self.__cells.get(cell, {}).items():
+                yield key, lat, lon
+
+    def box(self, south, west, north, east):
+        """
+        Returns the keys of the objects inside a bounding box.
+        Args:
+            south (float): Minimum latitude.
+            west (float): Minimum longitude, larger than east if the box
+            crosses the antimeridian.
+            north (float): Maximum latitude.
+            east (float): Maximum longitude.
+        Returns:
+            list: The matching keys.
+        """
+        return [key for key, lat, lon in
+                self.__points(south, west, north, east)
+                if in_box(lat, lon, south, west, north, east)]
+
+    def nearby(self, lat, lon, radius_km, limit=None):
+        """
+        Returns the keys of the objects within a distance of a point.
+        Args:
+            lat (float): Latitude of the center.
+            lon (float): Longitude of the center.
+            radius_km (float): Maximum distance in kilometers.
+            limit (int): Maximum number of objects, None for all.
+        Returns:
+            list: The (distance in km, key) pairs, nearest first.
+        """
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = lat - dlat, lat + dlat
+        # A degree of longitude shrinks with the cosine of the latitude,
+        # take the widest of the box; near a pole check every longitude
+        widest = max(abs(south), abs(north))
+        if widest >= 90:
+            west, east = -180, 180
+        else:
+            dlon = dlat / math.cos(math.radians(widest))
+            west, east = lon - dlon, lon + dlon
+            if dlon >= 180:
+                west, east = -180, 180
+        return nearest(self.__points(south, west, north, east),
+                       lat, lon, radius_km, limit)
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""
+Streaming reader and writer for the JSON file of FileStorage.
+
+The file holds a single JSON object mapping "<class name>.<id>" keys
+to the dictionaries of the objects. These functions handle it one
+entry at a time, so memory use does not depend on the size of the file.
+"""
+
+import json  # Import the json module to decode and encode single entries
+
+# Decoder used to parse one key or one value at a time
+_decoder = json.JSONDecoder()
+WHITESPACE = " \t\n\r"  # Characters allowed between JSON tokens
+
+
+class _Buffer:
+    """Window over the part of a file that has been read but not parsed."""
+
+    def __init__(self, file, chunk_size):
+        """
+        Initialize the buffer.
+        Args:
+            file (file): The file to read from.
+            chunk_size (int): Number of characters read at a time.
+        """
+        self.file = file  # File being parsed
+        self.chunk_size = chunk_size  # Characters read at a time
+        self.text = ""  # Characters read but not parsed yet
+        self.pos = 0  # Position of the next character to parse
+        self.eof = False  # Whether the whole file has been read
+
+    def fill(self):
+        """Reads the next chunk, dropping the parsed characters first."""
+        chunk = self.file.read(self.chunk_size)
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """Returns the next character that is not whitespace, or ""."""
+        while True:
+            while self.pos < len(self.text) and \
+                    self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or self.eof:
+                return self.text[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char):
+        """Consumes the given character or raises ValueError."""
+        if self.peek() != char:
+            raise ValueError("Expecting '{}' at offset {} of the chunk"
+                             .format(char, self.pos))
+        self.pos += 1
+
+    def decode(self):
+        """Decodes the next JSON value, reading more text as needed."""
+        self.peek()  # Skip the whitespace before the value
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except ValueError:
+                if self.eof:  # The file really is malformed
+                    raise
+                self.fill()  # The value is cut by the end of the chunk
+                continue
+            self.pos = end
+            return value
+
+
+def iter_entries(file, chunk_size=65536):
+    """
+    Yields the (key, value) pairs of the top-level JSON object of a file.
+    Args:
+        file (file): The file to read, opened in text mode.
+        chunk_size (int): Number of characters read at a time.
+    Raises:
+        ValueError: If the file is not a JSON object.
+    """
+    buffer = _Buffer(file, chunk_size)
+    buffer.expect("{")
+    if buffer.peek() == "}":  # Empty object
+        return
+    while True:
+        key = buffer.decode()  # Each entry is "key": {...}
+        buffer.expect(":")
+        yield key, buffer.decode()
+        if buffer.peek() == "}":  # Last entry
+            return
+        buffer.expect(",")
+
+
+def dump_entries(entries, file):
+    """
+    Writes (key, value) pairs as a JSON object, one entry at a time.
+    The output is the same as json.dump(dict(entries), file, indent=2).
+    Args:
+        entries (iterable): The (key, value) pairs to write.
+        file (file): The file to write to, opened in text mode.
+    """
+    separator = "{"
+    for key, value in entries:
+        # Indent the value one level deeper than the key
+        text = json.dumps(value, indent=2).replace("\n", "\n  ")
+        file.write("{}\n  {}: {}".format(separator, json.dumps(key), text))
+        separator = ","
+    file.write("{}" if separator == "{" else "\n}")
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Defines the LazyObjects dictionary used by FileStorage in lazy mode."""
+
+
+class LazyObjects(dict):
+    """
+    Dictionary of stored objects whose values may still be the raw
+    dictionaries read from the file. A raw record is turned into a
+    model instance the first time its value is read, so objects that
+    are never looked at never cost an instantiation.
+
+    Membership tests, len() and iterating over the keys never
+    instantiate anything. Code that needs the raw records without
+    instantiating them can read them with dict.items(lazy_objects).
+    """
+
+    def __init__(self, loader, *args, lock=None, **kwargs):
+        """
+        Initialize the dictionary.
+        Args:
+            loader (callable): Called as loader(key, record) to build
+            the instance of a raw record.
+            *args: Initial content, as for dict.
+            lock (threading.Lock): If given, held while a record is
+            loaded, so that threads loading the same record at the same
+            time get the same instance.
+            **kwargs: Initial content, as for dict.
+        """
+        super().__init__(*args, **kwargs)
+        self.__loader = loader  # Builds instances from raw records
+        self.__lock = lock  # Serializes the loads between threads
+
+    def __getitem__(self, key):
+        """Returns the instance stored under a key, loading it if needed."""
+        value = super().__getitem__(key)
+        if type(value) is dict:  # Raw record not loaded yet
+            if self.__lock is None:
+                value = self.__loader(key, value)
+                super().__setitem__(key, value)
+                return value
+            with self.__lock:
+                value = super().__getitem__(key)
+                if type(value) is dict:  # Not loaded by another thread
+                    value = self.__loader(key, value)
+                    super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        """Returns the instance stored under a key, or default."""
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *default):
+        """Removes a key and returns its instance."""
+        if key in self:
+            value = self[key]  # Load the instance before removing it
+            super().pop(key)
+            return value
+        return super().pop(key, *default)
+
+    def items(self):
+        """Iterates over the keys and their instances."""
+        for key in list(self):
+            yield key, self[key]
+
+    def values(self):
+        """Iterates over the instances."""
+        for key in list(self):
+            yield self[key]
+
+    def snapshot(self):
+        """
+        Returns a copy of the dictionary. Records loaded through the
+        copy are loaded in this dictionary too, or taken from it if it
+        loaded them first, so both hold the same instances.
+        """
+        def load(key, record):
+            """Loads a record of the copy."""
+            if dict.get(self, key) is not None:  # Still stored here
+                try:  # Same instance, even if it was loaded since
+                    return self[key]
+                except KeyError:  # Removed meanwhile
+                    pass
+            return self.__loader(key, record)  # Removed since
+        # Loads are serialized by this dictionary, the copy needs no lock
+        return LazyObjects(load, dict.items(self))
+
+    def loaded(self):
+        """Returns the number of records already turned into instances."""
+        return sum(1 for value in super().values() if type(value) is not dict)
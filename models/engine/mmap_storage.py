@@ -0,0 +1,359 @@
+#!/usr/bin/python3
+"""Defines the MmapStorage class, a read-only view of a FileStorage file."""
+
+import json  # Import the json module to decode single records
+import mmap  # Import mmap to share the file through the page cache
+import re  # Import re to find the records in the file
+import weakref  # Import weakref to cache decoded objects without pinning them
+from collections.abc import Mapping  # Import Mapping for the object views
+from models.base_model import BaseModel  # Import the class registry
+from models.engine.file_storage import FileStorage  # Import the schema
+from models.engine import analytics  # NumPy columns
+from models.engine.geo_index import in_box, nearest, position  # Places
+from models.engine.query import Query, attribute_types  # Searches
+from models.engine import text_index  # Full-text search
+
+# Top-level keys of a file written by FileStorage: json.dump with indent=2
+# puts each of them at the start of a line indented by two spaces, while
+# the attributes of the records are indented by four
+KEY_PATTERN = re.compile(rb'\n  ("(?:[^"\\]|\\.)*"): ')
+
+
+class MmapObjects(Mapping):
+    """
+    Read-only dictionary of the objects of an MmapStorage. Only the
+    offsets of the records are kept, a record is decoded when its value
+    is read.
+    """
+
+    def __init__(self, storage, offsets):
+        """
+        Initialize the view.
+        Args:
+            storage (MmapStorage): The storage decoding the records.
+            offsets (dict): Key -> (start, end) of the records in the file.
+        """
+        self.__storage = storage  # Decodes the records
+        self.__offsets = offsets  # Where each record is in the file
+
+    def __getitem__(self, key):
+        """Returns the object stored under a key, decoding it if needed."""
+        return self.__storage.load(key, self.__offsets[key])
+
+    def __contains__(self, key):
+        """Returns whether a key is stored, without decoding anything."""
+        return key in self.__offsets
+
+    def __iter__(self):
+        """Iterates over the keys."""
+        return iter(self.__offsets)
+
+    def __len__(self):
+        """Returns the number of objects."""
+        return len(self.__offsets)
+
+
+class MmapStorage:
+    """
+    Serves the objects of a file written by FileStorage without loading
+    them: the file is memory-mapped, so every process reading it shares
+    the same pages, and only an index of record offsets is built. A
+    record is decoded when it is accessed and kept only while in use.
+
+    The storage is read-only: new(), delete(), save() and the
+    transactions raise a RuntimeError, and changes made to the returned
+    objects are not saved.
+    """
+    __file_path = "file.json"  # Path to the JSON file
+
+    def __init__(self, file_path=None):
+        """
+        Initialize the storage engine.
+        Args:
+            file_path (str): Path to the JSON file, "file.json" by default.
+        """
+        if file_path is not None:
+            self.__file_path = file_path
+        # The class and attribute tables are shared with FileStorage
+        self.__file_storage = FileStorage()
+        self.__map = None  # Memory map of the file
+        self.__offsets = {}  # Key -> (start, end) of the record
+        self.__by_class = {}  # Class name -> {key: (start, end)}
+        # Objects decoded and still in use, key -> object
+        self.__objects = weakref.WeakValueDictionary()
+
+    def reload(self):
+        """Maps the file again and rebuilds the index of the records."""
+        self.close()
+        try:
+            with open(self.__file_path, "rb") as file:
+                self.__map = mmap.mmap(file.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            # If the file does not exist, serve no objects
+            return
+        except ValueError:  # The file is empty
+            return
+        self.__index()
+
+    def __index(self):
+        """Finds the offset of every record of the mapped file."""
+        view = self.__map
+        keys = list(KEY_PATTERN.finditer(view))
+        if not keys and view[:].strip() not in (b"{}", b""):
+            raise ValueError("{} was not written by FileStorage".format(
+                self.__file_path))
+        for number, match in enumerate(keys):
+            if number + 1 < len(keys):
+                # The record ends before the "," preceding the next key
+                end = keys[number + 1].start() - 1
+            else:
+                # The last record ends before the "}" closing the file
+                end = view.rfind(b"}")
+            key = json.loads(match.group(1))
+            offsets = (match.end(), end)
+            self.__offsets[key] = offsets
+            self.__by_class.setdefault(
+                key.split(".", 1)[0], {})[key] = offsets
+
+    def load(self, key, offsets):
+        """
+        Returns the object of a record, decoding it if it is not in use.
+        Args:
+            key (str): The key of the record.
+            offsets (tuple): The start and end of the record in the file.
+        Returns:
+            BaseModel: The object stored in the record.
+        """
+        obj = self.__objects.get(key)
+        if obj is None:
+            data = json.loads(self.__map[offsets[0]:offsets[1]])
+            obj = BaseModel.registry[data["__class__"]](**data)
+            self.__objects[key] = obj
+        return obj
+
+    def all(self, cls=None):
+        """
+        Returns the objects in the storage, decoded when accessed.
+        Args:
+            cls (type or str): Only return instances of this class.
+        Returns:
+            Mapping: The matching objects keyed by "<class name>.<id>".
+        """
+        if cls is None:
+            return MmapObjects(self, self.__offsets)
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        return MmapObjects(self, self.__by_class.get(class_name, {}))
+
+    def get(self, cls, obj_id):
+        """
+        Returns a stored object from its class and id.
+        Args:
+            cls (type or str): The class of the object.
+            obj_id (str): The id of the object.
+        Returns:
+            BaseModel: The object, or None if it is not stored.
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        key = class_name + "." + obj_id
+        offsets = self.__offsets.get(key)
+        return None if offsets is None else self.load(key, offsets)
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored objects, without decoding them.
+        Args:
+            cls (type or str): Only count the instances of this class.
+        Returns:
+            int: The number of objects.
+        """
+        return len(self.all(cls))
+
+    def query(self, cls, order_by=(), limit=None, offset=0, fields=None,
+              **conditions):
+        """
+        Searches the instances of a class, see models.engine.query.Query
+        for the conditions. Every record of the class is decoded to test
+        the conditions.
+        Args:
+            cls (type or str): The class of the objects to search.
+            order_by (str or list): Attributes to sort by, each prefixed
+            with "-" for a descending order.
+            limit (int): Maximum number of results, None for all.
+            offset (int): Number of results to skip.
+            fields (list): If given, yield dictionaries of these
+            attributes instead of the objects.
+            **conditions: Conditions such as price_by_night__lt=100.
+        Returns:
+            generator: The results.
+        Raises:
+            ValueError: If an attribute, operator or page is invalid.
+        """
+        class_name = cls if isinstance(cls, str) else cls.__name__
+        types = attribute_types(self.attribute_dict(), class_name)
+        query = Query(types, conditions, order_by, limit, offset, fields)
+        records = self.all(cls).items()
+        return query.select(
+            records, lambda obj, field: getattr(obj, field, None),
+            lambda key, obj: obj)
+
+    def nearby(self, lat, lon, radius_km, limit=None, cls="Place"):
+        """
+        Returns the objects within a distance of a point, nearest first,
+        decoding every record of the class.
+        Args:
+            lat (float): Latitude of the center, in degrees.
+            lon (float): Longitude of the center, in degrees.
+            radius_km (float): Maximum distance in kilometers.
+            limit (int): Maximum number of objects, None for all.
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            list: The (object, distance in km) pairs.
+        """
+        objects = self.all(cls)
+        found = nearest(self.__positions(objects), lat, lon, radius_km,
+                        limit)
+        return [(objects[key], distance) for distance, key in found]
+
+    def bbox(self, south, west, north, east, cls="Place"):
+        """
+        Returns the objects inside a bounding box.
+        Args:
+            south (float): Minimum latitude.
+            west (float): Minimum longitude, larger than east if the box
+            crosses the antimeridian.
+            north (float): Maximum latitude.
+            east (float): Maximum longitude.
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        objects = self.all(cls)
+        return {key: objects[key]
+                for key, lat, lon in self.__positions(objects)
+                if in_box(lat, lon, south, west, north, east)}
+
+    def search(self, text, cls=None, limit=10):
+        """
+        Returns the objects whose text attributes best match the words
+        of a text, decoding every record of the classes with texts to
+        index their words.
+        Args:
+            text (str): The words to search.
+            cls (type or str): Only search the instances of this class.
+            limit (int): Maximum number of results, None for all.
+        Returns:
+            list: The (object, score) pairs, best first.
+        """
+        objects = {}  # Objects of the classes with texts
+        for class_name in text_index.TEXT_FIELDS if cls is None else [cls]:
+            objects.update(self.all(class_name))
+        index = text_index.build(objects)
+        return [(objects[key], score)
+                for key, score in index.search(text, limit=limit)]
+
+    @staticmethod
+    def __positions(objects):
+        """Yields the (key, lat, lon) of the objects with coordinates."""
+        for key, obj in objects.items():
+            point = position(getattr(obj, "latitude", None),
+                             getattr(obj, "longitude", None))
+            if point is not None:
+                yield (key,) + point
+
+    def columns(self, cls="Place"):
+        """
+        Returns the NumPy columns of the numeric and foreign key
+        attributes of a class; every record of the class is decoded
+        to build them, and later changes are not reflected.
+        Args:
+            cls (type or str): The class of the objects, Place by default.
+        Returns:
+            Columns: The columns, see models.engine.analytics.
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        return analytics.build(self, cls)
+
+    def filter(self, cls, **eq):
+        """
+        Returns the instances of a class whose attributes equal the
+        given values. Every record of the class is decoded.
+        Args:
+            cls (type or str): The class of the objects to return.
+            **eq: Attribute names and the values they must equal.
+        Returns:
+            dict: The matching objects keyed by "<class name>.<id>".
+        """
+        return {key: obj for key, obj in self.all(cls).items()
+                if all(getattr(obj, field, None) == value
+                       for field, value in eq.items())}
+
+    def related(self, cls, field, ids):
+        """
+        Returns the instances of a class referring to each of several
+        objects, such as the cities of a page of states. The records of
+        the class are decoded once for all the ids.
+        Args:
+            cls (type or str): The class of the referring objects.
+            field (str): Their attribute holding the id, e.g. "state_id".
+            ids (iterable): The ids of the referred objects.
+        Returns:
+            dict: Each id -> the list of the objects referring to it,
+            sorted by key, empty if there are none.
+        """
+        found = {obj_id: [] for obj_id in ids}  # Id -> referring objects
+        objects = self.all(cls)
+        for key in sorted(objects):
+            value = getattr(objects[key], field, None)
+            try:
+                if value in found:
+                    found[value].append(objects[key])
+            except TypeError:  # Unhashable values, such as lists
+                continue
+        return found
+
+    def mark_dirty(self, obj, name=None):
+        """Ignores changes made to the objects, which are never saved."""
+
+    def new(self, obj):
+        """Refuses to add an object: the storage is read-only."""
+        raise RuntimeError("Storage is read-only")
+
+    def delete(self, obj=None):
+        """Refuses to delete an object: the storage is read-only."""
+        raise RuntimeError("Storage is read-only")
+
+    def save(self):
+        """Refuses to save: the storage is read-only."""
+        raise RuntimeError("Storage is read-only")
+
+    def begin(self):
+        """Refuses to start a transaction: the storage is read-only."""
+        raise RuntimeError("Storage is read-only")
+
+    def commit(self):
+        """Refuses to commit: the storage is read-only."""
+        raise RuntimeError("Storage is read-only")
+
+    def rollback(self):
+        """Refuses to roll back: the storage is read-only."""
+        raise RuntimeError("Storage is read-only")
+
+    def close(self):
+        """Unmaps the file."""
+        self.__offsets = {}
+        self.__by_class = {}
+        self.__objects = weakref.WeakValueDictionary()
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    def class_dict(self):
+        """Returns a dictionary of class names
+        and their corresponding classes."""
+        return self.__file_storage.class_dict()
+
+    def attribute_dict(self):
+        """Returns the valid attributes and their types for each class."""
+        return self.__file_storage.attribute_dict()
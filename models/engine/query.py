@@ -0,0 +1,246 @@
+#!/usr/bin/python3
+"""Defines the Query class used by the storage engines to run queries."""
+
+import heapq  # Import heapq to keep only the first results when sorting
+import operator  # Import operator for the comparison functions
+from datetime import datetime  # Import datetime to compare timestamps
+from models.base_model import parse_datetime  # Import to read timestamps
+
+# Operator suffix of a condition -> function(attribute, expected value)
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "in": lambda value, expected: value in expected,
+    "contains": lambda value, expected: expected in value,
+}
+
+
+def attribute_types(attribute_dict, class_name):
+    """
+    Returns the attributes a query on a class may use.
+    Args:
+        attribute_dict (dict): The result of storage.attribute_dict().
+        class_name (str): The name of the class.
+    Returns:
+        dict: Attribute name -> type, with the BaseModel attributes.
+    """
+    types = dict(attribute_dict["BaseModel"])
+    types.update(attribute_dict.get(class_name, {}))
+    return types
+
+
+def sortable(value):
+    """
+    Returns a sort key for a value that compares with the key of any
+    other value: values of different types, such as a price stored as
+    a number and another stored as text, are grouped by type instead
+    of raising a TypeError.
+    Args:
+        value: The value of an attribute, not None.
+    Returns:
+        tuple: Numbers first, then the other types by name; values of
+        a type without an order compare by their representation.
+    """
+    if isinstance(value, (int, float)):  # bool, int and float compare
+        return (0, "", value)
+    if isinstance(value, (str, datetime)):
+        return (1, type(value).__name__, value)
+    return (1, type(value).__name__, repr(value))
+
+
+class Descending:
+    """Wraps a sort key so that it sorts in reverse order."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        """Wraps a value."""
+        self.value = value  # The wrapped sort key
+
+    def __lt__(self, other):
+        """Returns whether this key sorts first, i.e. the value is larger."""
+        return other.value < self.value
+
+    def __eq__(self, other):
+        """Returns whether the wrapped values are equal."""
+        return self.value == other.value
+
+
+class Query:
+    """
+    Conditions, order and page of a query on the objects of one class.
+
+    Conditions are written like keyword arguments: "name" or
+    "name__eq" for equality, or the attribute name followed by one of
+    __ne, __lt, __le, __gt, __ge, __in (the value is in a list) and
+    __contains (the attribute contains the value). Every attribute must
+    be declared for the class in attribute_dict(). Objects missing an
+    attribute, or whose value cannot be compared, do not match.
+
+    Attributes:
+        equalities (dict): Attribute -> list of accepted values, for the
+        "eq" and "in" conditions, which a storage can look up in its
+        indexes instead of testing every object.
+    """
+
+    def __init__(self, types, conditions, order_by=(), limit=None,
+                 offset=0, fields=None):
+        """
+        Initialize and check a query.
+        Args:
+            types (dict): Attribute name -> type, from attribute_dict(),
+            including the BaseModel attributes.
+            conditions (dict): Condition -> expected value.
+            order_by (str or list): Attributes to sort the results by,
+            each prefixed with "-" for a descending order. Objects
+            missing the attribute come last, and values of different
+            types are sorted by type, numbers first.
+            limit (int): Maximum number of results, None for all.
+            offset (int): Number of results to skip.
+            fields (list): If given, the results are dictionaries of
+            these attributes instead of the objects.
+        Raises:
+            ValueError: If an attribute, operator or page is invalid.
+        """
+        self.__types = types  # Declared type of each attribute
+        self.__conditions = []  # (attribute, function, expected value)
+        self.equalities = {}  # Attribute -> accepted values
+        for condition, expected in conditions.items():
+            field, _, name = condition.partition("__")
+            self.__check(field)
+            name = name or "eq"
+            if name not in OPERATORS:
+                raise ValueError("unknown operator: {}".format(name))
+            if name == "in":
+                if not isinstance(expected, (list, tuple, set, frozenset)):
+                    raise ValueError("{} needs a list".format(condition))
+                expected = [self.__cast(field, value) for value in expected]
+            else:
+                expected = self.__cast(field, expected)
+            if name in ("eq", "in"):
+                values = [expected] if name == "eq" else list(expected)
+                self.equalities[field] = values
+            self.__conditions.append((field, OPERATORS[name], expected))
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        self.__order = []  # (attribute, whether descending)
+        for field in order_by:
+            if not isinstance(field, str):
+                raise ValueError("unknown attribute: {!r}".format(field))
+            descending = field.startswith("-")
+            field = field.lstrip("-")
+            self.__check(field)
+            self.__order.append((field, descending))
+        for number in (limit, offset):
+            if number is not None and \
+                    (not isinstance(number, int) or number < 0):
+                raise ValueError("invalid page: {!r}".format(number))
+        self.__limit = limit  # Maximum number of results
+        self.__offset = offset or 0  # Results to skip
+        if isinstance(fields, str):
+            fields = [fields]
+        for field in fields or ():
+            self.__check(field)
+        self.__fields = fields  # Attributes returned, None for objects
+
+    def __check(self, field):
+        """Raises a ValueError if an attribute is not declared."""
+        if field not in self.__types:
+            raise ValueError("unknown attribute: {}".format(field))
+
+    def __cast(self, field, value):
+        """Converts the value of a condition to the attribute type."""
+        if self.__types[field] is datetime:
+            return self.__normalize(field, value)
+        return value
+
+    def __normalize(self, field, value):
+        """Parses timestamps kept as strings in raw records."""
+        if isinstance(value, str) and self.__types.get(field) is datetime:
+            try:
+                return parse_datetime(value)
+            except ValueError:  # Compared as the string it is
+                return value
+        return value
+
+    def matches(self, record, value):
+        """
+        Returns whether an object meets every condition.
+        Args:
+            record: The object, or its raw record in a lazy storage.
+            value (callable): Called as value(record, attribute) to read
+            an attribute, None if it is missing.
+        Returns:
+            bool: True if the object matches.
+        """
+        for field, function, expected in self.__conditions:
+            actual = self.__normalize(field, value(record, field))
+            try:
+                if actual is None or not function(actual, expected):
+                    return False
+            except TypeError:  # Values that cannot be compared
+                return False
+        return True
+
+    def __sort_key(self, key, record, value):
+        """Returns the tuple the results are sorted by."""
+        sort_key = []
+        for field, descending in self.__order:
+            actual = self.__normalize(field, value(record, field))
+            # Missing values come last whatever the direction
+            sort_key.append(actual is None)
+            actual = None if actual is None else sortable(actual)
+            sort_key.append(Descending(actual) if descending else actual)
+        sort_key.append(key)  # Ties are broken by key for stable pages
+        return tuple(sort_key)
+
+    def select(self, records, value, load):
+        """
+        Yields the results of the query one at a time. Without order_by
+        the objects are neither sorted nor collected: each match is
+        returned as soon as it is found, in the order of records. With
+        order_by, the sort keys of the matches are collected first, and
+        only the first offset + limit of them are kept when a limit is
+        given; objects are loaded only when they are returned.
+        Args:
+            records (iterable): The (key, record) pairs to search.
+            value (callable): Called as value(record, attribute) to read
+            an attribute of a record.
+            load (callable): Called as load(key, record) to get the
+            object of a matching record, None if it was deleted.
+        Yields:
+            BaseModel or dict: The matching objects, or the requested
+            attributes of each of them if fields was given.
+        """
+        matches = ((key, record) for key, record in records
+                   if self.matches(record, value))
+        if self.__order:
+            # Sort the keys and records, not the loaded objects
+            keyed = ((self.__sort_key(key, record, value), key, record)
+                     for key, record in matches)
+            if self.__limit is not None:
+                keyed = heapq.nsmallest(self.__offset + self.__limit, keyed,
+                                        key=operator.itemgetter(0))
+            else:
+                keyed = sorted(keyed, key=operator.itemgetter(0))
+            matches = ((key, record) for _, key, record in keyed)
+        skipped = 0  # Results skipped for the offset
+        returned = 0  # Results returned so far
+        for key, record in matches:
+            if self.__limit is not None and returned >= self.__limit:
+                return
+            if skipped < self.__offset:
+                skipped += 1
+                continue
+            if self.__fields is not None:
+                returned += 1
+                yield {field: self.__normalize(field, value(record, field))
+                       for field in self.__fields}
+                continue
+            obj = load(key, record)
+            if obj is not None:  # Not deleted since the search
+                returned += 1
+                yield obj
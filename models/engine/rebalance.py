@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""
+Changes the number of hash partitions of a sharded FileStorage.
+
+Run it while no process uses the storage:
+    python3 -m models.engine.rebalance file.json <old> <new>
+
+A count of 0 stands for the single file.json of a storage that is not
+sharded, 1 for one file per class (file.User.json) and more for hash
+partitions (file.User.3.json), so the tool also converts between those
+layouts. The new files are written next to the old ones first, the old
+files are then renamed with a .bak suffix while the new ones take their
+place, and the .bak files are removed once every new file is in place.
+"""
+
+import json  # Import the json module to read and write the files
+import os  # Import os to rename and remove the files
+import sys  # Import sys to read the command line
+from models.engine.file_storage import (FileStorage, partition_of,
+                                        read_shard, shard_path)
+
+
+def layout(file_path, partitions):
+    """
+    Returns the files of a storage layout.
+    Args:
+        file_path (str): The file of the storage, e.g. file.json.
+        partitions (int): 0 if not sharded, else partitions per class.
+    Returns:
+        dict: (class name, partition) -> file, {None: file_path} if the
+        storage is not sharded.
+    """
+    if partitions == 0:
+        return {None: file_path}
+    return {(class_name, partition):
+            shard_path(file_path, class_name, partition, partitions)
+            for class_name in FileStorage().class_dict()
+            for partition in range(partitions)}
+
+
+def rebalance(file_path, partitions, new_partitions):
+    """
+    Moves the records of a storage to a new number of partitions.
+    Args:
+        file_path (str): The file of the storage, e.g. file.json.
+        partitions (int): Current partitions per class, 0 if not sharded.
+        new_partitions (int): Partitions per class to move to.
+    Returns:
+        int: The number of records moved.
+    Raises:
+        ValueError: If a record is of a class not in class_dict(), in
+        which case no file is changed.
+    """
+    old_files = layout(file_path, partitions)
+    new_files = layout(file_path, new_partitions)
+    records = {shard: {} for shard in new_files}  # New shard -> records
+    count = 0
+    for path in old_files.values():
+        for key, value in read_shard(path).items():
+            class_name, obj_id = key.split(".", 1)
+            if new_partitions == 0:
+                shard = None
+            else:
+                shard = (class_name, partition_of(obj_id, new_partitions))
+            if shard not in records:
+                raise ValueError("{} is not a known class".format(class_name))
+            records[shard][key] = value
+            count += 1
+    for shard, path in new_files.items():
+        with open(path + ".new", "w", encoding="utf-8") as file:
+            json.dump(records[shard], file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+    # Keep the old files until the new ones are in place
+    backups = []
+    for path in old_files.values():
+        if os.path.exists(path):
+            os.replace(path, path + ".bak")
+            backups.append(path + ".bak")
+    for path in new_files.values():
+        os.replace(path + ".new", path)
+    for path in backups:
+        os.remove(path)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        sys.exit("Usage: python3 -m models.engine.rebalance "
+                 "<file> <old partitions> <new partitions>")
+    moved = rebalance(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))
+    print("{} records moved".format(moved))
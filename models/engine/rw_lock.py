@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""Defines the RWLock class used by FileStorage in thread-safe mode."""
+
+import threading  # Import threading for the condition and thread state
+from contextlib import contextmanager  # Import to build read() and write()
+
+
+class RWLock:
+    """
+    Reader/writer lock: any number of threads can hold it for reading,
+    or a single thread for writing. Waiting writers go first, so a
+    stream of readers cannot starve them.
+
+    Both sides are reentrant, and the thread holding the write lock can
+    also take the read lock. A thread holding only the read lock must
+    not ask for the write lock, it would wait for itself forever.
+    Using the lock in a with statement takes the write lock.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock."""
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0  # Threads holding the read lock
+        self.__writer = None  # Thread holding the write lock
+        self.__writes = 0  # Times the writer took the write lock
+        self.__waiting = 0  # Writers waiting for the lock
+        self.__local = threading.local()  # Read lock count of the thread
+
+    def acquire_read(self):
+        """Takes the read lock."""
+        count = getattr(self.__local, "reads", 0)
+        if count or self.__writer is threading.current_thread():
+            self.__local.reads = count + 1  # Already allowed to read
+            return
+        with self.__condition:
+            while self.__writer is not None or self.__waiting:
+                self.__condition.wait()
+            self.__readers += 1
+        self.__local.reads = 1
+
+    def release_read(self):
+        """Releases the read lock."""
+        self.__local.reads -= 1
+        if self.__local.reads or self.__writer is threading.current_thread():
+            return
+        with self.__condition:
+            self.__readers -= 1
+            if not self.__readers:
+                self.__condition.notify_all()
+
+    def acquire_write(self):
+        """Takes the write lock."""
+        me = threading.current_thread()
+        if self.__writer is me:
+            self.__writes += 1
+            return
+        with self.__condition:
+            self.__waiting += 1
+            while self.__writer is not None or self.__readers:
+                self.__condition.wait()
+            self.__waiting -= 1
+            self.__writer = me
+            self.__writes = 1
+
+    def release_write(self):
+        """Releases the write lock."""
+        self.__writes -= 1
+        if self.__writes:
+            return
+        with self.__condition:
+            self.__writer = None
+            self.__condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        """Holds the read lock for the duration of a with block."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        """Holds the write lock for the duration of a with block."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def __enter__(self):
+        """Takes the write lock."""
+        self.acquire_write()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Releases the write lock."""
+        self.release_write()
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+"""Defines the TextIndex class used by the storage engines for search."""
+
+import json  # Import the json module to save and load the index
+import math  # Import math for the ranking
+import re  # Import re to split the texts into words
+import zlib  # Import zlib for a checksum that is the same in every process
+
+VERSION = 1  # Format of the saved index
+# Text attributes searched for each class
+TEXT_FIELDS = {"Place": ("name", "description"), "Review": ("text",)}
+WORD = re.compile(r"\w+")  # A word, letters and digits of any script
+K1 = 1.2  # BM25: how quickly repeating a word stops raising the score
+B = 0.75  # BM25: how much long texts are penalized
+
+
+def tokenize(text):
+    """
+    Splits a text into lowercase words.
+    Args:
+        text (str): The text.
+    Returns:
+        list: The words, in order.
+    """
+    return WORD.findall(text.lower())
+
+
+def checksum(texts):
+    """Returns a checksum of texts that is the same in every process."""
+    data = "\0".join(texts).encode("utf-8", "surrogatepass")
+    return "{:08x}{:x}".format(zlib.crc32(data), len(data))
+
+
+class TextIndex:
+    """
+    Inverted index of the words of the text attributes of objects, for
+    ranked full-text search: each word maps to the keys of the objects
+    using it and how often they do.
+
+    A checksum of the texts of each object is kept, so that adding an
+    object whose texts did not change costs a checksum instead of
+    splitting the texts again. An index saved with save() and read
+    back with load() is therefore only updated for the objects that
+    changed since.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.__postings = {}  # Word -> {key: times it appears}
+        self.__documents = {}  # Key -> (checksum, {word: times})
+        self.__lengths = {}  # Key -> number of words
+        self.__total = 0  # Number of words of every object
+        self.changed = False  # Whether it changed since save() or load()
+
+    def __len__(self):
+        """Returns the number of indexed objects."""
+        return len(self.__documents)
+
+    def __contains__(self, key):
+        """Returns whether an object is indexed."""
+        return key in self.__documents
+
+    def keys(self):
+        """Returns the keys of the indexed objects."""
+        return list(self.__documents)
+
+    def add(self, key, texts):
+        """
+        Adds or updates the words of an object.
+        Args:
+            key (str): The key of the object.
+            texts (list): Its text attributes, None where missing.
+        """
+        texts = [text if isinstance(text, str) else "" for text in texts]
+        signature = checksum(texts)
+        document = self.__documents.get(key)
+        if document is not None and document[0] == signature:
+            return  # Same texts, same words
+        counts = {}
+        for text in texts:
+            for word in tokenize(text):
+                counts[word] = counts.get(word, 0) + 1
+        if not counts:  # Nothing to search, e.g. a place without a name
+            self.remove(key)
+            return
+        self.__store(key, signature, counts)
+
+    def __store(self, key, signature, counts):
+        """Replaces the words of an object by counts."""
+        self.remove(key)
+        self.__documents[key] = (signature, counts)
+        length = sum(counts.values())
+        self.__lengths[key] = length
+        self.__total += length
+        for word, count in counts.items():
+            self.__postings.setdefault(word, {})[key] = count
+        self.changed = True
+
+    def remove(self, key):
+        """Removes an object from the index."""
+        document = self.__documents.pop(key, None)
+        if document is None:  # Key is not indexed
+            return
+        self.__total -= self.__lengths.pop(key)
+        for word in document[1]:
+            keys = self.__postings[word]
+            del keys[key]
+            if not keys:  # Drop words no longer used
+                del self.__postings[word]
+        self.changed = True
+
+    def clear(self):
+        """Removes every object from the index."""
+        if self.__documents:
+            self.changed = True
+        self.__postings.clear()
+        self.__documents.clear()
+        self.__lengths.clear()
+        self.__total = 0
+
+    def search(self, text, prefix=None, limit=10):
+        """
+        Returns the objects best matching the words of a text, ranked
+        by BM25: words that few objects use, and that an object uses
+        often in a short text, count the most. An object matches if it
+        uses any of the words.
+        Args:
+            text (str): The words to search.
+            prefix (str): If given, only keys starting with it, such as
+            "Review.", are returned.
+            limit (int): Maximum number of results, None for all.
+        Returns:
+            list: The (key, score) pairs, best first.
+        """
+        count = len(self.__documents)
+        if not count:
+            return []
+        average = self.__total / count or 1
+        scores = {}
+        for word in set(tokenize(text)):
+            keys = self.__postings.get(word)
+            if not keys:
+                continue
+            idf = math.log(1 + (count - len(keys) + 0.5) / (len(keys) + 0.5))
+            for key, times in keys.items():
+                if prefix is not None and not key.startswith(prefix):
+                    continue
+                norm = K1 * (1 - B + B * self.__lengths[key] / average)
+                scores[key] = scores.get(key, 0) + \
+                    idf * times * (K1 + 1) / (times + norm)
+        ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+        return ranked if limit is None else ranked[:limit]
+
+    def save(self, file):
+        """
+        Writes the index to an open text file.
+        Args:
+            file (file): The file to write to.
+        """
+        json.dump({"version": VERSION, "documents": self.__documents},
+                  file, separators=(",", ":"))
+        self.changed = False
+
+    def load(self, file):
+        """
+        Replaces the content of the index by the one written by save().
+        Args:
+            file (file): The file to read from.
+        Raises:
+            ValueError: If the file does not hold a saved index.
+        """
+        data = json.load(file)
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            raise ValueError("Not a saved text index")
+        self.clear()
+        for key, (signature, counts) in data["documents"].items():
+            self.__store(key, signature, counts)
+        self.changed = False
+
+
+def build(objects, fields=TEXT_FIELDS):
+    """
+    Builds the index of objects, for the engines that do not keep one.
+    Args:
+        objects (dict): The objects keyed by "<class name>.<id>".
+        fields (dict): Class name -> the text attributes to index.
+    Returns:
+        TextIndex: The index of the objects.
+    """
+    index = TextIndex()
+    for key, obj in objects.items():
+        names = fields.get(key.split(".", 1)[0])
+        if names:
+            index.add(key, [getattr(obj, name, None) for name in names])
+    return index
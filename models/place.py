@@ -2,6 +2,7 @@
 """
 Defines the Place class that inherits from BaseModel.
 """
+import models  # Import models to access the storage
 from models.base_model import BaseModel
 
 
@@ -22,6 +23,8 @@ class Place(BaseModel):
         The latitude of the place's location.
         longitude (float): The longitude of the place's location.
         amenity_ids (list): The list of amenity IDs associated with the place.
+        reviews (list): The reviews of the place, read only.
+        amenities (list): The amenities of amenity_ids, read only.
     """
 
     city_id = ""
@@ -35,3 +38,29 @@ class Place(BaseModel):
     latitude = 0.0
     longitude = 0.0
     amenity_ids = []
+
+    @property
+    def reviews(self):
+        """
+        Returns the stored reviews whose place_id is the id of the place,
+        found in the storage index of Review.place_id.
+        Returns:
+            list: The reviews, sorted by key.
+        """
+        return models.storage.related("Review", "place_id",
+                                      [self.id])[self.id]
+
+    @property
+    def amenities(self):
+        """
+        Returns the stored amenities listed in amenity_ids, each looked
+        up by id; ids of amenities no longer stored are skipped.
+        Returns:
+            list: The amenities, in the order of amenity_ids.
+        """
+        amenities = []
+        for amenity_id in self.amenity_ids:
+            amenity = models.storage.get("Amenity", amenity_id)
+            if amenity is not None:
+                amenities.append(amenity)
+        return amenities
@@ -2,6 +2,7 @@
 """
 Defines the State class that inherits from BaseModel.
 """
+import models  # Import models to access the storage
 from models.base_model import BaseModel
 
 
@@ -11,7 +12,18 @@ class State(BaseModel):
 
     Attributes:
         name (str): The name of the state.
+        cities (list): The cities of the state, read only.
     """
 
     # Initialize the name attribute as an empty string
     name = ""
+
+    @property
+    def cities(self):
+        """
+        Returns the stored cities whose state_id is the id of the state,
+        found in the storage index of City.state_id.
+        Returns:
+            list: The cities, sorted by key.
+        """
+        return models.storage.related("City", "state_id", [self.id])[self.id]
@@ -2,6 +2,7 @@
 """
 Defines the User class for handling user data.
 """
+import models  # Import models to access the storage
 from models.base_model import BaseModel
 
 
@@ -14,6 +15,7 @@ class User(BaseModel):
         password (str): The password of the user.
         first_name (str): The first name of the user.
         last_name (str): The last name of the user.
+        places (list): The places owned by the user, read only.
     """
 
     # Initialize email attribute as an empty string
@@ -24,3 +26,13 @@ class User(BaseModel):
     first_name = ""
     # Initialize last_name attribute as an empty string
     last_name = ""
+
+    @property
+    def places(self):
+        """
+        Returns the stored places whose user_id is the id of the user,
+        found in the storage index of Place.user_id.
+        Returns:
+            list: The places, sorted by key.
+        """
+        return models.storage.related("Place", "user_id", [self.id])[self.id]
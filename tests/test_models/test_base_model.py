@@ -7,7 +7,7 @@ from datetime import datetime
 import unittest
 import sys
 import uuid
-from models.base_model import BaseModel
+from models.base_model import BaseModel, parse_datetime
 
 sys.path.append('../')
 
@@ -143,6 +143,62 @@ class TestBaseModel(unittest.TestCase):
         # Check if the extra attribute has the correct value
         self.assertEqual(model_dict["name"], "Test Name")
 
+    def test_parse_datetime(self):
+        """
+        Test parsing the timestamp formats found in saved files.
+        """
+        # Check the format written by isoformat()
+        self.assertEqual(parse_datetime("2021-11-02T14:15:22.123456"),
+                         datetime(2021, 11, 2, 14, 15, 22, 123456))
+        # Check a timestamp without microseconds
+        self.assertEqual(parse_datetime("2021-11-02T14:15:22"),
+                         datetime(2021, 11, 2, 14, 15, 22))
+        # Check a legacy timestamp with a short fraction
+        self.assertEqual(parse_datetime("2021-11-02T14:15:22.5"),
+                         datetime(2021, 11, 2, 14, 15, 22, 500000))
+        # Check that invalid timestamps are rejected
+        with self.assertRaises(ValueError):
+            parse_datetime("yesterday")
+
+    def test_timestamps_parsed_on_access(self):
+        """
+        Test that loaded timestamps are only parsed when first read.
+        """
+        # Create an instance from a saved dictionary
+        saved = self.base_model_instance.to_dict()
+        loaded = BaseModel(**saved)
+        # Check that the strings are kept until the timestamps are read
+        self.assertIsInstance(loaded.__dict__["created_at"], str)
+        # Check that to_dict reuses the saved strings
+        self.assertEqual(loaded.to_dict(), saved)
+        # Check that reading the timestamp parses it once
+        self.assertEqual(loaded.created_at,
+                         self.base_model_instance.created_at)
+        self.assertIsInstance(loaded.__dict__["created_at"], datetime)
+
+    def test_str_shows_parsed_timestamps(self):
+        """
+        Test that the string representation shows datetime objects.
+        """
+        # Create an instance from a saved dictionary
+        loaded = BaseModel(**self.base_model_instance.to_dict())
+        # Check that the timestamps are printed as datetime objects
+        self.assertIn("datetime.datetime(", str(loaded))
+
+    def test_registry(self):
+        """
+        Test that model classes register themselves by name.
+        """
+        # Check that the base class is registered
+        self.assertIs(BaseModel.registry["BaseModel"], BaseModel)
+
+        # Define a new model class
+        class Boat(BaseModel):
+            """Model class defined by the test."""
+
+        # Check that the new class was registered when it was defined
+        self.assertIs(BaseModel.registry.pop("Boat"), Boat)
+
 
 if __name__ == '__main__':
     unittest.main()
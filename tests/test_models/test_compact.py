@@ -0,0 +1,184 @@
+"""
+Unit tests for the compact model classes.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from models.base_model import BaseModel
+from models.compact import CompactModel, compact_class, use_compact_models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestCompactModel(unittest.TestCase):
+    """
+    Unit tests for the compact model classes.
+    """
+
+    def setUp(self):
+        """
+        Set up test variables.
+        """
+        self.CompactPlace = compact_class(Place)  # Compact Place class
+        self.place = self.CompactPlace()  # Create a compact Place
+
+    def test_class(self):
+        """
+        Test that the compact class mirrors the model class.
+        """
+        # Check the name, base class and model of the compact class
+        self.assertEqual(self.CompactPlace.__name__, "Place")
+        self.assertTrue(issubclass(self.CompactPlace, CompactModel))
+        self.assertIs(self.CompactPlace.model, Place)
+        # Check that the slots are the attributes of attribute_dict()
+        self.assertEqual(set(self.CompactPlace.__slots__),
+                         set(FileStorage().attribute_dict()["Place"]))
+
+    def test_no_instance_dictionary(self):
+        """
+        Test that the instances do not carry a real __dict__.
+        """
+        # Check that __dict__ is rebuilt on each access
+        self.assertIsNot(self.place.__dict__, self.place.__dict__)
+        # Check that attributes are not stored in it
+        self.place.__dict__["name"] = "Lost"
+        self.assertEqual(self.place.name, "")
+
+    def test_defaults(self):
+        """
+        Test that unset attributes return the class defaults.
+        """
+        # Check the defaults of the model class
+        self.assertEqual(self.place.name, "")
+        self.assertEqual(self.place.number_rooms, 0)
+        self.assertEqual(self.place.amenity_ids, [])
+        # Check that unknown attributes raise AttributeError
+        with self.assertRaises(AttributeError):
+            self.place.rating
+        # Check that unset attributes are not in __dict__
+        self.assertNotIn("name", self.place.__dict__)
+
+    def test_overflow_attributes(self):
+        """
+        Test that attributes without a slot go to the overflow.
+        """
+        self.place.rating = 4.5  # Set an attribute without a slot
+        # Check that it is readable and part of the dictionary form
+        self.assertEqual(self.place.rating, 4.5)
+        self.assertEqual(self.place.to_dict()["rating"], 4.5)
+        del self.place.rating  # Delete the attribute
+        self.assertNotIn("rating", self.place.to_dict())
+
+    def test_to_dict_and_reload(self):
+        """
+        Test that to_dict matches BaseModel and round-trips.
+        """
+        self.place.name = "Loft"  # Set a slot attribute
+        data = self.place.to_dict()
+        # Check the dictionary form
+        self.assertEqual(data["__class__"], "Place")
+        self.assertEqual(data["name"], "Loft")
+        self.assertEqual(data["created_at"],
+                         self.place.created_at.isoformat())
+        # Check that an instance rebuilt from it is equal
+        loaded = self.CompactPlace(**data)
+        self.assertIsInstance(loaded.created_at, datetime)
+        self.assertEqual(loaded.to_dict(), data)
+
+    def test_str(self):
+        """
+        Test the string representation.
+        """
+        # Check that it uses the same format as BaseModel
+        self.assertEqual(str(self.place), "[Place] ({}) {}".format(
+            self.place.id, self.place.__dict__))
+
+    @patch("models.storage")  # Mock the storage module
+    def test_save(self, mock_storage):
+        """
+        Test that save updates updated_at and saves the storage.
+        """
+        previous = self.place.updated_at  # Remember the timestamp
+        self.place.save()  # Save the instance
+        # Check the new timestamp and the calls to storage
+        self.assertGreater(self.place.updated_at, previous)
+        mock_storage.mark_dirty.assert_called_with(self.place, "updated_at")
+        mock_storage.save.assert_called_once()
+
+    def test_use_compact_models(self):
+        """
+        Test replacing the registered model classes.
+        """
+        registry = dict(BaseModel.registry)  # Keep the registered classes
+        try:
+            use_compact_models()
+            # Check that the registry now creates compact instances
+            self.assertTrue(issubclass(BaseModel.registry["User"],
+                                       CompactModel))
+            self.assertIs(BaseModel.registry["User"].model, User)
+        finally:
+            BaseModel.registry.clear()
+            BaseModel.registry.update(registry)
+
+    def test_lazy_storage_defaults(self):
+        """
+        Test that raw records of a lazy storage use the class defaults.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "file.json")
+        writer = FileStorage()  # Save a place with a name and one without
+        writer._FileStorage__file_path = path
+        writer._FileStorage__objects = {}
+        named = Place()
+        named.name = "Loft"
+        for place in (named, Place()):
+            writer.new(place)
+        writer.save()
+        compact = {name: compact_class(cls) for name, cls in
+                   BaseModel.registry.items() if cls is not BaseModel}
+        with patch.dict(BaseModel.registry, compact):
+            storage = FileStorage(lazy=True)  # Read them back lazily
+            storage._FileStorage__file_path = path
+            storage.all().clear()
+            storage.reload()
+            # Check that the missing name reads as the default ""
+            self.assertEqual(len(storage.filter("Place", city_id="")), 2)
+            self.assertEqual(
+                sorted(row["name"] for row in
+                       storage.query("Place", fields=["name"])),
+                ["", "Loft"])
+            self.assertEqual(
+                [place.name for place in
+                 storage.query("Place", order_by="name")], ["", "Loft"])
+
+    def test_rollback_in_place(self):
+        """
+        Test that a rollback restores a compact instance in place.
+        """
+        storage = FileStorage()  # Storage in a temporary directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage._FileStorage__file_path = os.path.join(directory.name,
+                                                       "file.json")
+        storage._FileStorage__objects = {}
+        with patch("models.storage", storage), \
+                patch.dict(BaseModel.registry, {"Place": self.CompactPlace}):
+            self.place.name = "Loft"  # Name the place and save it
+            storage.new(self.place)
+            storage.save()
+            storage.begin()  # Change it in a transaction
+            self.place.name = "Barn"
+            self.place.note = "extra"
+            storage.rollback()
+            # Check that the same instance got its attributes back
+            self.assertIs(storage.get("Place", self.place.id), self.place)
+            self.assertEqual(self.place.name, "Loft")
+            self.assertFalse(hasattr(self.place, "note"))
+
+
+if __name__ == '__main__':
+    unittest.main()  # Run the unit tests
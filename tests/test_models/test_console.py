@@ -1,6 +1,9 @@
 """
 Unit tests for the HBNBCommand class (console).
 """
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, Mock
 from io import StringIO
@@ -13,9 +16,21 @@ from models.amenity import Amenity
 from models.place import Place
 from models.city import City
 from models.review import Review
+from models.engine.file_storage import FileStorage
+from models.engine.mmap_storage import MmapStorage
 from console import HBNBCommand
 
 
+def setUpModule():
+    """Write the file of the shared storage in a temporary directory"""
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    path = patch.object(storage, "_FileStorage__file_path",
+                        os.path.join(directory.name, "file.json"))
+    path.start()
+    unittest.addModuleCleanup(path.stop)
+
+
 class TestHBNBCommand(unittest.TestCase):
     """
     Unit tests for the HBNBCommand class.
@@ -227,6 +242,100 @@ class TestHBNBCommand(unittest.TestCase):
             # Check the output for the correct count
             self.assertEqual(fake_output.getvalue().strip(), "2")
 
+    def test_do_destroy_existing(self):
+        """
+        Test the destroy command with an existing instance.
+        """
+        obj = BaseModel()  # Create a new BaseModel instance
+        # Redirect stdout to capture print output
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            # Destroy the instance, then count the remaining ones
+            self.console_instance.do_destroy(f"BaseModel {obj.id}")
+            self.console_instance.do_count("BaseModel")
+            # Check that the instance is gone
+            self.assertEqual(fake_output.getvalue().strip(), "0")
+        self.assertIsNone(storage.get(BaseModel, obj.id))
+
+    def test_do_all(self):
+        """
+        Test the all command and its streaming options.
+        """
+        first, second = User(), User()  # Create two users
+        # Redirect stdout to capture print output
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("all User")
+            # Check that the output is still the list of the strings
+            self.assertEqual(fake_output.getvalue().strip(),
+                             str([str(first), str(second)]))
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("all --json --limit 1 --offset 1")
+            self.console_instance.onecmd("User.all(limit=1, json=True)")
+            lines = fake_output.getvalue().strip().split("\n")
+        # Check one JSON object per line for the requested page
+        self.assertEqual([json.loads(line)["id"] for line in lines],
+                         [second.id, first.id])
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("all User --limit")
+            # Check that a missing number is reported
+            self.assertEqual(fake_output.getvalue().strip(),
+                             "** invalid limit **")
+
+    def test_do_nearby_and_bbox(self):
+        """
+        Test the nearby and bbox commands.
+        """
+        place = Place()  # Create a place in San Francisco
+        place.latitude, place.longitude = 37.7749, -122.4194
+        # Redirect stdout to capture print output
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("nearby 37.77 -122.42 10 5")
+            self.console_instance.onecmd("Place.bbox(37, -123, 38, -122)")
+            self.console_instance.onecmd("nearby 0 0 1000")
+            self.console_instance.onecmd("nearby 37.77")
+            lines = fake_output.getvalue().strip().split("\n")
+        # Check the distance, the place and the errors
+        self.assertTrue(lines[0].startswith("0.547 km [Place] ("))
+        self.assertIn(place.id, lines[1])
+        self.assertEqual(lines[2], "** coordinates missing **")
+
+    def test_do_search(self):
+        """
+        Test the search command.
+        """
+        review = Review()  # Create a review with a text
+        review.text = "Quiet room near the beach"
+        # Redirect stdout to capture print output
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("search quiet beach --limit 5")
+            self.console_instance.onecmd('Review.search("beach", limit=1)')
+            self.console_instance.onecmd("search Place beach")
+            self.console_instance.onecmd("search Review")
+            lines = fake_output.getvalue().strip().split("\n")
+        # Check the score, the review and the errors
+        self.assertRegex(lines[0], r"^\d+\.\d{3} \[Review\] \(")
+        self.assertIn(review.id, lines[1])
+        self.assertEqual(lines[2], "** words missing **")
+
+    def test_default_where(self):
+        """
+        Test the where command.
+        """
+        cheap, expensive = Place(), Place()  # Create two places
+        cheap.price_by_night, expensive.price_by_night = 50, 150
+        # Redirect stdout to capture print output
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            # Search the places with conditions, order and projection
+            self.console_instance.default(
+                'Place.where(price_by_night__lt=100, fields=["id"])')
+            self.console_instance.default(
+                'Place.where(order_by="-price_by_night", limit=1)')
+            self.console_instance.default('Place.where(color="red")')
+            lines = fake_output.getvalue().strip().split("\n")
+        # Check one line per result and the error of an invalid query
+        self.assertEqual(lines[0], str({"id": cheap.id}))
+        self.assertIn(expensive.id, lines[1])
+        self.assertEqual(lines[2], "** unknown attribute: color **")
+
     def test_do_count_invalid_class(self):
         """
         Test the count command with an invalid class name.
@@ -289,6 +398,106 @@ class TestHBNBCommand(unittest.TestCase):
             self.assertEqual(fake_output.getvalue().strip(),
                              "** value missing **")
 
+    def test_do_update_attribute(self):
+        """
+        Test updating one attribute, converted to the class type.
+        """
+        place = Place()  # Create a new Place instance
+        # Update the attributes with quoted and numeric values
+        self.console_instance.do_update(
+            f'Place {place.id} name "Lovely loft"')
+        self.console_instance.do_update(f"Place {place.id} max_guest 4")
+        # Check that the quotes were removed and the type converted
+        self.assertEqual(place.name, "Lovely loft")
+        self.assertEqual(place.max_guest, 4)
+        # Check that relationships are refused without stopping
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.do_update(f"Place {place.id} reviews x")
+        self.assertEqual(fake_output.getvalue(),
+                         "** reviews is read-only **\n")
+
+    def test_default_update_dict(self):
+        """
+        Test the <class>.update(<id>, <dictionary>) command.
+        """
+        user = User()  # Create a new User instance
+        # Update two attributes with a dictionary
+        self.console_instance.default(
+            f'User.update("{user.id}", '
+            '{"first_name": "Betty", "age": 89})')
+        # Check that both attributes were set
+        self.assertEqual(user.first_name, "Betty")
+        self.assertEqual(user.age, 89)
+
+    def test_default_update_attribute(self):
+        """
+        Test the <class>.update(<id>, <attribute>, <value>) command.
+        """
+        state = State()  # Create a new State instance
+        # Update one attribute
+        self.console_instance.default(
+            f'State.update("{state.id}", "name", "California")')
+        # Check that the attribute was set
+        self.assertEqual(state.name, "California")
+
+    def test_update_does_not_execute_code(self):
+        """
+        Test that update payloads are parsed, not evaluated.
+        """
+        city = City()  # Create a new City instance
+        with patch("os.system") as mock_system:
+            # Send a payload that would run code if it were evaluated
+            self.console_instance.default(
+                f'City.update("{city.id}", '
+                '__import__("os").system("echo hacked"))')
+        # Check that nothing was executed
+        mock_system.assert_not_called()
+
+    def test_transaction_commands(self):
+        """
+        Test the begin, rollback and commit commands.
+        """
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("begin")  # Start a transaction
+            self.console_instance.onecmd("create Amenity")  # Add one
+            self.console_instance.onecmd("rollback")  # Cancel it
+            self.console_instance.onecmd("count Amenity")
+            # Check that the amenity was removed
+            self.assertEqual(fake_output.getvalue().split()[-1], "0")
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("commit")  # No transaction
+            # Check the error message
+            self.assertEqual(fake_output.getvalue().strip(),
+                             "** no transaction in progress **")
+
+    def test_read_only_storage(self):
+        """
+        Test that changes refused by a read-only storage are reported.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "file.json")
+        writer = FileStorage()  # Write a file holding one user
+        writer._FileStorage__file_path = path
+        writer._FileStorage__objects = {}
+        user = User()
+        writer.new(user)
+        writer.save()
+        read_only = MmapStorage(path)  # Serve it read-only
+        self.addCleanup(read_only.close)
+        read_only.reload()
+        with patch('console.storage', read_only), \
+                patch('models.storage', read_only), \
+                patch('sys.stdout', new=StringIO()) as fake_output:
+            self.console_instance.onecmd("create User")
+            self.console_instance.onecmd(f"update User {user.id} age 3")
+            self.console_instance.onecmd(f"destroy User {user.id}")
+            self.console_instance.onecmd("begin")
+            self.console_instance.onecmd("count User")
+            lines = fake_output.getvalue().strip().split("\n")
+        # Check that each change was refused and the console went on
+        self.assertEqual(lines, ["** storage is read-only **"] * 4 + ["1"])
+
 
 if __name__ == '__main__':
     unittest.main()  # Run the unit tests
@@ -0,0 +1,83 @@
+"""Module for testing Columns class"""
+import unittest
+from models.engine import analytics
+from models.engine.analytics import Columns
+
+
+def value(record, field):
+    """Read an attribute of a test record"""
+    return record.get(field)
+
+
+@unittest.skipUnless(analytics.numpy is not None, "needs NumPy")
+class TestColumns(unittest.TestCase):
+    """Tests for the Columns class"""
+
+    def setUp(self):
+        """Set up columns of a few places"""
+        # Capacity 2 so that adding the places grows the arrays
+        self.columns = Columns(("price", "guests"), ("city_id",),
+                               capacity=2)
+        for number, (city, price, guests) in enumerate([
+                ("SF", 100, 2), ("SF", 200, 4), ("SF", 300, 4),
+                ("LA", 50, 2), ("LA", "free", None), (None, 10, 1)]):
+            self.columns.add("Place.{}".format(number),
+                             {"city_id": city, "price": price,
+                              "guests": guests}, value)
+
+    def test_aggregate(self):
+        """Test the statistics of a column, in total and by group"""
+        # Check that missing and non-numeric values are skipped
+        self.assertEqual(self.columns.aggregate("price", "count"), 5)
+        self.assertEqual(self.columns.aggregate("price", "sum"), 660)
+        self.assertEqual(self.columns.aggregate("price", by="city_id"),
+                         {"SF": 200, "LA": 50})
+        self.assertEqual(
+            self.columns.aggregate("price", "max", by="city_id",
+                                   price__lt=250),
+            {"SF": 200, "LA": 50})
+        self.assertIsNone(self.columns.aggregate("price", price__gt=1000))
+
+    def test_percentile(self):
+        """Test the percentiles are interpolated like NumPy's"""
+        # Check the median in total and for each city
+        self.assertEqual(self.columns.percentile("price", 50), 100)
+        self.assertEqual(self.columns.percentile("price", 75, by="city_id"),
+                         {"SF": 250, "LA": 50})
+
+    def test_distribution_and_keys(self):
+        """Test counting the values and selecting the rows"""
+        self.assertEqual(self.columns.distribution("guests"),
+                         {1: 1, 2: 2, 4: 2})
+        self.assertEqual(self.columns.distribution("city_id", guests=4),
+                         {"SF": 2})
+        # Check range and group conditions together
+        self.assertEqual(self.columns.keys(price__ge=100, price__le=200,
+                                           city_id__in=["SF", "NY"]),
+                         ["Place.0", "Place.1"])
+
+    def test_updates(self):
+        """Test that changed and removed rows are accounted for"""
+        self.columns.set("Place.3", "price", 150)  # Change a price
+        self.columns.remove("Place.0")  # Remove a place
+        self.columns.add("Place.2", {"city_id": "LA", "price": 300,
+                                     "guests": 4}, value)  # Move a place
+        # Check the statistics of the changed rows
+        self.assertEqual(len(self.columns), 5)
+        self.assertEqual(self.columns.aggregate("price", "sum",
+                                                by="city_id"),
+                         {"SF": 200, "LA": 450})
+
+    def test_invalid(self):
+        """Test that unknown columns and operators are rejected"""
+        for call in (lambda: self.columns.aggregate("color"),
+                     lambda: self.columns.aggregate("price", "mode"),
+                     lambda: self.columns.aggregate("price", by="guests"),
+                     lambda: self.columns.keys(city_id__lt="SF"),
+                     lambda: self.columns.percentile("price", 101)):
+            with self.assertRaises(ValueError):
+                call()
+
+
+if __name__ == "__main__":
+    unittest.main()
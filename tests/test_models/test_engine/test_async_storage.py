@@ -0,0 +1,146 @@
+"""Module for testing AsyncFileStorage class"""
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from models.engine.async_storage import AsyncFileStorage
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.user import User
+from models.place import Place
+
+
+class TestAsyncFileStorage(unittest.IsolatedAsyncioTestCase):
+    """Tests for the AsyncFileStorage class"""
+
+    def setUp(self):
+        """Set up a facade over a storage in a temporary directory"""
+        # Create a temporary directory for the file
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        self.storage = self.make_storage()
+        self.async_storage = AsyncFileStorage(self.storage)
+
+    def make_storage(self):
+        """Return an empty storage using the temporary file"""
+        storage = FileStorage()
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        return storage
+
+    async def test_save_and_reload(self):
+        """Test that objects saved and reloaded asynchronously survive"""
+        user = User()  # Create a new User instance
+        self.async_storage.new(user)
+        await self.async_storage.save()
+        async_storage = AsyncFileStorage(self.make_storage())
+        await async_storage.reload()
+        loaded = await async_storage.get(User, user.id)
+        # Check that the user was read back
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+        self.assertIsNone(await async_storage.get("User", "missing"))
+
+    async def test_save_runs_in_executor(self):
+        """Test that save does not run in the event loop thread"""
+        threads = []
+        original = self.storage.save
+
+        def save():
+            """Record the thread running the save"""
+            threads.append(threading.current_thread())
+            original()
+        self.storage.save = save
+        await self.async_storage.save()
+        # Check that the save ran in another thread
+        self.assertNotEqual(threads, [threading.current_thread()])
+        self.assertEqual(len(threads), 1)
+
+    async def test_concurrent_saves_coalesced(self):
+        """Test that saves requested during a write share the next one"""
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def save():
+            """Block the first write until the other saves are queued"""
+            calls.append(None)
+            started.set()
+            release.wait(5)
+        self.storage.save = save
+        first = asyncio.ensure_future(self.async_storage.save())
+        await asyncio.get_running_loop().run_in_executor(
+            None, started.wait, 5)
+        others = [asyncio.ensure_future(self.async_storage.save())
+                  for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()  # Let the writes run
+        await asyncio.gather(first, *others)
+        # Check that the ten saves made one write after the first
+        self.assertEqual(len(calls), 2)
+
+    async def test_save_error(self):
+        """Test that a failed write raises in every waiting save"""
+        def save():
+            """Fail like a full disk"""
+            raise OSError("disk full")
+        self.storage.save = save
+        results = await asyncio.gather(self.async_storage.save(),
+                                       self.async_storage.save(),
+                                       return_exceptions=True)
+        # Check that both callers got the error
+        self.assertEqual([type(result) for result in results],
+                         [OSError, OSError])
+
+    async def test_async_iteration(self):
+        """Test iterating over all objects or one class"""
+        users = [User() for _ in range(3)]  # Create users
+        for obj in users + [Place()]:
+            self.async_storage.new(obj)
+        objects = [obj async for obj in self.async_storage.all()]
+        # Check that every object is returned
+        self.assertEqual(len(objects), 4)
+        objects = [obj async for obj in self.async_storage.all(User)]
+        self.assertEqual({obj.id for obj in objects},
+                         {user.id for user in users})
+
+    async def test_iteration_skips_deleted(self):
+        """Test that objects deleted during the iteration are skipped"""
+        users = [User() for _ in range(3)]  # Create users
+        for user in users:
+            self.async_storage.new(user)
+        objects = []
+        async for obj in self.async_storage.all(User):
+            objects.append(obj)
+            self.async_storage.delete(users[2])  # Delete the last one
+        # Check that the deleted user was not returned
+        self.assertEqual(len(objects), 2)
+
+    def test_other_engines_refused(self):
+        """Test that a DBStorage, bound to its thread, is refused"""
+        storage = DBStorage(os.path.join(self.directory.name, "file.db"))
+        self.addCleanup(storage.close)
+        # Check that the facade does not accept it
+        with self.assertRaises(TypeError):
+            AsyncFileStorage(storage)
+
+    async def test_iteration_does_not_copy_storage(self):
+        """Test that iterating reads the objects without calling all()"""
+        storage = FileStorage(thread_safe=True)  # all() copies here
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        users = [User() for _ in range(5)]  # Create users
+        for user in users:
+            storage.new(user)
+        async_storage = AsyncFileStorage(storage)
+        with patch.object(storage, "all", wraps=storage.all) as all_:
+            objects = [obj async for obj in async_storage.all()]
+        # Check that every user was returned without copying the objects
+        self.assertEqual(objects, users)
+        all_.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
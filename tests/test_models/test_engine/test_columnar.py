@@ -0,0 +1,117 @@
+"""Module for testing the columnar snapshot format"""
+import json
+import os
+import struct
+import tempfile
+import unittest
+from models.engine import columnar
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class TestColumnar(unittest.TestCase):
+    """Tests for the columnar snapshot reader and writer"""
+
+    def setUp(self):
+        """Set up test variables"""
+        # Entries shaped like the content of file.json
+        self.entries = {
+            "User.1": {"id": "1", "email": "a@b.c", "__class__": "User"},
+            "Place.2": {"id": "2", "amenity_ids": ["wifi"], "user_id": "1",
+                        "latitude": 1.5, "number_rooms": 3,
+                        "__class__": "Place"},
+            "Place.3": {"id": "3", "amenity_ids": [], "user_id": "1",
+                        "latitude": None, "name": "Café \"q\"\n",
+                        "number_rooms": 2 ** 70, "__class__": "Place"},
+            "State.odd": {"id": "4", "__class__": "State"},
+        }
+        # Write the test files to a temporary directory
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "file.hbnb")
+        self.json_path = os.path.join(directory.name, "file.json")
+
+    def write(self, entries):
+        """Write entries to the test snapshot"""
+        with open(self.path, "wb") as file:
+            columnar.dump(entries, file)
+
+    def read(self):
+        """Read the entries of the test snapshot"""
+        with open(self.path, "rb") as file:
+            return dict(columnar.load(file))
+
+    def test_round_trip(self):
+        """Test that every value and key is read back unchanged"""
+        self.write(self.entries.items())
+        # Check that the entries are the same, missing fields included
+        self.assertEqual(self.read(), self.entries)
+
+    def test_strings_are_interned(self):
+        """Test that a repeated string is stored once"""
+        self.write(self.entries.items())
+        with open(self.path, "rb") as file:
+            data = file.read()
+        # Check that the shared user_id value appears once in the table
+        (size,) = struct.unpack_from("<I", data, len(columnar.MAGIC))
+        table = json.loads(data[12:12 + size].decode("utf-8"))
+        self.assertEqual(table.count("1"), 1)
+
+    def test_smaller_than_json(self):
+        """Test that the snapshot is smaller than the indented JSON"""
+        entries = {}
+        for number in range(100):
+            data = Place().to_dict()  # Create a new Place instance
+            data["user_id"] = "shared"
+            entries["Place." + data["id"]] = data
+        self.write(entries.items())
+        # Check the size against json.dump with indent=2
+        self.assertLess(os.path.getsize(self.path),
+                        len(json.dumps(entries, indent=2)) / 2)
+
+    def test_empty(self):
+        """Test writing and reading no entries"""
+        self.write([])
+        # Check that no entries are read back
+        self.assertEqual(self.read(), {})
+
+    def test_not_a_snapshot(self):
+        """Test reading a file that is not a columnar snapshot"""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("{}")
+        # Check that a ValueError is raised
+        with self.assertRaises(ValueError):
+            self.read()
+
+    def test_convert(self):
+        """Test converting a JSON file to a snapshot and back"""
+        with open(self.json_path, "w", encoding="utf-8") as file:
+            json.dump(self.entries, file)
+        columnar.from_json(self.json_path, self.path)
+        os.remove(self.json_path)
+        columnar.to_json(self.path, self.json_path)
+        with open(self.json_path, encoding="utf-8") as file:
+            # Check that the JSON file is the same as before
+            self.assertEqual(json.load(file), self.entries)
+
+    def test_file_storage(self):
+        """Test saving and reloading a FileStorage in the columnar format"""
+        storage = FileStorage(serializer=columnar)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        user = User()  # Create a new User instance
+        user.first_name = "Betty"
+        storage.new(user)
+        storage.save()
+        # Check that a new storage reads the user back
+        storage = FileStorage(serializer=columnar)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        storage.reload()
+        loaded = storage.all()["User." + user.id]
+        self.assertEqual(loaded.to_dict(), user.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
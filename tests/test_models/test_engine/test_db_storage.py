@@ -0,0 +1,208 @@
+"""Module for testing DBStorage class"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from models.engine.db_storage import DBStorage
+from models.base_model import BaseModel
+from models.user import User
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestDBStorage(unittest.TestCase):
+    """Tests for the DBStorage class"""
+
+    def setUp(self):
+        """Set up a storage backed by a temporary database"""
+        # Create a temporary directory for the database file
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.db")
+        self.storage = DBStorage(self.path)
+
+    def reopen(self):
+        """Return a new storage reading the same database"""
+        storage = DBStorage(self.path)
+        self.addCleanup(storage.close)
+        return storage
+
+    def test_save_and_reload(self):
+        """Test that saved objects are read back from the database"""
+        place = Place()  # Create a new Place instance
+        place.name = "Loft"  # Set a column attribute
+        place.amenity_ids = ["wifi", "pool"]  # Set a list attribute
+        place.rating = 4.5  # Set an attribute without a column
+        self.storage.new(place)  # Add place to storage
+        self.storage.save()  # Write it to the database
+        # Read the place back from another connection
+        loaded = self.reopen().all()["Place." + place.id]
+        # Check that every attribute survived
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+    def test_unset_attributes_use_class_defaults(self):
+        """Test that attributes never set are not stored on the instance"""
+        user = User()  # Create a new User instance
+        self.storage.new(user)  # Add user to storage
+        self.storage.save()  # Write it to the database
+        loaded = self.reopen().all(User)["User." + user.id]
+        # Check that the class default is used
+        self.assertNotIn("email", loaded.__dict__)
+        self.assertEqual(loaded.email, "")
+
+    def test_filter(self):
+        """Test filtering objects with an indexed query"""
+        city = City()  # Create a new City instance
+        city.state_id = "CA"  # Attach the city to a state
+        self.storage.new(city)  # Add city to storage
+        self.storage.new(City())  # Add a city of no state
+        self.storage.save()  # Write them to the database
+        # Check that only the city of the state is returned
+        result = self.reopen().filter(City, state_id="CA")
+        self.assertEqual(list(result), ["City." + city.id])
+
+    def test_unsaved_changes_are_visible(self):
+        """Test that queries see changes made since the last save"""
+        city = City()  # Create a new City instance
+        self.storage.new(city)  # Add city to storage
+        self.storage.save()  # Write it to the database
+        with patch("models.storage", self.storage):
+            city.state_id = "NY"  # Change the city without saving
+        # Check that the in-memory value is used
+        self.assertIn("City." + city.id,
+                      self.storage.filter(City, state_id="NY"))
+
+    def test_delete(self):
+        """Test deleting an object from the database"""
+        model = BaseModel()  # Create a new BaseModel instance
+        self.storage.new(model)  # Add it to storage
+        self.storage.save()  # Write it to the database
+        self.storage.delete(model)  # Delete it
+        # Check that the object is hidden before the save
+        self.assertFalse(self.storage.all(BaseModel))
+        self.storage.save()  # Delete it from the database
+        # Check that the row is gone
+        self.assertFalse(self.reopen().all(BaseModel))
+
+    def test_transaction_rollback(self):
+        """Test that a rollback reads the objects again"""
+        city = City()  # Create a new City instance
+        city.name = "Paris"  # Name the city
+        self.storage.new(city)  # Add city to storage
+        with self.assertRaises(ValueError):
+            with self.storage.transaction():
+                with patch("models.storage", self.storage):
+                    city.name = "Lyon"  # Rename the city
+                self.storage.new(Place())  # Add a place
+                raise ValueError("abort")  # Roll the transaction back
+        # Check that the saved state is read back
+        self.assertEqual(self.storage.all(City)["City." + city.id].name,
+                         "Paris")
+        self.assertFalse(self.storage.all(Place))
+
+    def test_transaction_commit(self):
+        """Test that a transaction is written on commit"""
+        self.storage.begin()  # Start a transaction
+        self.storage.new(User())  # Add a user
+        self.storage.save()  # Deferred until the commit
+        # Check that nothing was written yet
+        self.assertFalse(self.reopen().all(User))
+        self.storage.commit()  # Write the user
+        self.assertEqual(len(self.reopen().all(User)), 1)
+
+    def test_get_and_count(self):
+        """Test looking objects up and counting saved and unsaved ones"""
+        saved, unsaved = User(), User()  # Create two users
+        self.storage.new(saved)
+        self.storage.save()
+        self.storage.new(unsaved)  # Not saved yet
+        # Check that both are found and counted
+        self.assertEqual(self.reopen().get(User, saved.id).to_dict(),
+                         saved.to_dict())
+        self.assertIs(self.storage.get("User", unsaved.id), unsaved)
+        self.assertIsNone(self.storage.get(User, "missing"))
+        self.assertEqual(self.storage.count(User), 2)
+        self.storage.delete(saved)  # Delete the saved user
+        self.assertIsNone(self.storage.get(User, saved.id))
+        self.assertEqual(self.storage.count(User), 1)
+        self.assertEqual(self.storage.count(), 1)
+        self.assertEqual(self.reopen().count(User), 1)
+
+    def test_query(self):
+        """Test searching saved and unsaved objects"""
+        cheap, expensive = Place(), Place()  # Create two places
+        cheap.city_id = expensive.city_id = "SF"
+        cheap.price_by_night, expensive.price_by_night = 50, 150
+        self.storage.new(cheap)
+        self.storage.save()
+        self.storage.new(expensive)  # Not saved yet
+        # Check that both are searched and sorted
+        result = self.storage.query(Place, city_id="SF",
+                                    order_by="-price_by_night")
+        self.assertEqual([place.id for place in result],
+                         [expensive.id, cheap.id])
+        result = self.storage.query(Place, price_by_night__lt=100)
+        self.assertEqual([place.id for place in result], [cheap.id])
+
+    def test_nearby_and_bbox(self):
+        """Test searching places by position"""
+        near, far = Place(), Place()  # Create two places
+        near.latitude, near.longitude = 37.7749, -122.4194
+        far.latitude, far.longitude = 34.0522, -118.2437
+        for place in (near, far):
+            self.storage.new(place)
+        self.storage.save()
+        storage = self.reopen()  # Read the places from the database
+        # Check that each search finds one place
+        self.assertEqual([obj.id for obj, _ in
+                          storage.nearby(37.77, -122.42, 10)], [near.id])
+        self.assertEqual(list(storage.bbox(30, -120, 35, -115)),
+                         ["Place." + far.id])
+
+    def test_related(self):
+        """Test reading the cities of several states at once"""
+        first, second = City(), City()  # Create two cities
+        first.state_id, second.state_id = "CA", "NV"
+        for city in (first, second):
+            self.storage.new(city)
+        self.storage.save()
+        storage = self.reopen()  # Read them from the database
+        unsaved = City()  # Create a city not saved yet
+        unsaved.state_id = "NV"
+        storage.new(unsaved)
+        # Check that the saved and unsaved cities are found by state
+        found = storage.related(City, "state_id", ["CA", "NV", "OR"])
+        self.assertEqual([city.id for city in found["CA"]], [first.id])
+        self.assertEqual(sorted(city.id for city in found["NV"]),
+                         sorted([second.id, unsaved.id]))
+        self.assertEqual(found["OR"], [])
+
+    def test_search(self):
+        """Test searching the words of reviews and places"""
+        review, place = Review(), Place()  # Create a review and a place
+        review.text = "Quiet room near the beach"
+        place.name = "Beach house"
+        for obj in (review, place):
+            self.storage.new(obj)
+        self.storage.save()
+        storage = self.reopen()  # Read them from the database
+        # Check that both match and only the review when asked for
+        self.assertEqual(len(storage.search("beach")), 2)
+        self.assertEqual([obj.id for obj, _ in
+                          storage.search("beach", cls=Review)], [review.id])
+
+    def test_class_and_attribute_dict(self):
+        """Test that the schema is shared with FileStorage"""
+        # Check that the classes and attributes are available
+        self.assertIs(self.storage.class_dict()["User"], User)
+        self.assertIs(self.storage.attribute_dict()["Place"]["latitude"],
+                      float)
+
+    def tearDown(self):
+        """Close the database and remove its directory"""
+        self.storage.close()
+        self.directory.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()  # Run the unittests
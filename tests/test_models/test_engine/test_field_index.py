@@ -0,0 +1,48 @@
+"""Module for testing FieldIndex class"""
+import unittest
+from models.engine.field_index import FieldIndex
+
+
+class TestFieldIndex(unittest.TestCase):
+    """Tests for the FieldIndex class"""
+
+    def setUp(self):
+        """Set up test variables"""
+        # Create an index on the state_id attribute
+        self.index = FieldIndex("state_id")
+
+    def test_add_and_lookup(self):
+        """Test looking up the keys stored under a value"""
+        self.index.add("City.1", "CA")  # Index a city of CA
+        self.index.add("City.2", "CA")  # Index another city of CA
+        self.index.add("City.3", "NY")  # Index a city of NY
+        # Check that only the cities of CA are returned
+        self.assertEqual(self.index.lookup("CA"), {"City.1", "City.2"})
+        # Check that an unknown value returns no keys
+        self.assertEqual(self.index.lookup("TX"), set())
+
+    def test_add_moves_key(self):
+        """Test that adding a key again moves it to the new value"""
+        self.index.add("City.1", "CA")  # Index the city under CA
+        self.index.add("City.1", "NY")  # Move it to NY
+        # Check that the city is only found under NY
+        self.assertEqual(self.index.lookup("CA"), set())
+        self.assertEqual(self.index.lookup("NY"), {"City.1"})
+
+    def test_remove(self):
+        """Test removing a key from the index"""
+        self.index.add("City.1", "CA")  # Index the city
+        self.index.remove("City.1")  # Remove it
+        self.index.remove("City.2")  # Removing a missing key is ignored
+        # Check that the city is no longer found
+        self.assertEqual(self.index.lookup("CA"), set())
+
+    def test_unhashable_values(self):
+        """Test that unhashable values are skipped"""
+        self.index.add("Place.1", ["wifi"])  # Lists cannot be indexed
+        # Check that looking up a list is reported as unsupported
+        self.assertIsNone(self.index.lookup(["wifi"]))
+
+
+if __name__ == '__main__':
+    unittest.main()  # Run the unittests
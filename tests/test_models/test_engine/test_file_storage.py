@@ -1,17 +1,24 @@
 """Module for testing FileStorage class"""
 import sys
 import unittest
-from models.engine.file_storage import FileStorage
+from models.engine.file_storage import FileStorage, read_shard, partition_of
 from unittest.mock import patch, mock_open
 from models.base_model import BaseModel
 from models.user import User
+from models.engine.lazy_objects import LazyObjects
+from models.engine import analytics, text_index
 from models.state import State
 from models.city import City
 from models.amenity import Amenity
 from models.place import Place
 from models.review import Review
 import json
+import multiprocessing
 import os
+import random
+import tempfile
+import threading
+import uuid
 from io import StringIO
 sys.path.append('../../')
 
@@ -21,8 +28,12 @@ class TestFileStorage(unittest.TestCase):
 
     def setUp(self):
         """Set up test variables"""
-        # Create an instance of FileStorage
+        # Create an instance of FileStorage writing to a temporary directory
         self.storage = FileStorage()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage._FileStorage__file_path = os.path.join(
+            directory.name, "file.json")
         # Clear the objects dictionary
         self.storage._FileStorage__objects = {}
         # Create instances of different models
@@ -53,19 +64,48 @@ class TestFileStorage(unittest.TestCase):
         # Check if the number of objects is correct
         self.assertEqual(len(all_objects), 1)
 
+    # Mock os.stat so no file written by another test is merged first
+    @patch("os.stat", side_effect=FileNotFoundError)
+    @patch("os.fsync")  # Mock the os.fsync function
+    @patch("os.replace")  # Mock the os.replace function
     @patch("builtins.open", new_callable=mock_open)  # Mock the open function
     @patch("json.dump")  # Mock the json.dump function
-    def test_save(self, mock_json_dump, mock_open):
-        """Test saving objects to a file"""
+    def test_save(self, mock_json_dump, mock_open, mock_replace, mock_fsync,
+                  mock_stat):
+        """Test saving objects to a temporary file renamed over the file"""
+        path = self.storage._FileStorage__file_path
         # Add base_model to storage
         self.storage.new(self.base_model)
         # Save the objects to a file
         self.storage.save()
         # Check if open was called with the correct arguments
-        mock_open.assert_called_once_with(FileStorage._FileStorage__file_path,
-                                          "w", encoding="utf-8")
+        mock_open.assert_called_once_with(path + ".tmp", "w",
+                                          encoding="utf-8")
         # Check if json.dump was called once
         mock_json_dump.assert_called_once()
+        # Check that the content was synced and then renamed
+        mock_fsync.assert_called()
+        mock_replace.assert_called_once_with(path + ".tmp", path)
+
+    def test_save_is_atomic(self):
+        """Test that a failed save leaves the previous file intact"""
+        self.storage.new(self.base_model)
+        self.storage.save()
+        path = self.storage._FileStorage__file_path
+        with open(path, encoding="utf-8") as file:
+            before = file.read()  # The saved file
+        self.storage.new(User())  # Add a second object
+        with patch("json.dump", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        # Check that the file was not touched by the failed save
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(file.read(), before)
+        os.remove(path + ".tmp")  # Left by the failed save
+        self.storage.save()  # The next save writes both objects
+        self.assertFalse(os.path.exists(path + ".tmp"))
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(len(json.load(file)), 2)
 
     @patch("os.stat")  # Mock the os.stat function
     # Mock the open function
@@ -108,11 +148,300 @@ class TestFileStorage(unittest.TestCase):
         # Reload the storage
         self.storage.reload()
         # Check if open was called with the correct arguments
-        mock_open.assert_called_once_with(FileStorage._FileStorage__file_path,
-                                          "r+", encoding="utf-8")
+        mock_open.assert_called_once_with(
+            self.storage._FileStorage__file_path, "r+", encoding="utf-8")
         # Check if the objects dictionary is empty
         self.assertFalse(self.storage._FileStorage__objects)
 
+    def test_reload_creates_no_lock_file(self):
+        """Test that reading a storage never saved leaves no file"""
+        path = self.storage._FileStorage__file_path
+        self.storage.reload()  # Nothing to read
+        # Check that only a save creates the lock file
+        self.assertFalse(os.path.exists(path + ".lock"))
+        self.storage.save()
+        self.assertTrue(os.path.exists(path + ".lock"))
+
+    @patch("json.dump")  # Mock the json.dump function
+    def test_save_reuses_clean_objects(self, mock_json_dump):
+        """Test that save only converts objects changed since last save"""
+        self.storage.new(self.place)  # Add place to storage
+        self.storage.new(self.user)  # Add user to storage
+        self.storage.save()  # Serialize both objects once
+        with patch("models.storage", self.storage), \
+                patch.object(Place, "to_dict") as place_to_dict, \
+                patch.object(User, "to_dict",
+                             return_value={}) as user_to_dict:
+            self.user.first_name = "Betty"  # Change only the user
+            self.storage.save()  # Save again
+        # Check that only the changed object was converted again
+        place_to_dict.assert_not_called()
+        user_to_dict.assert_called_once()
+
+    def test_mark_dirty_ignores_unknown_objects(self):
+        """Test that objects missing from the storage are not tracked"""
+        # Mark an object that was never added to this storage
+        self.storage.mark_dirty(self.city)
+        # Check that it was not added to the dirty keys
+        self.assertNotIn("City." + self.city.id,
+                         self.storage._FileStorage__dirty)
+
+    def test_all_with_class(self):
+        """Test retrieving only the objects of one class"""
+        self.storage.new(self.user)  # Add user to storage
+        self.storage.new(self.city)  # Add city to storage
+        # Check that only the user is returned for the User class
+        self.assertEqual(list(self.storage.all(User).values()), [self.user])
+        # Check that the class can also be given by name
+        self.assertEqual(list(self.storage.all("City").values()),
+                         [self.city])
+
+    def test_filter_uses_index(self):
+        """Test filtering objects on an indexed attribute"""
+        other_city = City()  # Create a city of another state
+        with patch("models.storage", self.storage):
+            self.storage.new(self.city)  # Add city to storage
+            self.storage.new(other_city)  # Add the other city to storage
+            self.city.state_id = self.state.id  # Attach city to the state
+            other_city.state_id = "another state"
+        # Check that only the city of the state is returned
+        result = self.storage.filter(City, state_id=self.state.id)
+        self.assertEqual(list(result.values()), [self.city])
+        with patch("models.storage", self.storage):
+            self.city.state_id = "moved"  # Move the city to another state
+        # Check that the index follows the update
+        self.assertFalse(self.storage.filter(City, state_id=self.state.id))
+
+    def test_filter_without_index(self):
+        """Test filtering objects on an attribute that is not indexed"""
+        self.state.name = "California"  # Name the state
+        self.storage.new(self.state)  # Add state to storage
+        # Check that the class bucket is scanned
+        result = self.storage.filter("State", name="California")
+        self.assertEqual(list(result.values()), [self.state])
+
+    def test_add_index(self):
+        """Test declaring an index on an existing attribute"""
+        self.user.email = "betty@holberton.io"  # Set the user email
+        self.storage.new(self.user)  # Add user to storage
+        self.storage.add_index(User, "email")  # Index the emails
+        # Check that the indexed lookup finds the user
+        result = self.storage.filter(User, email="betty@holberton.io")
+        self.assertEqual(list(result.values()), [self.user])
+
+    def test_delete_updates_index(self):
+        """Test that deleted objects leave the buckets and indexes"""
+        self.review.place_id = self.place.id  # Attach review to place
+        self.storage.new(self.review)  # Add review to storage
+        self.storage.delete(self.review)  # Delete the review
+        # Check that the review is no longer found
+        self.assertFalse(self.storage.all(Review))
+        self.assertFalse(self.storage.filter(Review, place_id=self.place.id))
+
+    def test_indexes_follow_replaced_objects(self):
+        """Test that the indexes are rebuilt if __objects is replaced"""
+        self.storage.new(self.user)  # Add user to storage
+        self.storage.all(User)  # Build the class buckets
+        # Replace the objects dictionary directly
+        self.storage._FileStorage__objects = {}
+        # Check that the stale bucket is not used
+        self.assertFalse(self.storage.all(User))
+
+    def test_streaming_save_and_reload(self):
+        """Test saving and reloading the file one entry at a time"""
+        storage = FileStorage(streaming=True)  # Create a streaming storage
+        storage._FileStorage__file_path = self.storage._FileStorage__file_path
+        storage._FileStorage__objects = {}
+        storage.new(self.user)  # Add user to storage
+        storage.new(self.place)  # Add place to storage
+        storage.save()  # Write the file entry by entry
+        with open(self.storage._FileStorage__file_path,
+                  encoding="utf-8") as file:
+            # Check that the usual JSON document was written
+            self.assertEqual(len(json.load(file)), 2)
+        storage._FileStorage__objects = {}  # Forget the objects
+        storage.reload()  # Read the file entry by entry
+        # Check that both objects were read back
+        self.assertEqual(set(storage.all()),
+                         {"User." + self.user.id, "Place." + self.place.id})
+
+    def test_get(self):
+        """Test looking an object up by class and id"""
+        self.storage.new(self.user)  # Add user to storage
+        # Check that the user is found by class or class name
+        self.assertIs(self.storage.get(User, self.user.id), self.user)
+        self.assertIs(self.storage.get("User", self.user.id), self.user)
+        # Check that missing objects give None
+        self.assertIsNone(self.storage.get(Place, self.user.id))
+        self.assertIsNone(self.storage.get("User", "missing"))
+
+    def test_count(self):
+        """Test counting all objects and the objects of a class"""
+        self.storage.new(self.user)  # Add user to storage
+        self.storage.new(self.place)  # Add place to storage
+        self.storage.new(User())  # Add another user
+        # Check the counts
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count(User), 2)
+        self.assertEqual(self.storage.count("City"), 0)
+        self.storage.delete(self.user)  # Delete a user
+        self.assertEqual(self.storage.count("User"), 1)
+        # Check that the count follows a replaced dictionary
+        self.storage._FileStorage__objects = {}
+        self.assertEqual(self.storage.count(User), 0)
+
+    def test_query(self):
+        """Test searching, sorting and paging the objects of a class"""
+        places = [Place() for _ in range(4)]  # Create four places
+        for number, place in enumerate(places):
+            place.city_id = "SF" if number < 3 else "LA"
+            place.price_by_night = 100 - number * 10
+            self.storage.new(place)  # Add the place to storage
+        # Check that the indexed and scanned conditions both apply
+        result = self.storage.query(Place, city_id="SF",
+                                    price_by_night__lt=100,
+                                    order_by="price_by_night")
+        self.assertEqual(list(result), [places[2], places[1]])
+        # Check a page of the sorted results and a projection
+        result = self.storage.query("Place", order_by="-price_by_night",
+                                    limit=2, offset=1,
+                                    fields=["price_by_night"])
+        self.assertEqual(list(result), [{"price_by_night": 90},
+                                        {"price_by_night": 80}])
+        # Check that invalid queries fail before anything is read
+        with self.assertRaises(ValueError):
+            self.storage.query(Place, color="red")
+
+    def test_nearby_and_bbox(self):
+        """Test the spatial index follows the places"""
+        far = Place()  # Create a place far from the first one
+        self.place.latitude, self.place.longitude = 37.7749, -122.4194
+        far.latitude, far.longitude = 34.0522, -118.2437
+        self.storage.new(self.place)  # Add the places to storage
+        self.storage.new(far)
+        # Check that only the place near the point is found
+        found = self.storage.nearby(37.77, -122.42, 10)
+        self.assertEqual([obj for obj, _ in found], [self.place])
+        self.assertLess(found[0][1], 1)
+        self.assertEqual(list(self.storage.bbox(30, -120, 35, -115).values()),
+                         [far])
+        with patch("models.storage", self.storage):
+            far.latitude = 37.78  # Move the place next to the first
+            far.longitude = -122.41
+        # Check that the index follows the move and the deletion
+        self.assertEqual(len(self.storage.nearby(37.77, -122.42, 10)), 2)
+        self.storage.delete(self.place)
+        found = self.storage.nearby(37.77, -122.42, 10, limit=5)
+        self.assertEqual([obj for obj, _ in found], [far])
+        # Check that classes without coordinates are rejected
+        with self.assertRaises(ValueError):
+            self.storage.nearby(0, 0, 1, cls=City)
+
+    def test_nearby_indexed_coordinates(self):
+        """Test the spatial index follows coordinates that are indexed"""
+        self.storage.count(Place)  # Index the new dictionary while empty
+        self.storage.add_index(Place, "latitude")  # Index a coordinate
+        self.storage.new(self.place)
+        with patch("models.storage", self.storage):
+            self.place.longitude = 2.35  # Move the place to Paris
+            self.place.latitude = 48.85
+        # Check that the place is found where it is, not where it was
+        found = self.storage.nearby(48.85, 2.35, 5)
+        self.assertEqual([obj for obj, _ in found], [self.place])
+        self.assertEqual(self.storage.nearby(0, 2.35, 5), [])
+        self.assertEqual(list(self.storage.filter(
+            Place, latitude=48.85).values()), [self.place])
+
+    def test_related(self):
+        """Test the reverse lookups of several objects at once"""
+        other = State()  # Create a second state
+        cities = sorted([City(), City()], key=lambda city: city.id)
+        for city in cities:  # Attach the cities to the first state
+            city.state_id = self.state.id
+            self.storage.new(city)
+        # Check that the cities are found by state, sorted by key
+        found = self.storage.related(City, "state_id",
+                                     [self.state.id, other.id])
+        self.assertEqual(found, {self.state.id: cities, other.id: []})
+        with patch("models.storage", self.storage):
+            cities[0].state_id = other.id  # Move a city
+            # Check that the relationship property follows the move
+            self.assertEqual(other.cities, cities[:1])
+        self.storage.delete(cities[1])
+        self.assertEqual(self.storage.related(City, "state_id",
+                                              [self.state.id]),
+                         {self.state.id: []})
+        # Check that attributes without an index are scanned
+        self.assertEqual(self.storage.related("City", "name", [""]),
+                         {"": cities[:1]})
+
+    def test_search(self):
+        """Test the text index follows the reviews and is saved"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "file.json")
+        self.storage._FileStorage__file_path = path
+        self.review.text = "Quiet room with a great view"
+        self.place.name = "Beach house"
+        self.storage.new(self.review)  # Add the texts to storage
+        self.storage.new(self.place)
+        self.storage.save()  # Check that no index is built before a search
+        self.assertFalse(os.path.exists(path + ".search"))
+        # Check that the matches are ranked and filtered by class
+        found = self.storage.search("quiet beach")
+        self.assertEqual({obj for obj, _ in found}, {self.review, self.place})
+        self.assertEqual(self.storage.search("beach", cls=Review), [])
+        with patch("models.storage", self.storage):
+            self.review.text = "Noisy street"  # Change the words
+        self.assertEqual(self.storage.search("quiet"), [])
+        self.storage.save()  # Write the file and the index
+        self.assertTrue(os.path.exists(path + ".search"))
+        # Check that a new storage indexes nothing until a search, then
+        # reads the index instead of the texts
+        storage = FileStorage()
+        storage._FileStorage__file_path = path
+        storage._FileStorage__objects = {}
+        with patch("models.engine.text_index.tokenize",
+                   wraps=text_index.tokenize) as tokenize:
+            storage.reload()
+            tokenize.assert_not_called()
+            found = storage.search("noisy")
+        tokenize.assert_called_once_with("noisy")
+        self.assertEqual([obj.id for obj, _ in found], [self.review.id])
+        storage.delete(storage.get(Review, self.review.id))
+        self.assertEqual(storage.search("noisy"), [])
+
+    @unittest.skipUnless(analytics.numpy is not None, "needs NumPy")
+    def test_columns(self):
+        """Test that the NumPy columns follow the places"""
+        cheap, expensive = Place(), Place()  # Create two places
+        cheap.city_id = expensive.city_id = "SF"
+        cheap.price_by_night, expensive.price_by_night = 50, 150
+        self.storage.new(cheap)  # Add the first place before the columns
+        columns = self.storage.columns(Place)
+        self.storage.new(expensive)  # Add the second one after
+        # Check that both places are in the columns
+        self.assertEqual(columns.aggregate("price_by_night", by="city_id"),
+                         {"SF": 100})
+        with patch("models.storage", self.storage):
+            expensive.price_by_night = 250  # Raise a price
+        self.storage.delete(cheap)  # Delete the other place
+        # Check that the change and the deletion are reflected
+        self.assertEqual(columns.aggregate("price_by_night", "sum"), 250)
+        self.assertIs(self.storage.columns("Place"), columns)
+
+    @unittest.skipUnless(analytics.numpy is not None, "needs NumPy")
+    def test_columns_mark_dirty_without_name(self):
+        """Test marking a place dirty without naming the attribute"""
+        place = Place()  # Create a place
+        place.price_by_night = 80
+        self.storage.new(place)
+        columns = self.storage.columns(Place)
+        place.__dict__["price_by_night"] = 120  # Change it unnoticed
+        self.storage.mark_dirty(place)  # Report an unknown change
+        # Check that the whole row is refreshed
+        self.assertEqual(columns.aggregate("price_by_night", "sum"), 120)
+
     def test_class_dict(self):
         """Test retrieving the class dictionary"""
         # Retrieve the class dictionary
@@ -138,5 +467,721 @@ class TestFileStorage(unittest.TestCase):
             pass
 
 
+class TestFileStorageJournal(unittest.TestCase):
+    """Tests for the journaled mode of the FileStorage class"""
+
+    def setUp(self):
+        """Set up a journaled storage in a temporary directory"""
+        # Create a temporary directory for the test files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        # Create a journaled FileStorage with a small compaction threshold
+        self.storage = FileStorage(journal=True, compact_threshold=3)
+        self.storage._FileStorage__file_path = self.path
+        # Clear the objects dictionary
+        self.storage._FileStorage__objects = {}
+
+    def reopen(self):
+        """Return a fresh journaled storage reading the same files"""
+        storage = FileStorage(journal=True, compact_threshold=3)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        storage.reload()
+        return storage
+
+    def test_save_appends_to_log(self):
+        """Test that save only appends the changed objects to the log"""
+        user = User()  # Create a new User instance
+        self.storage.new(user)  # Add it to the journaled storage
+        self.storage.save()  # Append it to the log
+        # The snapshot is not written, only the log
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path + ".log", encoding="utf-8") as file:
+            records = [json.loads(line) for line in file]
+        # Check that exactly one set record was appended
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["op"], "set")
+        self.assertEqual(records[0]["key"], "User." + user.id)
+
+    def test_reload_replays_log(self):
+        """Test that reload replays the log on top of the snapshot"""
+        user = User()  # Create a new User instance
+        place = Place()  # Create a new Place instance
+        self.storage.new(user)  # Add the user to the storage
+        self.storage.new(place)  # Add the place to the storage
+        self.storage.save()  # Append both to the log
+        self.storage.delete(user)  # Delete the user
+        self.storage.save()  # Append the deletion to the log
+        # Reload the files into a new storage
+        objects = self.reopen().all()
+        # Check that only the place survived
+        self.assertNotIn("User." + user.id, objects)
+        self.assertIn("Place." + place.id, objects)
+
+    def test_compaction(self):
+        """Test that the log is folded into the snapshot"""
+        # Save enough changes to trigger a compaction
+        for _ in range(3):
+            self.storage.new(State())
+            self.storage.save()
+        # The snapshot now holds everything and the log is empty
+        self.assertEqual(os.path.getsize(self.path + ".log"), 0)
+        with open(self.path, encoding="utf-8") as file:
+            self.assertEqual(len(json.load(file)), 3)
+        # Check that reloading gives the same objects back
+        self.assertEqual(len(self.reopen().all()), 3)
+
+    def test_torn_last_record(self):
+        """Test that a partially written last record is ignored"""
+        city = City()  # Create a new City instance
+        self.storage.new(city)  # Add the city to the storage
+        self.storage.save()  # Append it to the log
+        # Simulate a crash in the middle of an append
+        with open(self.path + ".log", "a", encoding="utf-8") as file:
+            file.write('{"op":"set","key":"City.x","data":{')
+        # Check that the complete record is still replayed
+        self.assertIn("City." + city.id, self.reopen().all())
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Tests for the lazy mode of the FileStorage class"""
+
+    def setUp(self):
+        """Save a few objects and reload them lazily"""
+        # Create a temporary directory for the test files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        # Write a file with a state and two of its cities
+        storage = FileStorage()
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        self.state = State()  # Create a new State instance
+        self.cities = [City(), City()]  # Create two City instances
+        for city in self.cities:
+            city.state_id = self.state.id  # Attach the city to the state
+            storage.new(city)  # Add the city to the storage
+        storage.new(self.state)  # Add the state to the storage
+        storage.save()  # Write the file
+        # Create a lazy storage reading the same file
+        self.storage = FileStorage(lazy=True)
+        self.storage._FileStorage__file_path = self.path
+        self.storage.all().clear()  # Forget the objects of other tests
+        self.storage.reload()
+
+    def loaded(self):
+        """Return the number of objects instantiated so far"""
+        return self.storage.all().loaded()
+
+    def test_reload_does_not_instantiate(self):
+        """Test that reload only keeps the raw records"""
+        # Check that every key is known but nothing is instantiated
+        self.assertEqual(len(self.storage.all()), 3)
+        self.assertIn("State." + self.state.id, self.storage.all())
+        self.assertEqual(self.loaded(), 0)
+
+    def test_access_instantiates_one_object(self):
+        """Test that looking up a key only instantiates that object"""
+        state = self.storage.all()["State." + self.state.id]
+        # Check that the state was rebuilt and nothing else
+        self.assertIsInstance(state, State)
+        self.assertEqual(state.id, self.state.id)
+        self.assertEqual(self.loaded(), 1)
+
+    def test_filter_and_count_without_loading(self):
+        """Test that indexes are built from the raw records"""
+        # Check that a class bucket can be counted without loading
+        self.assertEqual(len(self.storage.all(City)), 2)
+        self.assertEqual(self.loaded(), 2)
+        # Check that the raw records answer indexed queries
+        self.assertEqual(
+            len(self.storage.filter(City, state_id=self.state.id)), 2)
+
+    def test_query_loads_only_results(self):
+        """Test that queries are answered from the raw records"""
+        # Check that the conditions and the order read the raw records
+        result = self.storage.query(City, state_id=self.state.id,
+                                    order_by="-created_at", limit=1)
+        self.assertEqual(self.loaded(), 0)
+        # The newest city, ties broken by key
+        cities = sorted(self.cities, key=lambda city: city.id)
+        newest = sorted(cities, key=lambda city: city.created_at,
+                        reverse=True)[0]
+        self.assertEqual(next(result).id, newest.id)
+        self.assertEqual(self.loaded(), 1)
+
+    def test_save_keeps_raw_records(self):
+        """Test that saving writes untouched records as they were read"""
+        self.storage.save()  # Write the file again
+        # Check that nothing had to be instantiated
+        self.assertEqual(self.loaded(), 0)
+        with open(self.path, encoding="utf-8") as file:
+            self.assertEqual(len(json.load(file)), 3)
+
+
+class TestFileStorageTransaction(unittest.TestCase):
+    """Tests for the transactions of the FileStorage class"""
+
+    def setUp(self):
+        """Set up a storage with one saved user"""
+        # Create a temporary directory for the test files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        self.storage = FileStorage()  # Create a new storage
+        self.storage._FileStorage__file_path = self.path
+        self.storage._FileStorage__objects = {}
+        self.user = User()  # Create a new User instance
+        self.user.first_name = "Betty"  # Name the user
+        self.storage.new(self.user)  # Add the user to the storage
+        self.storage.save()  # Save it
+        self.key = "User." + self.user.id
+
+    def test_single_write(self):
+        """Test that a transaction writes the file once"""
+        with patch.object(self.storage, "_FileStorage__write_snapshot") \
+                as write:
+            with self.storage.transaction():
+                for _ in range(3):
+                    self.storage.new(Place())  # Add a place
+                    self.storage.save()  # Deferred until the commit
+                # Check that nothing was written yet
+                write.assert_not_called()
+        # Check that the commit wrote once
+        write.assert_called_once()
+
+    def test_rollback_restores_objects(self):
+        """Test that a rollback restores, removes and re-adds objects"""
+        place = Place()  # Create a new Place instance
+        self.storage.begin()  # Start a transaction
+        with patch("models.storage", self.storage):
+            self.user.first_name = "Holberton"  # Change the user
+        self.storage.new(place)  # Add the place
+        self.storage.rollback()  # Cancel everything
+        objects = self.storage.all()
+        # Check that the place is gone and the user is restored in place
+        self.assertNotIn("Place." + place.id, objects)
+        self.assertIs(objects[self.key], self.user)
+        self.assertEqual(self.user.first_name, "Betty")
+        self.assertEqual(len(self.storage.all(User)), 1)
+        # Check that nothing is left to save
+        self.assertFalse(self.storage._FileStorage__dirty)
+        with patch("models.storage", self.storage):
+            self.user.email = "betty@holberton.io"  # Change it again
+        self.storage.save()
+        # Check that the change made after the rollback is saved
+        storage = FileStorage()
+        storage._FileStorage__file_path = self.storage._FileStorage__file_path
+        storage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(storage.get(User, self.user.id).email,
+                         "betty@holberton.io")
+
+    def test_rollback_restores_deleted_objects(self):
+        """Test that a rollback brings deleted objects back"""
+        with self.assertRaises(KeyError):
+            with self.storage.transaction():
+                self.storage.delete(self.user)  # Delete the user
+                raise KeyError("abort")  # Roll the transaction back
+        # Check that the same user is back and indexed
+        self.assertIs(self.storage.all()[self.key], self.user)
+        self.assertIn(self.key, self.storage.all(User))
+
+    def test_rollback_keeps_earlier_changes(self):
+        """Test that changes made before begin stay unsaved"""
+        state = State()  # Create a new State instance
+        self.storage.new(state)  # Add it without saving
+        self.storage.begin()  # Start a transaction
+        self.storage.delete(state)  # Delete it in the transaction
+        self.storage.rollback()  # Cancel the deletion
+        # Check that the state is back and still has to be saved
+        self.assertIn("State." + state.id, self.storage.all())
+        self.assertIn("State." + state.id,
+                      self.storage._FileStorage__dirty)
+
+    def test_nested_transactions(self):
+        """Test that only the outermost commit writes"""
+        with patch.object(self.storage, "_FileStorage__write_snapshot") \
+                as write:
+            self.storage.begin()  # Outer transaction
+            self.storage.begin()  # Inner transaction
+            self.storage.new(City())  # Add a city
+            self.storage.commit()  # Inner commit, nothing written
+            write.assert_not_called()
+            self.storage.commit()  # Outer commit
+        write.assert_called_once()
+
+    def test_commit_without_transaction(self):
+        """Test that commit and rollback need a transaction"""
+        with self.assertRaises(RuntimeError):
+            self.storage.commit()
+        with self.assertRaises(RuntimeError):
+            self.storage.rollback()
+
+
+class TestFileStorageBackground(unittest.TestCase):
+    """Tests for the background flushing of the FileStorage class"""
+
+    def setUp(self):
+        """Set up a storage writing in the background"""
+        # Create a temporary directory for the test files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        self.storage = FileStorage(flush_interval=0.05)
+        self.storage._FileStorage__file_path = self.path
+        self.storage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Finish the writes before the directory is removed"""
+        self.storage.flush()
+
+    def test_saves_are_coalesced(self):
+        """Test that a burst of saves is written once"""
+        with patch.object(self.storage, "_FileStorage__write_snapshot") \
+                as write:
+            for _ in range(5):
+                self.storage.new(User())  # Add a user
+                self.storage.save()  # Returns before writing
+            write.assert_not_called()
+            self.storage.flush()  # Write the pending saves now
+            write.assert_called_once()
+            self.storage.flush()  # Nothing left to write
+            write.assert_called_once()
+
+    def test_background_write(self):
+        """Test that the background thread writes the file"""
+        user = User()  # Create a new User instance
+        self.storage.new(user)
+        self.storage.save()
+        self.storage._FileStorage__writer.join(0.5)  # Let it write
+        self.storage.flush()  # Wait for a write in progress
+        with open(self.path, encoding="utf-8") as file:
+            self.assertIn("User." + user.id, json.load(file))
+
+
+def save_users(path, count):
+    """Save count users one at a time from a new storage"""
+    storage = FileStorage()  # Storage of this process only
+    storage._FileStorage__file_path = path
+    storage._FileStorage__objects = {}
+    storage.reload()
+    for _ in range(count):
+        storage.new(User(id=str(uuid.uuid4())))  # Create a new user
+        storage.save()
+
+
+class TestFileStorageProcesses(unittest.TestCase):
+    """Tests for FileStorage instances sharing one file"""
+
+    def setUp(self):
+        """Set up two storages using the same file"""
+        # Create a temporary directory for the file
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        self.first = self.make_storage()
+        self.second = self.make_storage()
+
+    def make_storage(self, **kwargs):
+        """Return a storage with objects of its own using the file"""
+        storage = FileStorage(**kwargs)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        storage.reload()
+        return storage
+
+    def test_save_keeps_other_changes(self):
+        """Test that a save does not overwrite objects saved elsewhere"""
+        user = User()  # Create a new User instance
+        place = Place()  # Create a new Place instance
+        self.first.new(user)
+        self.first.save()
+        self.second.new(place)  # Not aware of the user yet
+        self.second.save()
+        # Check that the file holds both objects
+        storage = self.make_storage()
+        self.assertEqual(set(storage.all()),
+                         {"User." + user.id, "Place." + place.id})
+        # Check that the second storage merged the user before saving
+        self.assertIn("User." + user.id, self.second.all())
+
+    def test_refresh_merges_changes(self):
+        """Test that refresh pulls in changed and deleted records only"""
+        kept, changed, deleted = User(), User(), User()
+        for user in (kept, changed, deleted):
+            self.first.new(user)
+        self.first.save()
+        self.second.refresh()
+        objects = self.second.all()
+        loaded = objects["User." + kept.id]
+        changed.first_name = "Betty"  # Change a user in the first storage
+        # models.storage is notified of the change, not this storage
+        self.first.mark_dirty(changed, "first_name")
+        self.first.delete(deleted)  # Delete another one
+        self.first.save()
+        self.second.refresh()
+        # Check that the unchanged user was not instantiated again
+        self.assertIs(self.second.all()["User." + kept.id], loaded)
+        self.assertEqual(
+            self.second.all()["User." + changed.id].first_name, "Betty")
+        self.assertNotIn("User." + deleted.id, self.second.all())
+
+    def test_refresh_without_changes_reads_nothing(self):
+        """Test that refresh does not read an unchanged file"""
+        self.first.new(User())
+        self.first.save()
+        self.second.refresh()
+        with patch("json.load") as load:
+            self.second.refresh()
+        # Check that the file was not parsed again
+        load.assert_not_called()
+
+    def test_local_changes_win(self):
+        """Test that unsaved changes are not overwritten by a refresh"""
+        user = User()  # Create a new User instance
+        self.first.new(user)
+        self.first.save()
+        self.second.refresh()
+        copy = self.second.all()["User." + user.id]
+        copy.first_name = "Local"  # Change it without saving
+        self.second.mark_dirty(copy, "first_name")
+        user.first_name = "Remote"
+        self.first.mark_dirty(user, "first_name")
+        self.first.save()
+        self.second.refresh()
+        # Check that the unsaved change is kept
+        self.assertEqual(
+            self.second.all()["User." + user.id].first_name, "Local")
+        self.second.save()  # Check that the local change is then saved
+        self.assertEqual(
+            self.make_storage().all()["User." + user.id].first_name, "Local")
+
+    def test_journal_reads_new_records(self):
+        """Test that journaled storages only read the appended records"""
+        first = self.make_storage(journal=True)
+        second = self.make_storage(journal=True)
+        user = User()  # Create a new User instance
+        first.new(user)
+        first.save()
+        second.refresh()
+        # Check that the appended record was applied
+        self.assertIn("User." + user.id, second.all())
+        second.new(Place())
+        second.save()
+        first.refresh()
+        # Check that each storage holds both objects
+        self.assertEqual(set(first.all()), set(second.all()))
+        self.assertEqual(len(first.all()), 2)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_concurrent_processes(self):
+        """Test that no save is lost when processes save concurrently"""
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=save_users, args=(self.path, 10))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        # Check that every user of every process was saved
+        self.assertEqual(len(self.make_storage().all(User)), 40)
+
+
+class TestFileStorageSharded(unittest.TestCase):
+    """Tests for the sharded mode of the FileStorage class"""
+
+    def setUp(self):
+        """Set up a sharded storage in a temporary directory"""
+        # Create a temporary directory for the shard files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        self.storage = self.make_storage()
+        self.user = User()  # Create a new User instance
+        self.place = Place()  # Create a new Place instance
+        for obj in (self.user, self.place):
+            self.storage.new(obj)
+        self.storage.save()
+
+    def make_storage(self, **kwargs):
+        """Return an empty sharded storage using the directory"""
+        storage = FileStorage(sharded=True, **kwargs)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        return storage
+
+    def shard(self, class_name):
+        """Return the path of the shard of a class"""
+        return os.path.join(self.directory.name,
+                            "file.{}.json".format(class_name))
+
+    def test_one_file_per_class(self):
+        """Test that each class is saved in its own file"""
+        with open(self.shard("User"), encoding="utf-8") as file:
+            # Check that the user shard only holds the user
+            self.assertEqual(list(json.load(file)), ["User." + self.user.id])
+        # Check that the single file is not written
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_save_writes_changed_shards(self):
+        """Test that a save only rewrites the shards with changes"""
+        before = os.stat(self.shard("Place")).st_ino
+        self.user.first_name = "Betty"  # Change the user
+        self.storage.mark_dirty(self.user, "first_name")
+        self.storage.save()
+        # Check that the place shard was not rewritten
+        self.assertEqual(os.stat(self.shard("Place")).st_ino, before)
+        with open(self.shard("User"), encoding="utf-8") as file:
+            data = json.load(file)["User." + self.user.id]
+        self.assertEqual(data["first_name"], "Betty")
+
+    def test_delete_rewrites_shard(self):
+        """Test that deleting the last object of a class empties its shard"""
+        self.storage.delete(self.place)
+        self.storage.save()
+        with open(self.shard("Place"), encoding="utf-8") as file:
+            # Check that the place is gone
+            self.assertEqual(json.load(file), {})
+
+    def test_parallel_reload(self):
+        """Test that the shards are read back by worker processes"""
+        storage = self.make_storage(workers=2)
+        storage.reload()
+        # Check that both objects were hydrated in this process
+        self.assertEqual(storage.all()["User." + self.user.id].to_dict(),
+                         self.user.to_dict())
+        self.assertIsInstance(storage.all()["Place." + self.place.id], Place)
+
+    def test_reload_in_process(self):
+        """Test that worker processes are only started when asked for"""
+        with patch("models.engine.file_storage.ProcessPoolExecutor") as pool:
+            self.make_storage().reload()  # Default: no workers
+            with patch("multiprocessing.parent_process",
+                       return_value=object()):
+                # A worker process reloading while it bootstraps
+                self.make_storage(workers=2).reload()
+        # Check that the shards were read here both times
+        pool.assert_not_called()
+
+    def test_refresh_reads_changed_shards(self):
+        """Test that refresh only reads the shards that changed"""
+        storage = self.make_storage(workers=0)
+        storage.reload()
+        self.storage.new(User())  # Add a user from the other storage
+        self.storage.save()
+        with patch("models.engine.file_storage.read_shard",
+                   wraps=read_shard) as read:
+            storage.refresh()
+        # Check that only the user shard was read
+        read.assert_called_once_with(self.shard("User"))
+        self.assertEqual(len(storage.all(User)), 2)
+
+
+class TestFileStoragePartitioned(unittest.TestCase):
+    """Tests for the hash partitions of the FileStorage class"""
+
+    def setUp(self):
+        """Set up a storage with four partitions per class"""
+        # Create a temporary directory for the partition files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        self.storage = self.make_storage()
+        self.users = [User() for _ in range(20)]  # Create users
+        for user in self.users:
+            self.storage.new(user)
+        self.storage.save()
+
+    def make_storage(self):
+        """Return an empty partitioned storage using the directory"""
+        storage = FileStorage(partitions=4, workers=0)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        return storage
+
+    def partition(self, number):
+        """Return the path of a partition of the users"""
+        return os.path.join(self.directory.name,
+                            "file.User.{}.json".format(number))
+
+    def test_objects_split_by_id(self):
+        """Test that each user is saved in the partition of its id"""
+        for user in self.users:
+            path = self.partition(partition_of(user.id, 4))
+            with open(path, encoding="utf-8") as file:
+                # Check that the user is in its partition
+                self.assertIn("User." + user.id, json.load(file))
+
+    def test_save_writes_changed_partitions(self):
+        """Test that a save only rewrites the partitions with changes"""
+        inodes = [os.stat(self.partition(number)).st_ino
+                  for number in range(4)]
+        user = self.users[0]
+        user.first_name = "Betty"  # Change one user
+        self.storage.mark_dirty(user, "first_name")
+        self.storage.save()
+        changed = partition_of(user.id, 4)
+        for number in range(4):
+            # Check that only the partition of the user was rewritten
+            self.assertEqual(
+                os.stat(self.partition(number)).st_ino == inodes[number],
+                number != changed)
+
+    def test_save_hashes_changed_keys_only(self):
+        """Test that a save does not look for the partition of every key"""
+        user = self.users[0]
+        self.storage.mark_dirty(user, "first_name")  # Change one user
+        with patch("models.engine.file_storage.partition_of",
+                   wraps=partition_of) as hashed:
+            self.storage.save()
+        # Check that only the changed key was hashed
+        hashed.assert_called_once_with(user.id, 4)
+        with open(self.partition(partition_of(user.id, 4)),
+                  encoding="utf-8") as file:
+            self.assertIn("User." + user.id, json.load(file))
+
+    def test_reload(self):
+        """Test that every partition is read back"""
+        storage = self.make_storage()
+        storage.reload()
+        # Check that every user was read back
+        self.assertEqual(set(storage.all(User)),
+                         {"User." + user.id for user in self.users})
+
+
+class TestFileStorageThreadSafe(unittest.TestCase):
+    """Tests for the thread-safe mode of the FileStorage class"""
+
+    def setUp(self):
+        """Set up a temporary directory for the test file"""
+        # Create a temporary directory for the test files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+
+    def make_storage(self, path, **kwargs):
+        """Return an empty thread-safe storage using path"""
+        storage = FileStorage(thread_safe=True, **kwargs)
+        storage._FileStorage__file_path = path
+        storage._FileStorage__objects = {}
+        return storage
+
+    def test_transactions_refused(self):
+        """Test that transactions cannot mix the changes of threads"""
+        storage = self.make_storage(self.path)
+        # Check that begin() and transaction() refuse to start
+        with self.assertRaises(RuntimeError):
+            storage.begin()
+        with self.assertRaises(RuntimeError):
+            with storage.transaction():
+                pass
+        # Check that saves were not turned into no-ops
+        self.assertEqual(storage._FileStorage__depth, 0)
+
+    def test_all_is_a_snapshot(self):
+        """Test that all() does not change while it is iterated"""
+        storage = self.make_storage(self.path)
+        storage.new(User())
+        objects = storage.all()
+        storage.new(User())  # Add a user after the copy
+        # Check that the copy was not changed
+        self.assertEqual(len(objects), 1)
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_lazy_snapshot_shares_instances(self):
+        """Test that a lazy copy loads the same instances"""
+        storage = self.make_storage(self.path)
+        user = User()  # Create a new User instance
+        storage.new(user)
+        storage.save()
+        storage = self.make_storage(self.path, lazy=True)
+        storage._FileStorage__objects = LazyObjects(
+            storage._FileStorage__hydrate, lock=threading.Lock())
+        storage.reload()
+        key = "User." + user.id
+        objects = storage.all()  # Copy the record before it is loaded
+        # Check that the copy and the storage hold the same instance
+        self.assertIs(storage.all()[key], storage.all(User)[key])
+        # Check that the older copy returns the instance loaded since
+        self.assertIs(objects[key], storage.all(User)[key])
+
+    def test_no_rebuild_while_adding(self):
+        """Test that reads during new() do not rebuild the indexes"""
+        storage = self.make_storage(self.path)
+        storage.count(User)  # Index the new dictionary while it is empty
+        done = threading.Event()
+
+        def create():
+            """Add users while the main thread counts them"""
+            for _ in range(3000):
+                storage.new(User())
+            done.set()
+        thread = threading.Thread(target=create)
+        with patch.object(storage, "_FileStorage__rebuild_indexes",
+                          wraps=storage._FileStorage__rebuild_indexes) \
+                as rebuild:
+            thread.start()
+            while not done.is_set():
+                storage.count(User)
+            thread.join()
+        # Check that the indexes were never thrown away
+        rebuild.assert_not_called()
+        self.assertEqual(storage.count(User), 3000)
+
+    def test_stress(self):
+        """Test many threads creating, updating, deleting and saving"""
+        storage = self.make_storage(self.path)
+        errors = []
+
+        def work(seed):
+            """Change the storage at random and read it back"""
+            rng = random.Random(seed)
+            mine = []  # Users created by this thread
+            try:
+                for step in range(300):
+                    action = rng.random()
+                    if action < 0.4 or not mine:
+                        user = User(id=str(uuid.uuid4()))
+                        storage.new(user)
+                        mine.append(user)
+                    elif action < 0.6:
+                        user = rng.choice(mine)
+                        user.__dict__["first_name"] = str(step)
+                        storage.mark_dirty(user, "first_name")
+                    elif action < 0.75:
+                        storage.delete(mine.pop(rng.randrange(len(mine))))
+                    elif action < 0.85:
+                        storage.save()
+                    else:
+                        # Iterate while the other threads change it
+                        for key, obj in storage.all().items():
+                            self.assertEqual(key, "User." + obj.id)
+                        storage.all(User)
+            except Exception as error:  # Reported by the main thread
+                errors.append(error)
+        threads = [threading.Thread(target=work, args=(seed,))
+                   for seed in range(8)]
+        # Switch threads very often to make races likely
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        # Check that no thread failed
+        self.assertEqual(errors, [])
+        storage.save()
+        # Check that the file holds exactly the objects in memory
+        loaded = self.make_storage(self.path)
+        loaded.reload()
+        self.assertEqual(set(loaded.all()), set(storage.all()))
+        self.assertEqual(set(storage.all(User)), set(storage.all()))
+
+
 if __name__ == '__main__':
     unittest.main()  # Run the unittests
@@ -0,0 +1,58 @@
+"""Module for testing GridIndex class"""
+import unittest
+from models.engine.geo_index import GridIndex, distance_km
+
+
+class TestGridIndex(unittest.TestCase):
+    """Tests for the GridIndex class"""
+
+    def setUp(self):
+        """Set up test variables"""
+        # Index a few cities
+        self.index = GridIndex()
+        self.index.add("Place.sf", 37.7749, -122.4194)
+        self.index.add("Place.oakland", 37.8044, -122.2712)
+        self.index.add("Place.la", 34.0522, -118.2437)
+        self.index.add("Place.suva", -18.1416, 178.4419)
+        self.index.add("Place.taveuni", -16.8, -179.9)
+
+    def test_distance(self):
+        """Test the distance between two cities"""
+        # Check San Francisco to Los Angeles, about 559 km
+        self.assertAlmostEqual(
+            distance_km(37.7749, -122.4194, 34.0522, -118.2437), 559, -1)
+
+    def test_nearby(self):
+        """Test finding the points within a radius, nearest first"""
+        found = self.index.nearby(37.77, -122.42, 20)
+        # Check that only the bay area is found, in order
+        self.assertEqual([key for _, key in found],
+                         ["Place.sf", "Place.oakland"])
+        self.assertEqual(
+            [key for _, key in self.index.nearby(37.77, -122.42, 1000, 1)],
+            ["Place.sf"])
+        # Check a search across the antimeridian
+        found = self.index.nearby(-17.5, 179.9, 300)
+        self.assertEqual({key for _, key in found},
+                         {"Place.suva", "Place.taveuni"})
+
+    def test_box(self):
+        """Test finding the points inside a bounding box"""
+        # Check a box in California and one across the antimeridian
+        self.assertEqual(set(self.index.box(33, -123, 38, -118)),
+                         {"Place.sf", "Place.oakland", "Place.la"})
+        self.assertEqual(set(self.index.box(-20, 170, -15, -170)),
+                         {"Place.suva", "Place.taveuni"})
+
+    def test_move_and_remove(self):
+        """Test that moved and removed points are found where they are"""
+        self.index.add("Place.sf", 34.05, -118.24)  # Move next to LA
+        self.index.remove("Place.la")  # Remove LA
+        self.index.add("Place.oakland", None, None)  # No coordinates
+        # Check that only the moved point is left in California
+        self.assertEqual(self.index.box(33, -123, 38, -118), ["Place.sf"])
+        self.assertEqual(len(self.index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
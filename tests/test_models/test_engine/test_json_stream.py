@@ -0,0 +1,67 @@
+"""Module for testing the json_stream functions"""
+import json
+import unittest
+from io import StringIO
+from models.engine.json_stream import iter_entries, dump_entries
+
+
+class TestJsonStream(unittest.TestCase):
+    """Tests for the streaming JSON reader and writer"""
+
+    def setUp(self):
+        """Set up test variables"""
+        # Entries shaped like the content of file.json
+        self.entries = {
+            "User.1": {"id": "1", "email": "a@b.c", "__class__": "User"},
+            "Place.2": {"id": "2", "amenity_ids": ["wifi", "}{,:"],
+                        "latitude": 1.5, "__class__": "Place"},
+            "State.3": {"id": "3", "name": "Café \"q\"\n",
+                        "__class__": "State"},
+        }
+
+    def test_dump_matches_json_dump(self):
+        """Test that the writer output equals json.dump with indent=2"""
+        output = StringIO()  # Write to memory
+        dump_entries(self.entries.items(), output)
+        # Check that the text is the same as json.dumps
+        self.assertEqual(output.getvalue(),
+                         json.dumps(self.entries, indent=2))
+
+    def test_dump_empty(self):
+        """Test writing no entries"""
+        output = StringIO()  # Write to memory
+        dump_entries([], output)
+        # Check that an empty object is written
+        self.assertEqual(output.getvalue(), "{}")
+
+    def test_iter_small_chunks(self):
+        """Test reading entries cut across many chunks"""
+        text = json.dumps(self.entries, indent=2)
+        # Read three characters at a time
+        entries = dict(iter_entries(StringIO(text), chunk_size=3))
+        # Check that every entry was decoded
+        self.assertEqual(entries, self.entries)
+
+    def test_iter_compact(self):
+        """Test reading a file without whitespace"""
+        text = json.dumps(self.entries, separators=(",", ":"))
+        # Check that every entry was decoded
+        self.assertEqual(dict(iter_entries(StringIO(text))), self.entries)
+
+    def test_iter_empty(self):
+        """Test reading an empty object"""
+        # Check that no entries are yielded
+        self.assertEqual(list(iter_entries(StringIO(" { } "))), [])
+
+    def test_iter_malformed(self):
+        """Test reading a file that is not a JSON object"""
+        # Check that a missing colon raises an error
+        with self.assertRaises(ValueError):
+            list(iter_entries(StringIO('{"User.1" {}}')))
+        # Check that a truncated file raises an error
+        with self.assertRaises(ValueError):
+            list(iter_entries(StringIO('{"User.1": {"id": "1"')))
+
+
+if __name__ == '__main__':
+    unittest.main()  # Run the unittests
@@ -0,0 +1,130 @@
+"""Module for testing MmapStorage class"""
+import os
+import tempfile
+import unittest
+from models.engine.file_storage import FileStorage
+from models.engine.mmap_storage import MmapStorage
+from models.engine import json_stream
+from models.user import User
+from models.place import Place
+
+
+class TestMmapStorage(unittest.TestCase):
+    """Tests for the MmapStorage class"""
+
+    def setUp(self):
+        """Set up a file written by FileStorage and a storage reading it"""
+        # Create a temporary directory for the JSON file
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        writer = FileStorage()  # Write the file with a FileStorage
+        writer._FileStorage__file_path = self.path
+        writer._FileStorage__objects = {}
+        self.user = User()  # Create a new User instance
+        self.user.first_name = "Betty \"B\"\n  \"x\": 1"  # Tricky name
+        self.place = Place()  # Create a new Place instance
+        self.place.user_id = self.user.id
+        self.place.amenity_ids = ["wifi"]
+        self.place.name = "Beach house"
+        for obj in (self.user, self.place):
+            writer.new(obj)
+        writer.save()
+        self.storage = MmapStorage(self.path)
+        self.addCleanup(self.storage.close)
+        self.storage.reload()
+
+    def test_records_decoded_on_access(self):
+        """Test that the records are read back unchanged"""
+        objects = self.storage.all()
+        # Check that the keys are known without decoding anything
+        self.assertEqual(len(objects), 2)
+        self.assertIn("User." + self.user.id, objects)
+        # Check that every attribute survived
+        for obj in (self.user, self.place):
+            key = type(obj).__name__ + "." + obj.id
+            self.assertEqual(objects[key].to_dict(), obj.to_dict())
+
+    def test_decoded_object_reused(self):
+        """Test that an object in use is not decoded twice"""
+        key = "User." + self.user.id
+        first = self.storage.all()[key]
+        # Check that the same instance is returned while it is in use
+        self.assertIs(self.storage.all()[key], first)
+
+    def test_all_with_class(self):
+        """Test that all() filters by class"""
+        # Check that only the place is returned
+        self.assertEqual(list(self.storage.all(Place)),
+                         ["Place." + self.place.id])
+        self.assertEqual(len(self.storage.all("City")), 0)
+
+    def test_get_and_count(self):
+        """Test looking a record up and counting without decoding"""
+        # Check that the user is found and the counts are right
+        self.assertEqual(self.storage.get(User, self.user.id).to_dict(),
+                         self.user.to_dict())
+        self.assertIsNone(self.storage.get("User", "missing"))
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count(Place), 1)
+
+    def test_filter(self):
+        """Test that filter() matches attribute values"""
+        result = self.storage.filter(Place, user_id=self.user.id)
+        # Check that the place is found
+        self.assertEqual(list(result), ["Place." + self.place.id])
+
+    def test_related(self):
+        """Test that related() finds the places of users"""
+        found = self.storage.related(Place, "user_id", [self.user.id, "x"])
+        # Check that the place is found for its owner only
+        self.assertEqual([place.id for place in found[self.user.id]],
+                         [self.place.id])
+        self.assertEqual(found["x"], [])
+
+    def test_search(self):
+        """Test that search() matches the words of the records"""
+        found = self.storage.search("house on the beach")
+        # Check that the place is found, and not among the users
+        self.assertEqual([obj.id for obj, _ in found], [self.place.id])
+        self.assertEqual(self.storage.search("beach", cls=User), [])
+
+    def test_streamed_file(self):
+        """Test reading a file written entry by entry"""
+        with open(self.path, "w", encoding="utf-8") as file:
+            json_stream.dump_entries(
+                [("User." + self.user.id, self.user.to_dict())], file)
+        self.storage.reload()
+        # Check that the user is read back
+        self.assertEqual(list(self.storage.all()), ["User." + self.user.id])
+
+    def test_empty_and_missing_file(self):
+        """Test reading an empty object and a missing file"""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write("{}")
+        self.storage.reload()
+        # Check that no objects are served
+        self.assertEqual(len(self.storage.all()), 0)
+        os.remove(self.path)
+        self.storage.reload()
+        self.assertEqual(len(self.storage.all()), 0)
+
+    def test_compact_file_rejected(self):
+        """Test that a file without the FileStorage layout is rejected"""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write('{"User.1": {"id": "1", "__class__": "User"}}')
+        # Check that a ValueError is raised
+        with self.assertRaises(ValueError):
+            self.storage.reload()
+
+    def test_read_only(self):
+        """Test that changing the storage raises a RuntimeError"""
+        for method in (self.storage.save, self.storage.begin):
+            with self.assertRaises(RuntimeError):
+                method()
+        with self.assertRaises(RuntimeError):
+            self.storage.new(self.user)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Module for testing Query class"""
+import unittest
+from datetime import datetime
+from models.engine.query import Query
+
+
+class TestQuery(unittest.TestCase):
+    """Tests for the Query class"""
+
+    def setUp(self):
+        """Set up test variables"""
+        # Attributes of the records and the records themselves
+        self.types = {"name": str, "price": int, "created_at": datetime}
+        self.records = [
+            ("Place.1", {"name": "b", "price": 30,
+                         "created_at": "2024-01-01T00:00:00"}),
+            ("Place.2", {"name": "a", "price": 10,
+                         "created_at": "2024-02-01T00:00:00"}),
+            ("Place.3", {"name": "c"}),
+            ("Place.4", {"name": "d", "price": 20,
+                         "created_at": "2024-03-01T00:00:00"}),
+        ]
+
+    def run_query(self, **arguments):
+        """Return the keys of the records a query selects"""
+        query = Query(self.types, **arguments)
+        return list(query.select(self.records, lambda record, field:
+                                 record.get(field),
+                                 lambda key, record: key))
+
+    def test_conditions(self):
+        """Test the operators of the conditions"""
+        # Check each operator, records missing the attribute never match
+        self.assertEqual(self.run_query(conditions={"price__lt": 25}),
+                         ["Place.2", "Place.4"])
+        self.assertEqual(self.run_query(conditions={"price__ne": 10}),
+                         ["Place.1", "Place.4"])
+        self.assertEqual(self.run_query(conditions={"name__in": ["a", "c"]}),
+                         ["Place.2", "Place.3"])
+        self.assertEqual(self.run_query(conditions={"name": "d",
+                                                    "price__ge": 20}),
+                         ["Place.4"])
+
+    def test_timestamps(self):
+        """Test that timestamps stored as strings are compared as dates"""
+        result = self.run_query(
+            conditions={"created_at__gt": "2024-01-15T00:00:00"})
+        # Check that only the later records match
+        self.assertEqual(result, ["Place.2", "Place.4"])
+
+    def test_order_and_page(self):
+        """Test sorting in both directions and paging the results"""
+        # Check that records missing the attribute come last
+        self.assertEqual(self.run_query(conditions={}, order_by="price"),
+                         ["Place.2", "Place.4", "Place.1", "Place.3"])
+        self.assertEqual(self.run_query(conditions={}, order_by=["-price"]),
+                         ["Place.1", "Place.4", "Place.2", "Place.3"])
+        # Check that a page is taken from the sorted results
+        self.assertEqual(self.run_query(conditions={}, order_by="price",
+                                        limit=2, offset=1),
+                         ["Place.4", "Place.1"])
+        # Check that a page without order follows the records
+        self.assertEqual(self.run_query(conditions={}, limit=1, offset=2),
+                         ["Place.3"])
+
+    def test_order_mixed_types(self):
+        """Test sorting values of different types"""
+        self.records[1][1]["price"] = "abc"  # Price stored as text
+        self.records[2][1]["price"] = [1]  # And as a list
+        # Check that numbers come first, then the other types by name
+        self.assertEqual(self.run_query(conditions={}, order_by="price"),
+                         ["Place.4", "Place.1", "Place.3", "Place.2"])
+        self.assertEqual(self.run_query(conditions={}, order_by="-price",
+                                        limit=2),
+                         ["Place.2", "Place.3"])
+
+    def test_projection(self):
+        """Test returning some attributes instead of the objects"""
+        query = Query(self.types, {"price": 10}, fields=["name", "price"])
+        result = list(query.select(self.records, lambda record, field:
+                                   record.get(field), None))
+        # Check that the attributes are returned without loading
+        self.assertEqual(result, [{"name": "a", "price": 10}])
+
+    def test_invalid_queries(self):
+        """Test that unknown attributes and operators are rejected"""
+        for arguments in ({"conditions": {"color": "red"}},
+                          {"conditions": {"price__near": 1}},
+                          {"conditions": {"price__in": 1}},
+                          {"conditions": {}, "order_by": "-color"},
+                          {"conditions": {}, "limit": -1},
+                          {"conditions": {}, "fields": ["color"]}):
+            with self.assertRaises(ValueError):
+                Query(self.types, **arguments)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Module for testing the rebalance tool"""
+import os
+import tempfile
+import unittest
+from models.engine.file_storage import FileStorage
+from models.engine.rebalance import rebalance
+from models.user import User
+from models.place import Place
+
+
+class TestRebalance(unittest.TestCase):
+    """Tests for the rebalance function"""
+
+    def setUp(self):
+        """Set up a storage that is not sharded yet"""
+        # Create a temporary directory for the files
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "file.json")
+        storage = self.make_storage(0)
+        self.keys = set()  # Keys of the saved objects
+        for cls in (User, Place) * 10:
+            obj = cls()  # Create a new instance
+            storage.new(obj)
+            self.keys.add(cls.__name__ + "." + obj.id)
+        storage.save()
+
+    def make_storage(self, partitions):
+        """Return an empty storage with a number of partitions"""
+        storage = FileStorage(sharded=partitions > 0,
+                              partitions=max(partitions, 1), workers=0)
+        storage._FileStorage__file_path = self.path
+        storage._FileStorage__objects = {}
+        return storage
+
+    def files(self):
+        """Return the names of the files in the directory"""
+        return sorted(name for name in os.listdir(self.directory.name)
+                      if not name.endswith(".lock"))
+
+    def test_rebalance(self):
+        """Test moving the records to 1, 3 and back to 0 partitions"""
+        for old, new in ((0, 1), (1, 3), (3, 2), (2, 0)):
+            # Check that every record was moved
+            self.assertEqual(rebalance(self.path, old, new), 20)
+            storage = self.make_storage(new)
+            storage.reload()
+            self.assertEqual(set(storage.all()), self.keys)
+        # Check that only the single file is left
+        self.assertEqual(self.files(), ["file.json"])
+
+    def test_partition_files(self):
+        """Test that the old files are replaced by the new ones"""
+        rebalance(self.path, 0, 2)
+        # Check that there are two files per class
+        self.assertIn("file.User.1.json", self.files())
+        self.assertNotIn("file.json", self.files())
+        self.assertEqual(len(self.files()),
+                         2 * len(FileStorage().class_dict()))
+
+    def test_unknown_class(self):
+        """Test that records of unknown classes stop the rebalance"""
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write('{"Ghost.1": {"id": "1", "__class__": "Ghost"}}')
+        # Check that a ValueError is raised and nothing is changed
+        with self.assertRaises(ValueError):
+            rebalance(self.path, 0, 2)
+        self.assertEqual(self.files(), ["file.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Module for testing RWLock class"""
+import threading
+import time
+import unittest
+from models.engine.rw_lock import RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    """Tests for the RWLock class"""
+
+    def setUp(self):
+        """Set up a new lock"""
+        self.lock = RWLock()
+
+    def run_thread(self, target):
+        """Start a daemon thread running target"""
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        return thread
+
+    def test_readers_share_the_lock(self):
+        """Test that several threads read at the same time"""
+        inside = threading.Barrier(3, timeout=5)
+
+        def read():
+            """Wait inside the read lock for the other readers"""
+            with self.lock.read():
+                inside.wait()
+        threads = [self.run_thread(read) for _ in range(2)]
+        with self.lock.read():
+            # Check that the three readers meet inside the lock
+            inside.wait()
+        for thread in threads:
+            thread.join()
+
+    def test_writer_excludes_readers(self):
+        """Test that a reader waits for the writer"""
+        events = []
+
+        def read():
+            """Record when the read lock is taken"""
+            with self.lock.read():
+                events.append("read")
+        with self.lock.write():
+            thread = self.run_thread(read)
+            time.sleep(0.05)
+            events.append("written")
+        thread.join(5)
+        # Check that the reader ran after the writer
+        self.assertEqual(events, ["written", "read"])
+
+    def test_waiting_writer_goes_first(self):
+        """Test that new readers wait behind a waiting writer"""
+        events = []
+
+        def write():
+            """Record when the write lock is taken"""
+            with self.lock.write():
+                events.append("write")
+
+        def read():
+            """Record when the read lock is taken"""
+            with self.lock.read():
+                events.append("read")
+        with self.lock.read():
+            writer = self.run_thread(write)
+            time.sleep(0.05)  # Let the writer wait
+            reader = self.run_thread(read)
+            time.sleep(0.05)
+            # Check that neither got the lock while it is read
+            self.assertEqual(events, [])
+        writer.join(5)
+        reader.join(5)
+        # Check that the writer went before the new reader
+        self.assertEqual(events, ["write", "read"])
+
+    def test_reentrant(self):
+        """Test taking the lock again from the thread holding it"""
+        with self.lock:
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                pass
+        # Check that the lock is free again
+        thread = self.run_thread(self.lock.acquire_write)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
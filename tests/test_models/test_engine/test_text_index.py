@@ -0,0 +1,65 @@
+"""Module for testing TextIndex class"""
+import unittest
+from io import StringIO
+from models.engine.text_index import TextIndex, tokenize
+
+
+class TestTextIndex(unittest.TestCase):
+    """Tests for the TextIndex class"""
+
+    def setUp(self):
+        """Set up test variables"""
+        # Index a few reviews
+        self.index = TextIndex()
+        self.index.add("Review.1", ["Quiet room, great view"])
+        self.index.add("Review.2", ["Noisy street but great host"])
+        self.index.add("Review.3", ["Quiet, quiet, quiet"])
+        self.index.add("Place.1", ["Beach house", None])
+
+    def test_tokenize(self):
+        """Test splitting a text into lowercase words"""
+        self.assertEqual(tokenize("Café, au-lait!"), ["café", "au", "lait"])
+
+    def test_search(self):
+        """Test that the best matches come first"""
+        found = self.index.search("quiet")
+        # Check that the review repeating the word ranks first
+        self.assertEqual([key for key, _ in found], ["Review.3", "Review.1"])
+        self.assertGreater(found[0][1], found[1][1])
+        # Check that any of the words matches, and the limit and prefix
+        self.assertEqual(len(self.index.search("quiet house")), 3)
+        self.assertEqual(len(self.index.search("quiet great", limit=1)), 1)
+        self.assertEqual(self.index.search("house", prefix="Review."), [])
+        self.assertEqual(self.index.search("unknown words"), [])
+
+    def test_update_and_remove(self):
+        """Test that changed and removed texts are found where they are"""
+        self.index.add("Review.3", ["Great bed"])  # Change the words
+        self.index.remove("Review.1")
+        self.index.add("Place.1", ["", None])  # No words left
+        # Check that only the current words are found
+        self.assertEqual([key for key, _ in self.index.search("quiet")], [])
+        self.assertEqual({key for key, _ in self.index.search("great")},
+                         {"Review.2", "Review.3"})
+        self.assertEqual(len(self.index), 2)
+
+    def test_save_and_load(self):
+        """Test that a saved index gives the same results"""
+        file = StringIO()
+        self.index.save(file)
+        file.seek(0)
+        index = TextIndex()
+        index.load(file)
+        # Check that the loaded index is unchanged and ranks the same
+        self.assertFalse(index.changed)
+        self.assertEqual(index.search("quiet great"),
+                         self.index.search("quiet great"))
+        index.add("Review.1", ["Quiet room, great view"])  # Same text
+        self.assertFalse(index.changed)
+        # Check that other files are rejected
+        with self.assertRaises(ValueError):
+            index.load(StringIO('{"version": 0}'))
+
+
+if __name__ == "__main__":
+    unittest.main()
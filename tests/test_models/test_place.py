@@ -6,6 +6,9 @@ import sys
 from unittest.mock import patch
 from datetime import datetime
 from models.place import Place
+from models.review import Review
+from models.amenity import Amenity
+from models import storage
 from models.base_model import BaseModel
 sys.path.append('../')
 
@@ -148,6 +151,20 @@ class TestPlace(unittest.TestCase):
         # Check if amenity_ids is modified correctly
         self.assertEqual(self.place_instance.amenity_ids, ["sauna"])
 
+    def test_reviews_and_amenities(self):
+        """
+        Test the reviews and amenities of a place.
+        """
+        review = Review()  # Create a review of the place
+        review.place_id = self.place_instance.id
+        wifi, pool = Amenity(), Amenity()  # Create two amenities
+        self.place_instance.amenity_ids = [pool.id, "missing", wifi.id]
+        # Check that the review and the stored amenities are found
+        self.assertEqual(self.place_instance.reviews, [review])
+        self.assertEqual(self.place_instance.amenities, [pool, wifi])
+        storage.delete(review)  # Delete the review
+        self.assertEqual(self.place_instance.reviews, [])
+
 
 if __name__ == '__main__':
     unittest.main()  # Run the unit tests
@@ -1,15 +1,28 @@
 """
 Unit tests for the Review class.
 """
+import os
+import tempfile
 import unittest
 import sys
 from unittest.mock import patch
 from datetime import datetime
+from models import storage
 from models.review import Review
 from models.base_model import BaseModel
 sys.path.append('../')
 
 
+def setUpModule():
+    """Write the file of the shared storage in a temporary directory"""
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    path = patch.object(storage, "_FileStorage__file_path",
+                        os.path.join(directory.name, "file.json"))
+    path.start()
+    unittest.addModuleCleanup(path.stop)
+
+
 class TestReview(unittest.TestCase):
     """
     Unit tests for the Review class.
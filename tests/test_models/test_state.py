@@ -6,6 +6,7 @@ import sys
 from unittest.mock import patch
 from models.base_model import BaseModel
 from models.state import State
+from models.city import City
 from datetime import datetime
 sys.path.append('../')
 
@@ -118,6 +119,22 @@ class TestState(unittest.TestCase):
         # Check if the string representation matches the expected format
         self.assertEqual(str(state_instance), expected_format)
 
+    def test_state_cities(self):
+        """
+        Test that the cities of a state follow their state_id.
+        """
+        state_instance = State()  # Create a state and two cities
+        cities = sorted([City(), City()], key=lambda city: city.id)
+        for city in cities:
+            city.state_id = state_instance.id  # Attach the city
+        # Check that both cities are found, sorted by id
+        self.assertEqual(state_instance.cities, cities)
+        cities[0].state_id = "other"  # Move a city to another state
+        self.assertEqual(state_instance.cities, cities[1:])
+        # Check that the relationship cannot be assigned
+        with self.assertRaises(AttributeError):
+            state_instance.cities = []
+
 
 if __name__ == "__main__":
     # Run the unit tests
@@ -2,12 +2,27 @@
 
 """Defines a class TestUser for testing the User module."""
 
+import os  # Import os to build the path of the storage file
+import tempfile  # Import tempfile for the storage file
 import unittest  # Import the unittest module for creating unit tests
+from unittest.mock import patch  # Import patch to move the storage file
+from models import storage  # Import the shared storage
 from models.user import User  # Import the User class
+from models.place import Place  # Import the Place class
 from models.base_model import BaseModel  # Import the BaseModel class
 import datetime  # Import the datetime module
 
 
+def setUpModule():
+    """Write the file of the shared storage in a temporary directory"""
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    path = patch.object(storage, "_FileStorage__file_path",
+                        os.path.join(directory.name, "file.json"))
+    path.start()
+    unittest.addModuleCleanup(path.stop)
+
+
 class TestUser(unittest.TestCase):
     """Defines tests for the User class."""
 
@@ -114,6 +129,16 @@ class TestUser(unittest.TestCase):
         self.assertNotEqual(self.user1.id, user3.id)
         self.assertNotEqual(self.user1.id, user4.id)
 
+    def test_places(self):
+        """Tests that the places of a user follow their user_id."""
+        # Create a place owned by the user
+        place = Place()
+        place.user_id = self.user1.id
+        # Check that the place is found, and no longer once given away
+        self.assertEqual(self.user1.places, [place])
+        place.user_id = "someone else"
+        self.assertEqual(self.user1.places, [])
+
 
 if __name__ == '__main__':
     unittest.main()